@@ -10,7 +10,7 @@ Created on Mon Jun 16 14:24:21 2025
 import tkinter as tk
 from tkinter import scrolledtext
 import threading
-from main import main_logic  # You’ll wrap your main.py logic into a function
+from utils.daemon_client import display, stream_command, prewarm  # talks to orion_daemon.py when it is running
 
 
 class OrionGUI:
@@ -45,12 +45,17 @@ class OrionGUI:
         thread.start()
 
     def run_orion_logic(self, user_command):
-        result = main_logic(user_command)
-        self.output_box.insert(tk.END, result + "\n")
+        for text in display(stream_command(user_command)):
+            self.root.after(0, self.append_output, text)
+
+    def append_output(self, text):
+        # called on the Tk main loop so the worker thread never touches widgets
+        self.output_box.insert(tk.END, text)
         self.output_box.see(tk.END)
 
 
 if __name__ == "__main__":
+    prewarm()
     root = tk.Tk()
     app = OrionGUI(root)
     root.mainloop()
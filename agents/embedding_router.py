@@ -0,0 +1,156 @@
+# agents/embedding_router.py
+
+import os
+import threading
+from pathlib import Path
+
+# NumPy is optional; without it the embedding engine is skipped and the generative planner runs.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils import ollama_client
+from utils.memory import get_recent_history
+from agents import fast_router
+
+# Nearest-neighbour intent router: commands are embedded and compared (cosine) with
+# labelled exemplars - the planner's few-shot examples plus successful history.
+# Exemplar vectors are cached on disk so only new exemplars are ever embedded.
+
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+DEFAULT_THRESHOLD = 0.8
+INDEX_FILE = Path("orion_intent_index.npz")
+HISTORY_EXEMPLARS = 50
+
+# Agents whose info can be derived from the raw command when no rule supplies slots.
+_INFO_FROM_COMMAND = {
+    "task_list": lambda c: {},
+    "code": lambda c: {"prompt": c},
+    "papers": lambda c: {"topic": c},
+    "knowledge": lambda c: {"topic": c},
+    "search": lambda c: {"query": c},
+    "notes_search": lambda c: {"query": c},
+    "updater": lambda c: {"topic": c},
+}
+
+_lock = threading.Lock()
+_index = {"model": None, "texts": [], "labels": [], "raw": None, "matrix": None}
+
+
+def get_threshold() -> float:
+    return float(os.environ.get("ORION_EMBED_ROUTE_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def _exemplars():
+    """(text, agent) pairs; later entries win when the same text appears twice."""
+    from agents.llm_planner_agent import FEW_SHOT_EXAMPLES
+    labelled = {}
+    for command, plan in FEW_SHOT_EXAMPLES:
+        labelled[command.strip().lower()] = plan["agent"]
+    for h in get_recent_history(HISTORY_EXEMPLARS):
+        command = (h.get("command") or "").strip().lower()
+        agent = h.get("agent")
+        result = h.get("result") or ""
+        if not command or agent in (None, "unknown", "chat", "email", "multi"):
+            continue
+        if "❌" in result or "🤷" in result or "⚠️" in result:
+            continue
+        labelled[command] = agent
+    return list(labelled.items())
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _load_cached_vectors(model: str) -> dict:
+    if not INDEX_FILE.exists():
+        return {}
+    try:
+        data = np.load(INDEX_FILE, allow_pickle=False)
+        if str(data["model"]) != model:
+            return {}
+        return {str(t): v for t, v in zip(data["texts"], data["vectors"])}
+    except Exception as e:
+        print(f"⚠️ Intent index unreadable, rebuilding: {e}")
+        return {}
+
+
+def _refresh_index(model: str):
+    """Bring the in-memory matrix up to date with the current exemplars; embeds only new texts."""
+    pairs = _exemplars()
+    texts = [t for t, _ in pairs]
+    labels = [a for _, a in pairs]
+    if _index["model"] == model and _index["texts"] == texts:
+        _index["labels"] = labels
+        return None
+
+    if _index["model"] == model and _index["raw"] is not None:
+        known = dict(zip(_index["texts"], _index["raw"]))
+    else:
+        known = _load_cached_vectors(model)
+
+    missing = [t for t in texts if t not in known]
+    if missing:
+        vectors, err, _ = ollama_client.embed(model, missing, timeout=30)
+        if err:
+            return err
+        for t, v in zip(missing, vectors):
+            known[t] = np.asarray(v, dtype=np.float32)
+
+    raw = np.stack([np.asarray(known[t], dtype=np.float32) for t in texts])
+    _index.update(model=model, texts=texts, labels=labels, raw=raw, matrix=_normalize_rows(raw))
+    if missing:
+        try:
+            tmp = INDEX_FILE.with_name("orion_intent_index.tmp.npz")
+            np.savez(tmp, model=np.array(model), texts=np.array(texts), vectors=raw)
+            os.replace(tmp, INDEX_FILE)
+        except Exception as e:
+            print(f"⚠️ Intent index write failed: {e}")
+    return None
+
+
+def nearest(command: str, model: str | None = None):
+    """Return (agent, score, exemplar_text) of the closest exemplar, or (None, 0.0, "") on failure."""
+    if np is None:
+        return None, 0.0, ""
+    model = model or DEFAULT_EMBED_MODEL
+    with _lock:
+        err = _refresh_index(model)
+        if err:
+            print(f"⚠️ Embedding router unavailable: {err}")
+            return None, 0.0, ""
+        matrix, labels, texts = _index["matrix"], _index["labels"], _index["texts"]
+
+    vectors, err, _ = ollama_client.embed(model, command, timeout=30)
+    if err:
+        print(f"⚠️ Embedding router unavailable: {err}")
+        return None, 0.0, ""
+    query = np.asarray(vectors[0], dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if not norm or matrix.shape[1] != query.shape[0]:
+        return None, 0.0, ""
+    scores = matrix @ (query / norm)
+    best = int(np.argmax(scores))
+    return labels[best], float(scores[best]), texts[best]
+
+
+def plan(command: str, model: str | None = None):
+    """
+    Plan for command from its nearest exemplar, or None when the match is below the
+    threshold or the agent needs slots that can't be extracted without the LLM.
+    """
+    agent, score, match = nearest(command, model)
+    if not agent or score < get_threshold():
+        return None
+    print(f"🧭 Embedding route: {agent} (cos={score:.2f}, like '{match}')")
+    rule_plan, _ = fast_router.route(command)
+    if rule_plan and rule_plan["agent"] == agent:
+        return rule_plan
+    build_info = _INFO_FROM_COMMAND.get(agent)
+    if build_info is None:
+        return None
+    return {"agent": agent, "info": build_info(command)}
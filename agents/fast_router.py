@@ -0,0 +1,277 @@
+# agents/fast_router.py
+
+import os
+import re
+
+# Deterministic router that runs before any model call.
+# Command rules are anchored, precompiled regexes with slot extractors and a high
+# confidence; trigger rules are the old keyword heuristics (word-boundary regexes,
+# low confidence) used when the LLM planner fails or answers "unknown".
+
+DEFAULT_THRESHOLD = 0.9
+
+LANGUAGES = {
+    "arabic": "ar", "bengali": "bn", "chinese": "zh-CN", "dutch": "nl", "english": "en",
+    "french": "fr", "german": "de", "greek": "el", "hindi": "hi", "italian": "it",
+    "japanese": "ja", "korean": "ko", "polish": "pl", "portuguese": "pt", "russian": "ru",
+    "spanish": "es", "swedish": "sv", "turkish": "tr", "ukrainian": "uk", "urdu": "ur",
+}
+_LANG_ALT = "|".join(sorted(LANGUAGES, key=len, reverse=True))
+_DATETIME = r"\d{4}-\d{2}-\d{2} \d{1,2}:\d{2}"
+
+_COMMAND_RULES = []
+_TRIGGER_RULES = []
+
+
+def _command(pattern: str, confidence: float = 0.95):
+    """Register a slot extractor for commands that fully match pattern."""
+    def register(fn):
+        _COMMAND_RULES.append((re.compile(pattern, re.IGNORECASE), confidence, fn))
+        return fn
+    return register
+
+
+def _trigger(pattern: str, confidence: float = 0.4):
+    """Register a keyword heuristic for commands that contain pattern anywhere."""
+    def register(fn):
+        _TRIGGER_RULES.append((re.compile(pattern, re.IGNORECASE), confidence, fn))
+        return fn
+    return register
+
+
+def normalize(command: str) -> str:
+    text = " ".join(command.split())
+    text = re.sub(r"^(?:hey orion|orion|please)[,\s]+", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"[\s,]*(?:please)?[.!?\s]*$", "", text, flags=re.IGNORECASE)
+    return text
+
+
+# === SYSTEM ===
+
+@_command(r"(?:lock|lock up) (?:my |the )?(?:screen|computer|pc|laptop|workstation)", 0.98)
+def _lock(m, command):
+    return "system", {"action": "lock"}
+
+
+@_command(r"(?:turn |put )?(?:the )?volume (up|down)|(raise|increase|lower|decrease|reduce) (?:the )?volume", 0.98)
+def _volume(m, command):
+    word = (m.group(1) or m.group(2)).lower()
+    direction = "up" if word in ("up", "raise", "increase") else "down"
+    return "system", {"action": "volume", "direction": direction}
+
+
+@_command(r"(?:un)?mute(?: the)?(?: volume| audio| sound)?", 0.97)
+def _mute(m, command):
+    return "system", {"action": "volume", "direction": "mute"}
+
+
+@_command(r"(?:turn |set )?(?:the )?(?:screen )?brightness (up|down)|(dim|brighten) (?:the |my )?(?:screen|display)", 0.97)
+def _brightness(m, command):
+    word = (m.group(1) or m.group(2)).lower()
+    return "system", {"action": "brightness", "direction": "up" if word in ("up", "brighten") else "down"}
+
+
+# === TASKS ===
+
+@_command(r"(?:show|list|display|what are)(?: me)? (?:my |all |all my |the )?(?:pending |queued )?tasks", 0.97)
+def _task_list(m, command):
+    return "task_list", {}
+
+
+@_command(r"(?:queue|add) (?:a )?(research|knowledge) task (?:on|about|for) (.+)", 0.95)
+def _task_add(m, command):
+    return "task_add", {"type": m.group(1).lower(), "topic": m.group(2)}
+
+
+# === TRANSLATE ===
+
+@_command(rf"translate (.+?) (?:to|into) ({_LANG_ALT})", 0.97)
+def _translate_known(m, command):
+    return "translate", {"text": m.group(1).strip("\"'"), "language": LANGUAGES[m.group(2).lower()]}
+
+
+@_command(r"translate (.+?) (?:to|into) ([a-z-]+)", 0.6)
+def _translate_other(m, command):
+    return "translate", {"text": m.group(1).strip("\"'"), "language": m.group(2).lower()}
+
+
+# === NOTES ===
+
+@_command(r"(?:read|show|open)(?: me)?(?: my)? notes (?:on|about|for) (.+)", 0.96)
+def _notes_read(m, command):
+    return "notes_read", {"topic": m.group(1)}
+
+
+@_command(r"(?:clear|delete|erase|wipe)(?: my| all)? notes (?:on|about|for) (.+)", 0.96)
+def _notes_clear(m, command):
+    return "notes_clear", {"topic": m.group(1)}
+
+
+@_command(r"(?:search|find|grep)(?: in| through)?(?: my| all)? notes (?:for|about|on) (.+)", 0.96)
+def _notes_search(m, command):
+    return "notes_search", {"query": m.group(1)}
+
+
+@_command(r"(?:add|save|write)(?: a)? note (?:on|about|to|for) (.+?): (.+)", 0.95)
+def _notes_add(m, command):
+    return "notes_add", {"topic": m.group(1), "content": m.group(2)}
+
+
+# === MEETINGS ===
+
+@_command(r"start(?: a| the)? meeting(?: (?:about|on|for) (.+))?", 0.96)
+def _meeting_start(m, command):
+    return "meeting", {"action": "start", "topic": m.group(1) or "meeting"}
+
+
+@_command(r"(?:stop|end|finish)(?: the)? meeting(?: and summari[sz]e(?: it)?)?|summari[sz]e(?: the)? meeting", 0.97)
+def _meeting_stop(m, command):
+    return "meeting", {"action": "stop"}
+
+
+@_command(r"add (?:this )?to(?: the)? meeting[:,]? (.+)", 0.95)
+def _meeting_add(m, command):
+    return "meeting", {"action": "add", "content": m.group(1)}
+
+
+# === SCHEDULING ===
+
+@_command(rf"remind me to (.+?) (?:at|on) ({_DATETIME})", 0.95)
+def _reminder(m, command):
+    return "reminder", {"task": m.group(1), "datetime": m.group(2)}
+
+
+@_command(rf"schedule (.+?) (?:at|on) ({_DATETIME})", 0.95)
+def _calendar(m, command):
+    return "calendar", {"event": m.group(1), "datetime": m.group(2)}
+
+
+# === PAPERS / CALLS ===
+
+@_command(r"(?:find|search(?: for)?|show|get)(?: me)?(?: recent| latest| new)? (?:research )?papers (?:on|about) (.+)", 0.95)
+def _papers(m, command):
+    return "papers", {"topic": m.group(1)}
+
+
+@_command(r"(?:what(?:'s| is) )?(?:my |the )?(?:current )?call status", 0.95)
+def _call_get(m, command):
+    return "call", {"action": "get"}
+
+
+@_command(r"set(?: my)? call status to (.+)", 0.96)
+def _call_set(m, command):
+    return "call", {"action": "set", "message": m.group(1)}
+
+
+# === KEYWORD TRIGGERS (fallback only) ===
+
+@_trigger(r"\b(?:papers?|arxiv|research)\b")
+def _t_papers(m, command):
+    return "papers", {"topic": command}
+
+
+@_trigger(r"\bnotes?\b.*\bread\b|\bread\b.*\bnotes?\b")
+def _t_notes_read(m, command):
+    return "notes_read", {"topic": command}
+
+
+@_trigger(r"\bnotes?\b.*\b(?:add|save)\b|\b(?:add|save)\b.*\bnotes?\b")
+def _t_notes_add(m, command):
+    return "notes_add", {"topic": "general", "content": command}
+
+
+@_trigger(r"\bnotes?\b.*\b(?:clear|delete)\b|\b(?:clear|delete)\b.*\bnotes?\b")
+def _t_notes_clear(m, command):
+    return "notes_clear", {"topic": "general"}
+
+
+@_trigger(r"\bmeeting\b.*\bstart\b|\bstart\b.*\bmeeting\b")
+def _t_meeting_start(m, command):
+    return "meeting", {"action": "start", "topic": command}
+
+
+@_trigger(r"\bmeeting\b.*\b(?:stop|end|summari[sz]e)\b|\b(?:stop|end|summari[sz]e)\b.*\bmeeting\b")
+def _t_meeting_stop(m, command):
+    return "meeting", {"action": "stop"}
+
+
+@_trigger(r"\bmeeting\b.*\badd\b|\badd\b.*\bmeeting\b")
+def _t_meeting_add(m, command):
+    return "meeting", {"action": "add", "content": command}
+
+
+@_trigger(r"\b(?:code|python|function)\b")
+def _t_code(m, command):
+    return "code", {"prompt": command}
+
+
+@_trigger(r"\b(?:scaffold|project)\b")
+def _t_scaffold(m, command):
+    return "scaffold", {"project": command, "template": "opencv_face_tracker"}
+
+
+@_trigger(r"\bcall\b")
+def _t_call(m, command):
+    return "call", {"action": "set", "message": command}
+
+
+@_trigger(r"\block\b")
+def _t_lock(m, command):
+    return "system", {"action": "lock"}
+
+
+@_trigger(r"\bvolume\b")
+def _t_volume(m, command):
+    lc = command.lower()
+    direction = "up" if "up" in lc or "raise" in lc else "down" if "down" in lc or "lower" in lc else "mute" if "mute" in lc else "up"
+    return "system", {"action": "volume", "direction": direction}
+
+
+@_trigger(r"\bbrightness\b")
+def _t_brightness(m, command):
+    lc = command.lower()
+    return "system", {"action": "brightness", "direction": "up" if "up" in lc or "brighter" in lc else "down"}
+
+
+@_trigger(r"\bupdate\b")
+def _t_update(m, command):
+    topic = command if "feature" in command.lower() else "AI assistant new features"
+    return "updater", {"topic": topic}
+
+
+@_trigger(r"\btranslate\b")
+def _t_translate(m, command):
+    return "translate", {"text": command, "language": "en"}
+
+
+def get_threshold() -> float:
+    return float(os.environ.get("ORION_FAST_ROUTE_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def route(command: str, include_triggers: bool = False):
+    """
+    Match command against the rules.
+    Returns (plan, confidence) for the first matching rule, or (None, 0.0).
+    Trigger rules are only consulted when include_triggers is set.
+    """
+    text = normalize(command)
+    for pattern, confidence, extract in _COMMAND_RULES:
+        m = pattern.fullmatch(text)
+        if m:
+            agent, info = extract(m, text)
+            return {"agent": agent, "info": info}, confidence
+    if include_triggers:
+        for pattern, confidence, extract in _TRIGGER_RULES:
+            m = pattern.search(command)
+            if m:
+                agent, info = extract(m, command)
+                return {"agent": agent, "info": info}, confidence
+    return None, 0.0
+
+
+def fast_plan(command: str):
+    """Plan for command if a rule matches with at least the configured confidence, else None."""
+    plan, confidence = route(command)
+    if plan and confidence >= get_threshold():
+        return plan
+    return None
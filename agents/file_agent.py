@@ -4,21 +4,61 @@ import os
 import subprocess
 import platform
 from pathlib import Path
+from utils import file_index, file_scanner
+
+def _is_exact(path, target_filename):
+    return Path(path).name.lower() == target_filename.lower()
+
+
+def _indexed(start_path, target_filename):
+    for hit in file_index.find(target_filename, root=start_path, limit=5):
+        if _is_exact(hit, target_filename) and os.path.isfile(hit):
+            print(f"✅ Found: {hit}")
+            return hit
+    return None
+
 
 def global_find_file(start_path, target_filename):
+    """Path of a file named exactly target_filename (case-insensitive) under start_path, or None."""
     start_path = Path(start_path).expanduser().resolve()
+
+    # Indexed lookup first; the background refresh keeps the index current for next time
+    if file_index.is_built(start_path):
+        hit = _indexed(start_path, target_filename)
+        if hit:
+            file_index.refresh_in_background(start_path)
+            return hit
+        # a miss may just be stale: catch up (only changed directories are re-listed) and look again
+        try:
+            file_index.refresh(start_path)
+        except Exception as e:
+            print(f"⚠️ File index refresh failed: {e}")
+        hit = _indexed(start_path, target_filename)
+        if not hit:
+            print("❌ File not found.")
+        return hit
+    file_index.refresh_in_background(start_path)
+
     print(f"🌎 Searching for {target_filename} in {start_path} ...")
 
-    for root, dirs, files in os.walk(start_path):
-        for file in files:
-            if file.lower() == target_filename.lower():
-                file_path = Path(root) / file
-                print(f"✅ Found: {file_path}")
-                return str(file_path)
+    file_path = file_scanner.find_first(start_path, target_filename)
+    if file_path:
+        print(f"✅ Found: {file_path}")
+        return file_path
 
     print("❌ File not found.")
     return None
 
+
+def find_similar(start_path, target_filename, limit=5):
+    """Indexed files whose names are close to target_filename, for the user to pick from."""
+    start_path = Path(start_path).expanduser().resolve()
+    return [
+        hit for hit in file_index.find(target_filename, root=start_path, limit=limit)
+        if not _is_exact(hit, target_filename) and os.path.isfile(hit)
+    ]
+
+
 def open_file(file_path):
     if not file_path:
         print("❌ No file path provided.")
@@ -38,6 +78,7 @@ def open_file(file_path):
         return
 
     print(f"📂 Opening file: {path}")
+    file_index.record_use(path)
 
     system_platform = platform.system()
 
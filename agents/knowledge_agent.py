@@ -1,54 +1,61 @@
-import requests
 from utils.memory import load_memory, save_memory
+from utils import serpapi, summarizer, vector_store
+
+SUMMARY_INSTRUCTION = "Summarize the following web snippets into a concise update (3 bullets max):"
 
 def fetch_web_snippets(query, serpapi_key):
     if not serpapi_key:
         print("❌ SerpAPI key missing; cannot update knowledge.")
         return []
     try:
-        resp = requests.get(
-            "https://serpapi.com/search.json",
-            params={"engine": "google", "q": query, "api_key": serpapi_key},
-            timeout=20,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        snippets = []
-        for result in data.get("organic_results", [])[:5]:
-            snippet = result.get("snippet")
-            if snippet:
-                snippets.append(snippet)
-        return snippets
+        return serpapi.snippets(serpapi.search(query, serpapi_key))
     except Exception as e:
         print(f"❌ Knowledge fetch failed: {e}")
         return []
 
 
-def summarize_snippets(snippets, model, ollama_url):
-    if not snippets:
-        return ""
-    prompt = "Summarize the following web snippets into a concise update (3 bullets max):\n\n"
-    prompt += "\n".join(f"- {s}" for s in snippets)
+async def fetch_web_snippets_async(query, serpapi_key):
+    if not serpapi_key:
+        print("❌ SerpAPI key missing; cannot update knowledge.")
+        return []
     try:
-        resp = requests.post(
-            f"{ollama_url}/api/generate",
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=60,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        if "error" in payload:
-            print(f"❌ LLM summarize error: {payload['error']}")
-            return ""
-        return payload.get("response", "").strip()
+        return serpapi.snippets(await serpapi.search_async(query, serpapi_key))
     except Exception as e:
-        print(f"❌ LLM summarize failed: {e}")
+        print(f"❌ Knowledge fetch failed: {e}")
+        return []
+
+
+def summarize_snippets(snippets, model, ollama_url, on_token=None):
+    if not snippets:
         return ""
+    text, err = summarizer.summarize([f"- {s}" for s in snippets], SUMMARY_INSTRUCTION, model, ollama_url, on_token=on_token)
+    if err:
+        print(f"❌ LLM summarize failed: {err}")
+        return ""
+    return text
 
 
-def update_knowledge(topic, serpapi_key, model, ollama_url="http://127.0.0.1:11434"):
+def update_knowledge(topic, serpapi_key, model, ollama_url=None, on_token=None):
     snippets = fetch_web_snippets(topic, serpapi_key)
-    summary = summarize_snippets(snippets, model, ollama_url)
+    summary = summarize_snippets(snippets, model, ollama_url, on_token=on_token)
+    return _store_knowledge(topic, summary)
+
+
+async def update_knowledge_async(topic, serpapi_key, model, ollama_url=None, on_token=None):
+    snippets = await fetch_web_snippets_async(topic, serpapi_key)
+    summary = ""
+    if snippets:
+        text, err = await summarizer.summarize_async(
+            [f"- {s}" for s in snippets], SUMMARY_INSTRUCTION, model, ollama_url, on_token=on_token
+        )
+        if err:
+            print(f"❌ LLM summarize failed: {err}")
+        else:
+            summary = text
+    return _store_knowledge(topic, summary)
+
+
+def _store_knowledge(topic, summary):
     if not summary:
         return "❌ Could not update knowledge."
     memory = load_memory()
@@ -56,4 +63,5 @@ def update_knowledge(topic, serpapi_key, model, ollama_url="http://127.0.0.1:114
     knowledge[topic] = summary
     memory["knowledge"] = knowledge
     save_memory(memory)
+    vector_store.add_knowledge(topic, summary)
     return f"📚 Knowledge updated for '{topic}':\n{summary}"
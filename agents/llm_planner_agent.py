@@ -1,174 +1,378 @@
 # agents/llm_planner_agent.py
 
-import requests
+import hashlib
 import json
 import os
+import threading
+from functools import lru_cache
 from utils.gemini_client import generate as gemini_generate, get_gemini_api_key
+from utils import ollama_client
+from utils import plan_cache
+from utils.config import get_planner_engine
+from agents import fast_router, embedding_router
 
-OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 DEFAULT_MODEL = "codellama:instruct"
+# Plans for these agents depend on more than the command text and are never cached.
+UNCACHEABLE_AGENTS = ("unknown", "chat", "email")
+# Upper bound on steps in one multi-intent plan.
+MAX_STEPS = 6
+# Tokens read past the closed plan object while waiting for Ollama's final stats chunk.
+DRAIN_TOKENS = 16
+
+# info fields each agent accepts: field -> allowed values (None = any string).
+# Drives plan validation and the JSON schema sent to Ollama for constrained output.
+AGENT_INFO_FIELDS = {
+    "chat": {"reply": None},
+    "file": {"filename": None},
+    "email": {"recipient": None, "subject": None, "message": None},
+    "browser": {"url": None, "search": None},
+    "search": {"query": None},
+    "calendar": {"event": None, "datetime": None},
+    "reminder": {"task": None, "datetime": None},
+    "translate": {"text": None, "language": None},
+    "knowledge": {"topic": None},
+    "hardware": {"action": ["lock_screen", "shutdown"]},
+    "system": {"action": ["lock", "volume", "brightness"], "direction": ["up", "down", "mute"]},
+    "task_add": {"type": ["research", "knowledge"], "topic": None},
+    "task_list": {},
+    "notes_add": {"topic": None, "content": None},
+    "notes_read": {"topic": None},
+    "notes_clear": {"topic": None},
+    "notes_search": {"query": None},
+    "meeting": {"action": ["start", "add", "stop"], "topic": None, "content": None},
+    "papers": {"topic": None},
+    "code": {"prompt": None},
+    "scaffold": {"project": None, "template": ["opencv_face_tracker"], "description": None},
+    "call": {"action": ["set", "get", "twiml"], "message": None, "caller": None},
+    "updater": {"topic": None},
+    "unknown": {},
+}
+
+# info fields an agent can't run without (dispatch answers "❌ Missing ..." instead).
+REQUIRED_INFO_FIELDS = {
+    "file": ["filename"],
+    "browser": ["url"],
+    "search": ["query"],
+    "calendar": ["event", "datetime"],
+    "reminder": ["task", "datetime"],
+    "translate": ["text", "language"],
+    "hardware": ["action"],
+    "system": ["action"],
+}
+
+_stats_lock = threading.Lock()
+PLANNER_STATS = {
+    "llm_plans": 0,        # plan_command calls that reached the model
+    "attempts": 0,         # model generations (first tries + retries)
+    "retries": 0,
+    "llm_errors": 0,
+    "parse_failures": 0,
+    "schema_failures": 0,
+    "fallbacks": 0,        # gave up on the model and used keyword routing
+}
+
+FEW_SHOT_EXAMPLES = [
+    ("What can you do?", {"agent": "chat", "info": {"reply": "I'm Orion, your personal assistant. I can search the web, manage email, notes, tasks, reminders and your calendar, translate text, write code and control your machine."}}),
+    ("Translate thank you to Arabic", {"agent": "translate", "info": {"text": "thank you", "language": "ar"}}),
+    ("Translate good night to French", {"agent": "translate", "info": {"text": "good night", "language": "fr"}}),
+    ("Schedule project presentation on 2025-06-30 15:00", {"agent": "calendar", "info": {"event": "project presentation", "datetime": "2025-06-30 15:00"}}),
+    ("Remind me to check oven at 2025-06-24 21:00", {"agent": "reminder", "info": {"task": "check oven", "datetime": "2025-06-24 21:00"}}),
+    ("Update yourself on AI news", {"agent": "knowledge", "info": {"topic": "AI news"}}),
+    ("Lock my screen", {"agent": "hardware", "info": {"action": "lock_screen"}}),
+    ("Queue a research task on quantum computing", {"agent": "task_add", "info": {"type": "research", "topic": "quantum computing"}}),
+    ("Show my tasks", {"agent": "task_list", "info": {}}),
+    ("Add note about LLM safety", {"agent": "notes_add", "info": {"topic": "LLM safety", "content": "Model eval ideas..."}}),
+    ("Read notes on LLM safety", {"agent": "notes_read", "info": {"topic": "LLM safety"}}),
+    ("Clear notes on LLM safety", {"agent": "notes_clear", "info": {"topic": "LLM safety"}}),
+    ("What did I write about evaluation benchmarks?", {"agent": "notes_search", "info": {"query": "evaluation benchmarks"}}),
+    ("Start meeting about quarterly review", {"agent": "meeting", "info": {"action": "start", "topic": "quarterly review"}}),
+    ("Stop meeting and summarize", {"agent": "meeting", "info": {"action": "stop"}}),
+    ("Add this to the meeting: we need to ship on time", {"agent": "meeting", "info": {"action": "add", "content": "we need to ship on time"}}),
+    ("Find recent papers on diffusion models", {"agent": "papers", "info": {"topic": "diffusion models"}}),
+    ("Write a Python function for quicksort", {"agent": "code", "info": {"prompt": "Write a Python function for quicksort"}}),
+    ("Scaffold an OpenCV face tracker project", {"agent": "scaffold", "info": {"project": "OpenCV face tracker", "template": "opencv_face_tracker"}}),
+    ("Set call status to I'm busy, please call later", {"agent": "call", "info": {"action": "set", "message": "I'm busy, please call later"}}),
+    ("Lock my screen", {"agent": "system", "info": {"action": "lock"}}),
+    ("Volume up", {"agent": "system", "info": {"action": "volume", "direction": "up"}}),
+    ("Dim the screen", {"agent": "system", "info": {"action": "brightness", "direction": "down"}}),
+    ("Auto-update Orion with new feature ideas", {"agent": "updater", "info": {"topic": "AI assistant new features"}}),
+]
+
+# Compound commands: steps run in parallel unless depends_on says otherwise, and
+# "{id}" inside an info value is replaced by that step's output before it runs.
+MULTI_STEP_EXAMPLES = [
+    ("Search for diffusion models, take a note of what you find and remind me at 2025-06-24 17:00 to read it", {"steps": [
+        {"id": "s1", "agent": "search", "info": {"query": "diffusion models"}, "depends_on": []},
+        {"id": "s2", "agent": "notes_add", "info": {"topic": "diffusion models", "content": "{s1}"}, "depends_on": ["s1"]},
+        {"id": "s3", "agent": "reminder", "info": {"task": "read diffusion models notes", "datetime": "2025-06-24 17:00"}, "depends_on": []},
+    ]}),
+    ("Volume down and translate good morning to German", {"steps": [
+        {"id": "s1", "agent": "system", "info": {"action": "volume", "direction": "down"}, "depends_on": []},
+        {"id": "s2", "agent": "translate", "info": {"text": "good morning", "language": "de"}, "depends_on": []},
+    ]}),
+]
+
+
+def render_examples() -> str:
+    examples = FEW_SHOT_EXAMPLES + MULTI_STEP_EXAMPLES
+    return "\n\n".join(f"Command: {command}\n→ {json.dumps(plan, ensure_ascii=False)}" for command, plan in examples)
+
 
 def _validate_plan(obj: dict) -> bool:
+    """True if obj is an {"agent", "info"} plan whose info matches AGENT_INFO_FIELDS."""
     if not isinstance(obj, dict):
         return False
     agent = obj.get("agent")
     info = obj.get("info")
-    if agent not in ["file", "email", "browser", "search", "calendar", "reminder", "translate", "knowledge", "hardware", "system", "task_add", "task_list", "notes_add", "notes_read", "notes_clear", "meeting", "papers", "code", "scaffold", "call", "updater", "unknown"]:
+    if agent not in AGENT_INFO_FIELDS:
         return False
     if not isinstance(info, dict):
         return False
-    return True
-
-
-def _keyword_fallback(command: str):
-    lc = command.lower()
-    if "paper" in lc or "arxiv" in lc or "research" in lc:
-        return {"agent": "papers", "info": {"topic": command}}
-    if "note" in lc and "read" in lc:
-        return {"agent": "notes_read", "info": {"topic": command}}
-    if "note" in lc and ("add" in lc or "save" in lc):
-        return {"agent": "notes_add", "info": {"topic": "general", "content": command}}
-    if "note" in lc and ("clear" in lc or "delete" in lc):
-        return {"agent": "notes_clear", "info": {"topic": "general"}}
-    if "meeting" in lc:
-        if "start" in lc:
-            return {"agent": "meeting", "info": {"action": "start", "topic": command}}
-        if "stop" in lc or "end" in lc or "summarize" in lc:
-            return {"agent": "meeting", "info": {"action": "stop"}}
-        if "add" in lc:
-            return {"agent": "meeting", "info": {"action": "add", "content": command}}
-    if "code" in lc or "python" in lc or "function" in lc:
-        return {"agent": "code", "info": {"prompt": command}}
-    if "scaffold" in lc or "project" in lc:
-        return {"agent": "scaffold", "info": {"project": command, "template": "opencv_face_tracker"}}
-    if "call status" in lc or "call" in lc:
-        return {"agent": "call", "info": {"action": "set", "message": command}}
-    if "lock" in lc or "volume" in lc or "brightness" in lc:
-        if "lock" in lc:
-            return {"agent": "system", "info": {"action": "lock"}}
-        if "volume" in lc:
-            direction = "up" if "up" in lc or "raise" in lc else "down" if "down" in lc or "lower" in lc else "mute" if "mute" in lc else "up"
-            return {"agent": "system", "info": {"action": "volume", "direction": direction}}
-        if "brightness" in lc:
-            direction = "up" if "up" in lc or "brighter" in lc else "down"
-            return {"agent": "system", "info": {"action": "brightness", "direction": direction}}
-    if "update" in lc:
-        topic = command if "feature" in lc else "AI assistant new features"
-        return {"agent": "updater", "info": {"topic": topic}}
-    if "translate" in lc:
-        return {"agent": "translate", "info": {"text": command, "language": "en"}}
-    return {"agent": "unknown", "info": {}}
-
-
-def plan_command(command, model: str | None = None, history: list | None = None, retries: int = 1):
-    history_text = ""
-    if history:
-        history_lines = []
-        for h in history[-5:]:
-            history_lines.append(f"- User: {h.get('command','')} | Agent: {h.get('agent','')} | Result: {h.get('result','')}")
-        history_text = "\nRecent interactions:\n" + "\n".join(history_lines) + "\n"
-
-    prompt = f"""
+    fields = AGENT_INFO_FIELDS[agent]
+    for name, value in info.items():
+        if name not in fields or not isinstance(value, str):
+            return False
+        if fields[name] and value not in fields[name]:
+            return False
+    return all(info.get(name, "").strip() for name in REQUIRED_INFO_FIELDS.get(agent, []))
+
+
+def normalize_plan(obj):
+    """
+    Return obj as a single {"agent", "info"} plan or a {"steps": [...]} plan with ids
+    and depends_on filled in, or None if it is invalid. Dependencies must point at
+    earlier steps, which keeps the graph acyclic; a one-step plan collapses to a single plan.
+    """
+    if not isinstance(obj, dict):
+        return None
+    if "steps" not in obj:
+        return obj if _validate_plan(obj) else None
+    steps = obj["steps"]
+    if not isinstance(steps, list) or not steps or len(steps) > MAX_STEPS:
+        return None
+    normalized = []
+    seen = set()
+    for i, step in enumerate(steps, 1):
+        if not _validate_plan(step):
+            return None
+        step_id = str(step.get("id") or f"s{i}")
+        depends_on = step.get("depends_on") or []
+        if step_id in seen or not isinstance(depends_on, list) or any(d not in seen for d in depends_on):
+            return None
+        seen.add(step_id)
+        normalized.append({"id": step_id, "agent": step["agent"], "info": step["info"], "depends_on": depends_on})
+    if len(normalized) == 1:
+        return {"agent": normalized[0]["agent"], "info": normalized[0]["info"]}
+    return {"steps": normalized}
+
+
+def plan_agents(plan: dict) -> list:
+    """Agents used by a single or multi-step plan, in step order."""
+    if "steps" in plan:
+        return [step.get("agent") for step in plan["steps"]]
+    return [plan.get("agent")]
+
+
+@lru_cache(maxsize=1)
+def plan_schema() -> dict:
+    """
+    JSON schema for a plan: one branch per agent with that agent's info fields, plus a
+    "steps" branch whose items are the same agent branches with an id and depends_on.
+    """
+    branches = []
+    step_branches = []
+    for agent, fields in AGENT_INFO_FIELDS.items():
+        properties = {
+            name: {"type": "string", "enum": allowed} if allowed else {"type": "string"}
+            for name, allowed in fields.items()
+        }
+        info_schema = {"type": "object", "properties": properties, "additionalProperties": False}
+        if agent in REQUIRED_INFO_FIELDS:
+            info_schema["required"] = REQUIRED_INFO_FIELDS[agent]
+        plan_properties = {"agent": {"const": agent}, "info": info_schema}
+        branches.append({"type": "object", "properties": plan_properties, "required": ["agent", "info"]})
+        step_branches.append({
+            "type": "object",
+            "properties": {
+                "id": {"type": "string"},
+                **plan_properties,
+                "depends_on": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["id", "agent", "info", "depends_on"],
+        })
+    branches.append({
+        "type": "object",
+        "properties": {
+            "steps": {"type": "array", "items": {"anyOf": step_branches}, "minItems": 2, "maxItems": MAX_STEPS},
+        },
+        "required": ["steps"],
+    })
+    return {"anyOf": branches}
+
+
+def _output_format():
+    """ORION_PLANNER_FORMAT: "schema" (default, structured outputs), "json" (older Ollama) or "none"."""
+    mode = os.environ.get("ORION_PLANNER_FORMAT", "schema").strip().lower()
+    if mode == "none":
+        return None
+    if mode == "json":
+        return "json"
+    return plan_schema()
+
+
+def _read_json_object(tokens, drain: int = DRAIN_TOKENS) -> str:
+    """
+    Consume streamed tokens until the first top-level JSON object closes, then read up
+    to drain more tokens so the stream can reach Ollama's final chunk (which carries
+    load/prompt-eval stats) before it is stopped.
+    """
+    it = iter(tokens)
+    buf = []
+    depth = 0
+    in_string = escaped = False
+    try:
+        for token in it:
+            for ch in token:
+                buf.append(ch)
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif ch == "\\":
+                        escaped = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"' and depth:
+                    in_string = True
+                elif ch == "{":
+                    depth += 1
+                elif ch == "}" and depth:
+                    depth -= 1
+                    if depth == 0:
+                        break
+            else:
+                continue
+            # constrained output ends right after the object, so this is usually just the done chunk
+            for _ in zip(range(drain), it):
+                pass
+            break
+        return "".join(buf)
+    finally:
+        # closing the generator drops the HTTP stream, which makes Ollama stop generating
+        close = getattr(it, "close", None)
+        if close:
+            close()
+
+
+def _count(key: str):
+    with _stats_lock:
+        PLANNER_STATS[key] += 1
+
+
+def get_planner_stats() -> dict:
+    """Counters plus retry/parse/schema failure rates per model generation."""
+    with _stats_lock:
+        stats = dict(PLANNER_STATS)
+    attempts = stats["attempts"] or 1
+    for key in ("retries", "llm_errors", "parse_failures", "schema_failures"):
+        stats[f"{key}_rate"] = stats[key] / attempts
+    stats["fallback_rate"] = stats["fallbacks"] / (stats["llm_plans"] or 1)
+    return stats
+
+
+@lru_cache(maxsize=1)
+def prompt_prefix() -> str:
+    """
+    Static part of the planner prompt (instructions + examples). Every request starts
+    with exactly this text so Ollama can reuse its evaluated KV cache and only the
+    history/command suffix needs prompt evaluation.
+    """
+    examples_text = render_examples()
+    return f"""
 You are Orion's planner module. Read the user's natural language command and return a JSON object with:
-- "agent": one of [file, email, browser, search, calendar, reminder, translate, knowledge, hardware, system, task_add, task_list, notes_add, notes_read, notes_clear, meeting, papers, code, scaffold, call, updater, unknown]
+- "agent": one of [chat, file, email, browser, search, calendar, reminder, translate, knowledge, hardware, system, task_add, task_list, notes_add, notes_read, notes_clear, notes_search, meeting, papers, code, scaffold, call, updater, unknown]
 - "info": contains only the extracted values needed for that agent
 
+If the user is just chatting or asking about you (like "what can you do?", "who are you?"), use agent "chat" and put your full, helpful reply as Orion in info.reply.
+
+If the command asks for several things, return {{"steps": [...]}} instead: one step per action, each with "id", "agent", "info" and "depends_on" (ids of earlier steps it needs). Steps without dependencies run in parallel. Write "{{id}}" in an info value to use that step's output.
+
 Respond ONLY in valid JSON format.
 DO NOT include any explanation, markdown, or extra text.
-{history_text}
 
 Examples:
 
-Command: Translate thank you to Arabic
-→ {{"agent": "translate", "info": {{"text": "thank you", "language": "ar"}}}}
-
-Command: Translate good night to French
-→ {{"agent": "translate", "info": {{"text": "good night", "language": "fr"}}}}
-
-Command: Schedule project presentation on 2025-06-30 15:00
-→ {{"agent": "calendar", "info": {{"event": "project presentation", "datetime": "2025-06-30 15:00"}}}}
-
-Command: Remind me to check oven at 2025-06-24 21:00
-→ {{"agent": "reminder", "info": {{"task": "check oven", "datetime": "2025-06-24 21:00"}}}}
-
-Command: Update yourself on AI news
-→ {{"agent": "knowledge", "info": {{"topic": "AI news"}}}}
-
-Command: Lock my screen
-→ {{"agent": "hardware", "info": {{"action": "lock_screen"}}}}
-
-Command: Queue a research task on quantum computing
-→ {{"agent": "task_add", "info": {{"type": "research", "topic": "quantum computing"}}}}
-
-Command: Show my tasks
-→ {{"agent": "task_list", "info": {{}}}}
-
-Command: Add note about LLM safety
-→ {{"agent": "notes_add", "info": {{"topic": "LLM safety", "content": "Model eval ideas..."}}}}
-
-Command: Read notes on LLM safety
-→ {{"agent": "notes_read", "info": {{"topic": "LLM safety"}}}}
-
-Command: Clear notes on LLM safety
-→ {{"agent": "notes_clear", "info": {{"topic": "LLM safety"}}}}
-
-Command: Start meeting about quarterly review
-→ {{"agent": "meeting", "info": {{"action": "start", "topic": "quarterly review"}}}}
+{examples_text}
+"""
 
-Command: Stop meeting and summarize
-→ {{"agent": "meeting", "info": {{"action": "stop"}}}}
 
-Command: Add this to the meeting: we need to ship on time
-→ {{"agent": "meeting", "info": {{"action": "add", "content": "we need to ship on time"}}}}
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Hash of the prompt prefix and plan schema: any change to either invalidates cached plans."""
+    text = prompt_prefix() + json.dumps(plan_schema(), sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
 
-Command: Find recent papers on diffusion models
-→ {{"agent": "papers", "info": {{"topic": "diffusion models"}}}}
 
-Command: Write a Python function for quicksort
-→ {{"agent": "code", "info": {{"prompt": "Write a Python function for quicksort"}}}}
+def prewarm_planner(model: str | None = None):
+    """Load the router model and evaluate the static prompt prefix so the first real plan is fast."""
+    _, err, stats = ollama_client.load_model(model or DEFAULT_MODEL, prompt_prefix())
+    if err:
+        print(f"⚠️ Planner prewarm failed: {err}")
+    return stats
 
-Command: Scaffold an OpenCV face tracker project
-→ {{"agent": "scaffold", "info": {{"project": "OpenCV face tracker", "template": "opencv_face_tracker"}}}}
 
-Command: Set call status to I'm busy, please call later
-→ {{"agent": "call", "info": {{"action": "set", "message": "I'm busy, please call later"}}}}
+def _keyword_fallback(command: str):
+    plan, _ = fast_router.route(command, include_triggers=True)
+    return plan or {"agent": "unknown", "info": {}}
 
-Command: Lock my screen
-→ {{"agent": "system", "info": {{"action": "lock"}}}}
 
-Command: Volume up
-→ {{"agent": "system", "info": {{"action": "volume", "direction": "up"}}}}
+def plan_command(command, model: str | None = None, history: list | None = None, retries: int = 1,
+                 embed_model: str | None = None):
+    model = model or DEFAULT_MODEL
+    cached = plan_cache.get(command, model, prompt_version())
+    if cached:
+        return cached
 
-Command: Dim the screen
-→ {{"agent": "system", "info": {{"action": "brightness", "direction": "down"}}}}
+    if get_planner_engine() == "embedding":
+        routed = embedding_router.plan(command, embed_model)
+        if routed:
+            return routed
 
-Command: Auto-update Orion with new feature ideas
-→ {{"agent": "updater", "info": {{"topic": "AI assistant new features"}}}}
+    history_text = ""
+    if history:
+        history_lines = []
+        for h in history[-5:]:
+            history_lines.append(f"- User: {h.get('command','')} | Agent: {h.get('agent','')} | Result: {h.get('result','')}")
+        history_text = "\nRecent interactions:\n" + "\n".join(history_lines) + "\n"
 
+    # dynamic parts go after the cached prefix so they never invalidate it
+    prompt = prompt_prefix() + f"""{history_text}
 Command: \"\"\"{command}\"\"\"
 """
 
     attempts = retries + 1
     last_error = None
+    fmt = _output_format()
+    _count("llm_plans")
 
     for attempt in range(attempts):
+        _count("attempts")
+        if attempt:
+            _count("retries")
         try:
-            response = requests.post(OLLAMA_URL, json={
-                "model": model or DEFAULT_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "stop": ["\n\n"]
-            }, timeout=60)
-            response.raise_for_status()
-            payload = response.json()
-            if "error" in payload:
-                last_error = payload["error"]
-                print(f"❌ Planner error from Ollama: {payload['error']}")
-                continue
-            result = payload.get("response", "")
-            if not result:
-                last_error = "empty_response"
-                print("❌ Planner error: empty response from Ollama (check model pull and endpoint).")
+            stream = ollama_client.generate_stream(
+                model,
+                prompt,
+                timeout=60,
+                format=fmt,
+                # free-form output needs a stop sequence; constrained JSON ends when the object closes
+                stop=None if fmt else ["\n\n"],
+            )
+            result = _read_json_object(stream)
+            err = None if result.strip() else stream.error
+            if err:
+                _count("llm_errors")
+                last_error = err
+                print(f"❌ Planner error from Ollama: {err}")
                 continue
 
             print("\n🧪 Raw LLM response:\n", result)
@@ -179,24 +383,31 @@ Command: \"\"\"{command}\"\"\"
                 clean = clean[clean.index("{"):]  # Start from first '{'
 
             try:
-                parsed = json.loads(clean)
-                if _validate_plan(parsed):
-                    if parsed.get("agent") == "unknown":
+                parsed = normalize_plan(json.loads(clean))
+                if parsed:
+                    agents = plan_agents(parsed)
+                    if agents == ["unknown"]:
                         fb = _keyword_fallback(command)
                         if fb.get("agent") != "unknown":
                             return fb
+                    elif not any(a in UNCACHEABLE_AGENTS for a in agents):
+                        plan_cache.put(command, model, prompt_version(), parsed)
                     return parsed
+                _count("schema_failures")
                 last_error = "schema_validation_failed"
                 print("❌ Planner error: response failed schema validation.")
             except Exception as e:
+                _count("parse_failures")
                 last_error = f"json_parse_error: {e}"
                 print("❌ JSON parse error:", e)
 
         except Exception as e:
+            _count("llm_errors")
             last_error = str(e)
             print("❌ Planner error:", e)
 
     # Fallback keyword routing if LLM failed completely
+    _count("fallbacks")
     fb = _keyword_fallback(command)
     if fb.get("agent") != "unknown":
         return fb
@@ -1,55 +1,181 @@
+import json
+import os
+import re
+import threading
 import time
-import requests
+from datetime import datetime, timezone
+from pathlib import Path
 from utils.notes import append_note
+from utils import summarizer
+
+# Meetings are journaled to meetings/active.jsonl, one JSON event per line (start,
+# note, summary), so a meeting survives across CLI invocations and crashes. Every
+# ORION_MEETING_ROLLUP notes a background thread folds the new notes into a rolling
+# summary and journals it; "stop meeting" then only merges the notes captured since
+# the last rollup, so it costs about the same however long the meeting ran. Stopped
+# journals are kept as meetings/<topic>-<time>.jsonl.
+
+MEETINGS_DIR = Path("meetings")
+ACTIVE_FILE = MEETINGS_DIR / "active.jsonl"
+DEFAULT_ROLLUP = 10
 
 MEETING_STATE = {
     "active": False,
     "topic": "",
     "log": [],
     "started_at": None,
+    "summary": "",     # rolling summary of log[:summarized]
+    "summarized": 0,
 }
 
+ROLLUP_PROMPT = (
+    "Update the running summary of the meeting '{topic}' with the new notes below. Keep every decision, "
+    "owner and action item; at most 10 bullets.\nRunning summary so far:\n{summary}\n\nNew notes:"
+)
+
+_lock = threading.RLock()
+_stamp = None  # (mtime_ns, size) of the journal MEETING_STATE reflects
+_rollup_thread = None
+
+
+def get_rollup_every() -> int:
+    return int(os.environ.get("ORION_MEETING_ROLLUP", DEFAULT_ROLLUP))
+
+
+def _journal_stamp():
+    try:
+        st = ACTIVE_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _apply(state: dict, event: dict):
+    kind = event.get("event")
+    if kind == "start":
+        state.update(active=True, topic=event.get("topic", "meeting"), log=[], started_at=event.get("time"), summary="", summarized=0)
+    elif kind == "note":
+        state["log"].append(event.get("text", ""))
+    elif kind == "summary" and event.get("upto", 0) > state["summarized"]:
+        state.update(summary=event.get("text", ""), summarized=event["upto"])
+
+
+def _load():
+    """Bring MEETING_STATE up to date with the journal (another process may have written it)."""
+    global _stamp
+    stamp = _journal_stamp()
+    if stamp == _stamp:
+        return MEETING_STATE
+    state = {"active": False, "topic": "", "log": [], "started_at": None, "summary": "", "summarized": 0}
+    if stamp:
+        with open(ACTIVE_FILE, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    _apply(state, json.loads(line))
+                except ValueError:
+                    continue  # torn line from an interrupted write
+    MEETING_STATE.update(state)
+    _stamp = stamp
+    return MEETING_STATE
+
+
+def _record(event: dict):
+    """Append one event to the journal and apply it in memory (call with _lock held, after _load)."""
+    global _stamp
+    event.setdefault("time", time.time())
+    MEETINGS_DIR.mkdir(exist_ok=True)
+    with open(ACTIVE_FILE, "ab") as f:
+        if f.tell():
+            with open(ACTIVE_FILE, "rb") as r:
+                r.seek(-1, os.SEEK_END)
+                if r.read(1) != b"\n":
+                    f.write(b"\n")  # don't glue this event onto a torn line
+        f.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+    _apply(MEETING_STATE, event)
+    _stamp = _journal_stamp()
+
+
+def _archive(topic: str):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^\w-]+", "_", topic).strip("_")[:40] or "meeting"
+    os.replace(ACTIVE_FILE, MEETINGS_DIR / f"{slug}-{stamp}.jsonl")
+
 
 def start_meeting(topic: str):
-    MEETING_STATE["active"] = True
-    MEETING_STATE["topic"] = topic or "meeting"
-    MEETING_STATE["log"] = []
-    MEETING_STATE["started_at"] = time.time()
+    with _lock:
+        state = _load()
+        if ACTIVE_FILE.exists():
+            _archive(state.get("topic") or "meeting")  # an earlier meeting was never stopped
+            _load()
+        _record({"event": "start", "topic": topic or "meeting"})
     return f"🟢 Recording meeting on '{MEETING_STATE['topic']}'. Say 'stop meeting' when done."
 
 
-def record_note(text: str):
-    if not MEETING_STATE.get("active"):
-        return "❌ No active meeting. Say 'start meeting about <topic>'."
-    MEETING_STATE["log"].append(text)
+def record_note(text: str, model: str | None = None, ollama_url: str | None = None):
+    with _lock:
+        state = _load()
+        if not state.get("active"):
+            return "❌ No active meeting. Say 'start meeting about <topic>'."
+        _record({"event": "note", "text": text})
+        due = len(state["log"]) - state["summarized"] >= get_rollup_every()
+    if model and due:
+        _start_rollup(model, ollama_url)
     return f"📝 Captured: {text}"
 
 
-def stop_and_summarize(model: str, ollama_url: str, context: str = ""):
-    if not MEETING_STATE.get("active"):
-        return "❌ No active meeting to stop."
-    topic = MEETING_STATE.get("topic", "meeting")
-    transcript = "\n".join(MEETING_STATE.get("log", []))
-    MEETING_STATE["active"] = False
-    MEETING_STATE["started_at"] = None
+def _start_rollup(model: str, ollama_url: str | None):
+    global _rollup_thread
+    with _lock:
+        if _rollup_thread is not None and _rollup_thread.is_alive():
+            return  # the next note past the threshold starts another
+        # not a daemon thread: a one-shot CLI run finishes the rollup before exiting
+        _rollup_thread = threading.Thread(target=_rollup, args=(model, ollama_url), name="orion-meeting-rollup")
+        _rollup_thread.start()
+
 
-    if not transcript.strip():
+def _rollup(model: str, ollama_url: str | None):
+    with _lock:
+        state = _load()
+        started_at, upto = state["started_at"], len(state["log"])
+        notes = state["log"][state["summarized"]:]
+        instruction = ROLLUP_PROMPT.format(topic=state["topic"], summary=state["summary"] or "(none yet)")
+    if not notes:
+        return
+    summary, err = summarizer.summarize("\n".join(notes), instruction, model, ollama_url)
+    if err or not summary:
+        print(f"⚠️ Rolling meeting summary failed: {err or 'empty summary'}")
+        return
+    with _lock:
+        state = _load()
+        # the meeting may have been stopped (or restarted) while the model was busy
+        if state.get("active") and state["started_at"] == started_at and upto > state["summarized"]:
+            _record({"event": "summary", "upto": upto, "text": summary})
+
+
+def stop_and_summarize(model: str, ollama_url: str, context: str = "", on_token=None):
+    with _lock:
+        state = _load()
+        if not state.get("active"):
+            return "❌ No active meeting to stop."
+        topic = state.get("topic", "meeting")
+        log, summary, summarized = list(state["log"]), state["summary"], state["summarized"]
+        _archive(topic)
+        _load()
+
+    if not "\n".join(log).strip():
         return "⚠️ Meeting ended, but no notes were captured."
 
-    prompt = f"Summarize this meeting for work follow-up. Provide 3-7 bullets with action items if present.\nContext: {context}\nTopic: {topic}\nTranscript:\n{transcript}"
-    try:
-        resp = requests.post(
-            f"{ollama_url}/api/generate",
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=90,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        if "error" in payload:
-            return f"❌ Summarization error: {payload['error']}"
-        summary = payload.get("response", "").strip()
-    except Exception as e:
-        return f"❌ Summarization failed: {e}"
+    instruction = f"Summarize this meeting for work follow-up. Provide 3-7 bullets with action items if present.\nContext: {context}\nTopic: {topic}\n"
+    if summary:
+        # only the notes after the last rollup still need reading
+        instruction += f"Running summary of the meeting so far:\n{summary}\n\nNotes captured since that summary:"
+        transcript = "\n".join(log[summarized:]) or "(none)"
+    else:
+        instruction += "Transcript:"
+        transcript = "\n".join(log)
+    summary, err = summarizer.summarize(transcript, instruction, model, ollama_url, on_token=on_token)
+    if err:
+        return f"❌ Summarization failed: {err}"
 
     if summary:
         append_note(topic, summary, source="meeting")
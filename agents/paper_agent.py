@@ -1,25 +1,43 @@
 import requests
 import xml.etree.ElementTree as ET
 
+from utils import async_http
+
 ARXIV_API = "http://export.arxiv.org/api/query"
 
-def search_papers(query: str, max_results: int = 5):
-    params = {
+
+def _params(query: str, max_results: int) -> dict:
+    return {
         "search_query": f"all:{query}",
         "start": 0,
         "max_results": max_results,
         "sortBy": "relevance",
         "sortOrder": "descending",
     }
+
+
+def search_papers(query: str, max_results: int = 5):
     try:
-        resp = requests.get(ARXIV_API, params=params, timeout=20)
+        resp = requests.get(ARXIV_API, params=_params(query, max_results), timeout=20)
         resp.raise_for_status()
     except Exception as e:
         print(f"❌ ArXiv request failed: {e}")
         return []
+    return _parse_feed(resp.text, max_results)
+
+
+async def search_papers_async(query: str, max_results: int = 5):
+    try:
+        text = await async_http.get_text(ARXIV_API, params=_params(query, max_results), timeout=20)
+    except Exception as e:
+        print(f"❌ ArXiv request failed: {e}")
+        return []
+    return _parse_feed(text, max_results)
+
 
+def _parse_feed(text: str, max_results: int):
     try:
-        root = ET.fromstring(resp.text)
+        root = ET.fromstring(text)
     except ET.ParseError as e:
         print(f"❌ ArXiv parse failed: {e}")
         return []
@@ -1,77 +1,183 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import codecs
+import os
 from urllib.parse import urlparse
 from utils.notes import append_note
+from utils import html_text, http_pool, page_cache, serpapi, summarizer
 
+DEFAULT_SOURCES = 3
+DEFAULT_DEADLINE = 15.0  # seconds for fetching and extracting all sources
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+CHUNK_BYTES = 16 * 1024
+TEXT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
 
-def fetch_page(url, timeout=10):
+
+def get_source_count() -> int:
+    return int(os.environ.get("ORION_RESEARCH_SOURCES", DEFAULT_SOURCES))
+
+
+def get_fetch_deadline() -> float:
+    return float(os.environ.get("ORION_RESEARCH_DEADLINE", DEFAULT_DEADLINE))
+
+
+def get_max_bytes() -> int:
+    return int(os.environ.get("ORION_FETCH_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+def _content_type(header):
+    """("text/html", "utf-8") from a Content-Type header; a missing type is taken as HTML."""
+    ctype, _, params = header.partition(";")
+    charset = "utf-8"
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return ctype.strip().lower() or "text/html", charset
+
+
+def fetch_page_text(url, timeout=10, max_chars=html_text.DEFAULT_MAX_CHARS):
+    """
+    Stream url and extract its paragraph text, reading only until max_chars of text
+    were found or ORION_FETCH_MAX_BYTES were downloaded. Non-text pages are skipped.
+    Results go through the page cache: fresh entries cost no request, stale ones a
+    conditional GET.
+    """
+    cached = page_cache.lookup(url)
+    if cached and cached["fresh"]:
+        page_cache.count("fresh")
+        return cached["text"]
     try:
-        resp = requests.get(url, timeout=timeout, headers={"User-Agent": "Orion/1.0"})
-        resp.raise_for_status()
-        return resp.text
+        with http_pool.stream(url, timeout=timeout, headers=page_cache.validators(cached)) as resp:
+            headers = resp.headers
+            if resp.status_code == 304 and cached:
+                page_cache.revalidated(url, headers)
+                return cached["text"]
+            ctype, charset = _content_type(resp.headers.get("Content-Type", ""))
+            if ctype not in TEXT_TYPES:
+                print(f"⏭️ Skipping {url}: {ctype}")
+                page_cache.store(url, "", headers)  # don't download it again while fresh
+                return ""
+            decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+            plain = ctype == "text/plain"
+            extractor = None if plain else html_text.TextExtractor(max_chars)
+            parts, chars, read = [], 0, 0
+            for chunk in resp.iter_content(CHUNK_BYTES):
+                read += len(chunk)
+                data = decoder.decode(chunk)
+                if plain:
+                    parts.append(data)
+                    chars += len(data)
+                    if chars >= max_chars:
+                        break
+                else:
+                    extractor.feed(data)
+                    if extractor.done():
+                        break
+                if read >= get_max_bytes():
+                    break
     except Exception as e:
         print(f"❌ Fetch failed for {url}: {e}")
         return ""
+    if plain:
+        text = "".join(parts)[:max_chars].strip()
+    else:
+        extractor.close()
+        text = extractor.text()
+    page_cache.count("fetched")
+    page_cache.store(url, text, headers)
+    return text
 
 
-def extract_main_text(html):
-    if not html:
-        return ""
-    soup = BeautifulSoup(html, "html.parser")
-    # remove scripts/styles
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
-    text = "\n".join(p for p in paragraphs if p)
-    return text[:8000]  # keep concise
-
-
-def summarize_sources(topic, urls, model, ollama_url="http://127.0.0.1:11434"):
-    texts = []
-    for url in urls[:3]:
-        html = fetch_page(url)
-        text = extract_main_text(html)
-        if text:
-            host = urlparse(url).netloc
-            texts.append(f"[{host}] {text}")
+async def fetch_page_text_async(url, timeout=10, max_chars=html_text.DEFAULT_MAX_CHARS):
+    """
+    Async fetch_page_text(). The streaming fetch (early stop, size cap, page cache)
+    stays on the pooled requests session and runs in a thread, off the event loop.
+    """
+    return await asyncio.to_thread(fetch_page_text, url, timeout, max_chars)
+
+
+def fetch_sources(urls, deadline=None):
+    """
+    Fetch and extract urls concurrently; returns (url, text) for the sources that
+    finished within the deadline, in the order given.
+    """
+    deadline = get_fetch_deadline() if deadline is None else deadline
+    pages = http_pool.fetch_all(urls, lambda url: fetch_page_text(url, timeout=min(10, deadline)), deadline)
+    return [(url, pages[url]) for url in urls if pages.get(url)]
+
+
+async def fetch_sources_async(urls, deadline=None):
+    """Async fetch_sources(): same deadline and result, fetched as tasks on the running loop."""
+    deadline = get_fetch_deadline() if deadline is None else deadline
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return []
+    tasks = {url: asyncio.ensure_future(fetch_page_text_async(url, timeout=min(10, deadline))) for url in urls}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏱️ {len(pending)} source(s) still loading after {deadline:.1f}s, skipped")
+    pages = {}
+    for url, task in tasks.items():
+        if task in done:
+            if task.exception():
+                print(f"❌ Fetch failed for {url}: {task.exception()}")
+            else:
+                pages[url] = task.result()
+    return [(url, pages[url]) for url in urls if pages.get(url)]
+
+
+def _summary_instruction(topic):
+    return f"Summarize the key points about '{topic}' from the sources below. Provide 3-5 concise bullets with source tags in brackets."
+
+
+def summarize_sources(topic, urls, model, ollama_url=None, on_token=None):
+    texts = [(urlparse(url).netloc, text) for url, text in fetch_sources(urls[:get_source_count()])]
+    if not texts:
+        return "❌ No content to summarize."
+    # long sources are condensed chunk by chunk in parallel before the final summary
+    summary, err = summarizer.summarize(texts, _summary_instruction(topic), model, ollama_url, on_token=on_token)
+    if err:
+        return f"❌ Summarization failed: {err}"
+    return summary or "❌ Empty summary."
+
+
+async def summarize_sources_async(topic, urls, model, ollama_url=None, on_token=None):
+    texts = [(urlparse(url).netloc, text) for url, text in await fetch_sources_async(urls[:get_source_count()])]
     if not texts:
         return "❌ No content to summarize."
-    prompt = f"Summarize the key points about '{topic}' from the sources below. Provide 3-5 concise bullets with source tags in brackets.\n\n" + "\n\n".join(texts)
+    summary, err = await summarizer.summarize_async(texts, _summary_instruction(topic), model, ollama_url, on_token=on_token)
+    if err:
+        return f"❌ Summarization failed: {err}"
+    return summary or "❌ Empty summary."
+
+
+def research_topic(topic, serpapi_key, model, ollama_url=None, on_token=None):
+    urls = []
     try:
-        resp = requests.post(
-            f"{ollama_url}/api/generate",
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=90,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        if "error" in payload:
-            return f"❌ LLM summarize error: {payload['error']}"
-        return payload.get("response", "").strip() or "❌ Empty summary."
+        urls = serpapi.links(serpapi.search(topic, serpapi_key), get_source_count())
     except Exception as e:
-        return f"❌ Summarization failed: {e}"
+        print(f"❌ SerpAPI URL fetch failed: {e}")
+
+    summary = summarize_sources(topic, urls, model, ollama_url, on_token=on_token)
+    if summary and not summary.startswith("❌"):
+        append_note(topic, summary, source="web research")
+    return summary
 
 
-def research_topic(topic, serpapi_key, model, ollama_url="http://127.0.0.1:11434"):
-    from agents.knowledge_agent import fetch_web_snippets  # reuse
-    snippets = fetch_web_snippets(topic, serpapi_key)
+async def research_topic_async(topic, serpapi_key, model, ollama_url=None, on_token=None):
     urls = []
     try:
-        resp = requests.get(
-            "https://serpapi.com/search.json",
-            params={"engine": "google", "q": topic, "api_key": serpapi_key},
-            timeout=20,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        for res in data.get("organic_results", [])[:3]:
-            link = res.get("link")
-            if link:
-                urls.append(link)
+        urls = serpapi.links(await serpapi.search_async(topic, serpapi_key), get_source_count())
     except Exception as e:
         print(f"❌ SerpAPI URL fetch failed: {e}")
 
-    summary = summarize_sources(topic, urls, model, ollama_url)
+    summary = await summarize_sources_async(topic, urls, model, ollama_url, on_token=on_token)
     if summary and not summary.startswith("❌"):
-        append_note(topic, summary, source="web research")
+        await asyncio.to_thread(append_note, topic, summary, source="web research")
     return summary
@@ -1,6 +1,7 @@
 # agents/search_agent.py
 
-import requests
+from utils import serpapi
+
 
 def search_google_and_get_snippets(query, api_key=None):
     print(f"🔍 Searching Google for: {query}")
@@ -10,27 +11,25 @@ def search_google_and_get_snippets(query, api_key=None):
         return []
 
     try:
-        response = requests.get(
-            "https://serpapi.com/search.json",
-            params={
-                "engine": "google",
-                "q": query,
-                "api_key": api_key,
-            },
-            timeout=15,
-        )
-        response.raise_for_status()
-        results = response.json()
+        results = serpapi.search(query, api_key, timeout=15)
+    except Exception as e:
+        print(f"❌ SerpAPI error: {e}")
+        return []
+
+    return serpapi.snippets(results)  # Top 5
+
+
+async def search_google_and_get_snippets_async(query, api_key=None):
+    print(f"🔍 Searching Google for: {query}")
+
+    if not api_key:
+        print("❌ SerpAPI key not provided.")
+        return []
+
+    try:
+        results = await serpapi.search_async(query, api_key, timeout=15)
     except Exception as e:
         print(f"❌ SerpAPI error: {e}")
         return []
 
-    snippets = []
-
-    if "organic_results" in results:
-        for result in results["organic_results"][:5]:  # Top 5
-            snippet = result.get("snippet", "")
-            if snippet:
-                snippets.append(snippet)
-
-    return snippets
+    return serpapi.snippets(results)
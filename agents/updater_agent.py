@@ -1,23 +1,12 @@
-import requests
 from agents.knowledge_agent import fetch_web_snippets
 from utils.notes import append_note
-from utils.tasks import add_task
+from utils.tasks import add_tasks
+from utils import ollama_client
 
 
 def _call_llm(model: str, prompt: str, ollama_url: str):
-    try:
-        resp = requests.post(
-            f"{ollama_url}/api/generate",
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=90,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        if "error" in payload:
-            return "", payload["error"]
-        return payload.get("response", "").strip(), None
-    except Exception as e:
-        return "", str(e)
+    text, err, _ = ollama_client.generate(model, prompt, timeout=90, base_url=ollama_url)
+    return text.strip(), err
 
 
 def propose_updates(topic: str, serpapi_key: str, model: str, ollama_url: str, add_tasks_flag: bool = True):
@@ -45,7 +34,6 @@ def propose_updates(topic: str, serpapi_key: str, model: str, ollama_url: str, a
     # Optionally add tasks
     if add_tasks_flag:
         lines = [ln.strip("-• ").strip() for ln in ideas_text.splitlines() if ln.strip()]
-        for ln in lines:
-            add_task("research", {"topic": ln})
+        add_tasks([("research", {"topic": ln}) for ln in lines])
 
     return f"🚀 Auto-updater ideas logged:\n{ideas_text}"
@@ -0,0 +1,101 @@
+"""
+File lookup on a synthetic home directory of ~1M files: the old single-threaded
+os.walk, the parallel pruned scanner (utils/file_scanner.py) and the persistent
+filename index (utils/file_index.py: full build, incremental refresh, lookup).
+
+The tree is generated once under --root and reused. From the repo root:
+    python benchmarks/bench_file_scan.py > bench_output.txt
+    python benchmarks/bench_file_scan.py --files 100000   # quicker run
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import file_index, file_scanner  # noqa: E402
+
+TARGET = "quarterly_report_final.xlsx"
+FILES_PER_DIR = 100
+
+
+def build_tree(root: Path, total_files: int):
+    """~70% of files in normal dirs, ~30% under node_modules/.git/.venv (which the scanner prunes)."""
+    marker = root / f".generated-{total_files}"
+    if marker.exists():
+        return
+    leaf_dirs = max(1, total_files // FILES_PER_DIR)
+    fanout = max(2, round(leaf_dirs ** (1 / 3)))
+    tops = ["Code", "Pictures", "Music", "Archive", "Documents"]
+    made = 0
+    for i in range(leaf_dirs):
+        a, b, c = i // (fanout * fanout), (i // fanout) % fanout, i % fanout
+        d = root / tops[a % len(tops)] / f"p{a}" / f"d{b}"
+        if i % 10 < 3:
+            d = d / ("node_modules", ".git", ".venv")[i % 3]
+        d = d / f"d{c}"
+        d.mkdir(parents=True, exist_ok=True)
+        for j in range(FILES_PER_DIR):
+            (d / f"f{j}.txt").touch()
+        made += FILES_PER_DIR
+    # the file we look for: deep under Documents, listed late by a breadth-order walk
+    deep = root / "Documents" / f"p{leaf_dirs // (fanout * fanout)}" / "d0" / "reports" / "2024"
+    deep.mkdir(parents=True, exist_ok=True)
+    (deep / TARGET).touch()
+    marker.touch()
+    print(f"generated {made} files in {leaf_dirs} dirs under {root}")
+
+
+def old_walk(start_path, target_filename):
+    for root, dirs, files in os.walk(start_path):
+        for file in files:
+            if file.lower() == target_filename.lower():
+                return str(Path(root) / file)
+    return None
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<38} {elapsed * 1000:10.1f} ms   {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "orion_scan_tree"))
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    build_tree(root, args.files)
+    file_index.INDEX_FILE = root.parent / "orion_scan_tree_index.db"
+    file_index.INDEX_FILE.unlink(missing_ok=True)
+
+    print(f"\n{'method':<38} {'time':>13}")
+    # the "missing" rows are the worst case: every non-pruned directory gets listed
+    for name in (TARGET, "missing.bin"):
+        timed(f"os.walk (old) {name[:20]}", lambda: old_walk(root, name))
+        for workers in (1, 8):
+            timed(f"scanner x{workers} {name[:20]}", lambda: file_scanner.find_first(root, name, workers=workers, time_budget=0))
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        relisted = file_index.refresh(root)
+    print(f"{'index: full build':<38} {(time.perf_counter() - started) * 1000:10.1f} ms   {relisted} dirs")
+    timed("index: refresh, no changes", lambda: file_index.refresh(root))
+    (root / "Documents" / f"new_file_{time.time_ns()}.txt").touch()
+    timed("index: refresh after 1 new file", lambda: file_index.refresh(root))
+    timed("index: exact lookup", lambda: file_index.find(TARGET, root=root)[0])
+    timed("index: prefix lookup", lambda: file_index.find("quarterly_rep")[0])
+    timed("index: fuzzy lookup", lambda: file_index.find("quartely_report_final.xlsx")[0])
+
+
+if __name__ == "__main__":
+    main()
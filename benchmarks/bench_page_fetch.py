@@ -0,0 +1,167 @@
+"""
+Per-source cost of fetching and extracting a research page: the old path (full
+download + BeautifulSoup html.parser tree) against the streaming, size-capped
+fetch_page_text with the stdlib and (when installed) lxml extractors.
+
+Pages are served from a local server in a separate process, so CPU time is the
+client's only. Peak memory is the growth of the process's peak RSS over one fetch,
+each measured in a fresh process (tracemalloc would miss lxml's C allocations).
+From the repo root:
+    python benchmarks/bench_page_fetch.py > bench_output.txt
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["ORION_PAGE_CACHE"] = "0"  # every run must really fetch and parse
+
+from agents import research_agent  # noqa: E402
+from utils import html_text  # noqa: E402
+
+PORT = 12080
+PARAGRAPH = "Orion research benchmark paragraph with a few <b>bold</b> words and a <a href='#'>link</a>. " * 4
+
+
+def make_pages():
+    script = "<script>" + "var x = 1;" * 2000 + "</script>"
+    article = "<html><head>" + script + "</head><body>" + "".join(f"<p>{PARAGRAPH}</p>" for _ in range(600)) + "</body></html>"
+    nav = "<ul>" + "<li><a href='#'>menu entry</a></li>" * 40000 + "</ul>"
+    deep = "<html><body>" + nav + "".join(f"<p>{PARAGRAPH}</p>" for _ in range(600)) + "</body></html>"
+    return {
+        "/article": ("text/html; charset=utf-8", article.encode()),
+        "/deep-text": ("text/html; charset=utf-8", deep.encode()),
+        "/report.pdf": ("application/pdf", b"%PDF-1.7\n" + b"0" * (5 * 1024 * 1024)),
+    }
+
+
+def serve(port):
+    pages = make_pages()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            ctype, body = pages[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the streaming client stopped reading early
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def old_path(url):
+    from bs4 import BeautifulSoup
+    resp = requests.get(url, timeout=10, headers={"User-Agent": "Orion/1.0"})
+    resp.raise_for_status()
+    soup = BeautifulSoup(resp.text, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
+    return "\n".join(p for p in paragraphs if p)[:8000]
+
+
+METHODS = {
+    "old": old_path,
+    "stream": research_agent.fetch_page_text,
+}
+
+
+def _peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _rss_child(method, use_lxml, url, out):
+    fn = METHODS[method]
+    if not use_lxml:
+        html_text.etree = None
+    if method == "old":
+        import bs4  # noqa: F401  (import cost isn't part of the fetch)
+    with contextlib.redirect_stdout(io.StringIO()):
+        before = _peak_rss()
+        fn(url)
+        out.put(_peak_rss() - before)
+
+
+def peak_rss_growth(method, use_lxml, url):
+    """Peak RSS added by one fetch, in a fresh process so earlier runs can't hide it."""
+    # forked from a small fork server: a child spawned from here would start with this
+    # process's peak as its ru_maxrss (Linux keeps it across exec)
+    ctx = multiprocessing.get_context("forkserver")
+    out = ctx.Queue()
+    child = ctx.Process(target=_rss_child, args=(method, use_lxml, url, out))
+    child.start()
+    growth = out.get()
+    child.join()
+    return growth
+
+
+def measure(method, use_lxml, url, repeat):
+    """Median wall/CPU time over repeat runs, then peak RSS growth of one run in its own process."""
+    fn = METHODS[method]
+    walls, cpus = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            wall, cpu = time.perf_counter(), time.process_time()
+            text = fn(url)
+            walls.append(time.perf_counter() - wall)
+            cpus.append(time.process_time() - cpu)
+    return statistics.median(walls), statistics.median(cpus), peak_rss_growth(method, use_lxml, url), len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=serve, args=(PORT,), daemon=True)
+    server.start()
+    for _ in range(50):
+        try:
+            requests.get(f"http://127.0.0.1:{PORT}/article", timeout=1)
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    lxml = html_text.etree
+    methods = []
+    try:
+        import bs4  # noqa: F401
+        methods.append(("old: get + BeautifulSoup", "old", lxml is not None))
+    except ImportError:
+        print("(bs4 not installed: old path skipped)")
+    methods.append(("stream + stdlib parser", "stream", False))
+    if lxml is not None:
+        methods.append(("stream + lxml", "stream", True))
+
+    print(f"{'page':<12} {'method':<28} {'wall':>9} {'cpu':>9} {'peak RSS +':>10} {'chars':>6}")
+    for path in make_pages():
+        url = f"http://127.0.0.1:{PORT}{path}"
+        for label, method, use_lxml in methods:
+            html_text.etree = lxml if use_lxml else None
+            wall, cpu, peak, chars = measure(method, use_lxml, url, args.repeat)
+            print(f"{path:<12} {label:<28} {wall * 1000:7.1f}ms {cpu * 1000:7.1f}ms {peak / 1e6:8.2f}MB {chars:6}")
+    html_text.etree = lxml
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Planner latency on a cold router model vs. after prewarming (model loaded with
+keep_alive and the static prompt prefix already evaluated), using Ollama's own
+load_duration / prompt_eval_count / prompt_eval_duration fields.
+
+Needs a running Ollama with the router model pulled. From the repo root:
+    python benchmarks/bench_planner_prefix.py > bench_output.txt
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["ORION_PLAN_CACHE"] = "0"  # measure the model, not the plan cache
+os.environ["ORION_PLANNER_ENGINE"] = "generative"
+
+from main import model_for  # noqa: E402
+from agents.llm_planner_agent import plan_command, prewarm_planner  # noqa: E402
+from utils import ollama_client  # noqa: E402
+
+COMMANDS = [
+    "Translate good morning to German",
+    "Read notes on standup",
+    "Find recent papers on diffusion models",
+    "Queue a research task on retrieval augmented generation",
+    "Write a Python function that reverses a string",
+]
+
+
+def planner_call(model, command):
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan_command(command, model=model, retries=0)
+    return ollama_client.recent_stats(1)[-1]
+
+
+def row(label, stats):
+    ms = lambda key: stats.get(key, 0) / 1e6  # noqa: E731
+    print(
+        f"{label:<34} {ms('load_duration'):9.0f} {stats.get('prompt_eval_count', 0):7d} "
+        f"{ms('prompt_eval_duration'):10.0f} {stats.get('wall_time', 0) * 1000:9.0f}"
+    )
+
+
+def main():
+    model = model_for("router")
+    print(f"router model: {model}\n")
+    print(f"{'run':<34} {'load ms':>9} {'pe toks':>7} {'pe ms':>10} {'wall ms':>9}")
+
+    cold = []
+    for command in COMMANDS:
+        ollama_client.unload_model(model)
+        cold.append(planner_call(model, command))
+        row(f"cold: {command[:28]}", cold[-1])
+
+    ollama_client.unload_model(model)
+    prewarm_planner(model)
+    warm = []
+    for command in COMMANDS:
+        warm.append(planner_call(model, command))
+        row(f"warm: {command[:28]}", warm[-1])
+
+    def mean(runs, key):
+        return statistics.mean(s.get(key, 0) for s in runs)
+
+    print()
+    for key, scale, unit in (
+        ("load_duration", 1e6, "ms"),
+        ("prompt_eval_count", 1, "tokens"),
+        ("prompt_eval_duration", 1e6, "ms"),
+        ("wall_time", 1e-3, "ms"),
+    ):
+        print(f"mean {key:<22} cold {mean(cold, key) / scale:9.1f}  warm {mean(warm, key) / scale:9.1f} {unit}")
+
+
+if __name__ == "__main__":
+    main()
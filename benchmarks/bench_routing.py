@@ -0,0 +1,93 @@
+"""
+Per-command routing latency: two-call routing (classifier + planner) vs combined routing (planner only).
+
+Needs a running Ollama with the router/chat models pulled. From the repo root:
+    python benchmarks/bench_routing.py --rounds 3 > bench_output.txt
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["ORION_PLAN_CACHE"] = "0"  # measure the model, not the plan cache
+
+from main import is_general_question, chat_reply, model_for  # noqa: E402
+from agents.llm_planner_agent import plan_command  # noqa: E402
+from utils import ollama_client  # noqa: E402
+
+COMMANDS = [
+    "What can you do?",
+    "Who are you?",
+    "Translate good morning to German",
+    "Show my tasks",
+    "Read notes on standup",
+    "Find recent papers on diffusion models",
+    "Remind me to call mom at 2025-06-24 18:00",
+    "Write a Python function that reverses a string",
+]
+
+
+def route_classify(command):
+    if is_general_question(command):
+        chat_reply(command)
+        return "chat"
+    return plan_command(command, model=model_for("router")).get("agent")
+
+
+def route_combined(command):
+    plan = plan_command(command, model=model_for("router"))
+    if plan.get("agent") == "chat" and not plan.get("info", {}).get("reply"):
+        chat_reply(command)
+    return plan.get("agent")
+
+
+def run(name, route, rounds):
+    latencies = []
+    calls = 0
+    for _ in range(rounds):
+        for command in COMMANDS:
+            started_at = time.time()
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent = route(command)
+            latencies.append(time.perf_counter() - t0)
+            calls += sum(1 for s in ollama_client.recent_stats(100) if s["at"] >= started_at)
+            print(f"  [{name}] {latencies[-1]:6.2f}s  {agent:<10} {command}")
+    n = len(latencies)
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": statistics.median(latencies),
+        "max": max(latencies),
+        "calls_per_command": calls / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # warm both models so the first measured command doesn't pay the load time
+    with contextlib.redirect_stdout(io.StringIO()):
+        route_classify(COMMANDS[0])
+
+    results = {
+        "classify": run("classify", route_classify, args.rounds),
+        "combined": run("combined", route_combined, args.rounds),
+    }
+    print(f"\n{'mode':<10} {'mean s':>8} {'p50 s':>8} {'max s':>8} {'LLM calls/cmd':>14}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['mean']:8.2f} {r['p50']:8.2f} {r['max']:8.2f} {r['calls_per_command']:14.2f}")
+    before, after = results["classify"]["mean"], results["combined"]["mean"]
+    if before:
+        print(f"\nCombined routing: {100 * (before - after) / before:.0f}% lower mean per-command latency.")
+
+
+if __name__ == "__main__":
+    main()
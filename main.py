@@ -1,139 +1,215 @@
 # main.py
 
 import os
-import requests
 import json
-from agents.llm_planner_agent import plan_command
-from agents.file_agent import open_file, global_find_file
+import re
+import queue
+import atexit
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from agents.llm_planner_agent import plan_command, prewarm_planner
+from agents.fast_router import fast_plan
+from agents.file_agent import open_file, global_find_file, find_similar
 from agents.browser_agent import open_website, open_website_and_search
-from agents.search_agent import search_google_and_get_snippets
+from agents.search_agent import search_google_and_get_snippets, search_google_and_get_snippets_async
 from agents.email_agent import handle_email_instruction
 from agents.calendar_agent import schedule_event
 from agents.reminder_agent import schedule_reminder, calculate_delay
 from agents.translate_agent import translate_text
-from agents.knowledge_agent import update_knowledge
+from agents.knowledge_agent import update_knowledge, update_knowledge_async
 from agents.hardware_agent import execute_hardware_action
 from agents.system_agent import lock_screen, volume, brightness
-from agents.research_agent import research_topic
+from agents.research_agent import research_topic_async
 from agents.meeting_agent import start_meeting, record_note, stop_and_summarize
-from agents.paper_agent import search_papers
+from agents.paper_agent import search_papers, search_papers_async
 from agents.scaffold_agent import scaffold_project
 from agents.call_agent import set_status as set_call_status, get_status as get_call_status, build_twiml as build_call_twiml
 from agents.updater_agent import propose_updates
 from utils.credentials import get_or_prompt_credentials
 from utils.memory import log_interaction, get_recent_history
-from utils.config import load_dotenv, get_model_overrides
-from utils.notes import append_note, read_notes, clear_notes
-from utils.tasks import add_task, list_tasks, start_worker
+from utils.config import load_dotenv, get_model_overrides, get_routing_mode, get_planner_engine
+from utils.notes import append_note, read_notes, clear_notes, search_notes
+from utils.tasks import add_task, list_tasks, count_tasks, start_worker
+from utils import async_http, ollama_client, workers, vector_store
 
-OLLAMA_URL = "http://127.0.0.1:11434"
 load_dotenv()
+OLLAMA_URL = ollama_client.get_base_url()
 MODEL_CONFIG = get_model_overrides({
     "router": "codellama:instruct",
     "chat": "llama3",
     "email": "llama3",
     "fallback": "codellama:instruct",
+    "embed": "nomic-embed-text",
 })
 
 
+_orion_config = None
+_config_lock = threading.Lock()
+_blocking_pool = None
+_loop = None
+_loop_lock = threading.Lock()
+
+
 def model_for(key: str) -> str:
     return MODEL_CONFIG.get(key) or MODEL_CONFIG["fallback"]
 
 
-def is_general_question(command):
-    system_prompt = """
+def get_orion_config():
+    """Credentials-backed config, loaded once per process (the daemon keeps it warm)."""
+    global _orion_config
+    with _config_lock:
+        if _orion_config is None:
+            creds = get_or_prompt_credentials()
+            _orion_config = {
+                "email": creds["email"],
+                "password": creds["password"],
+                "serpapi": creds.get("serpapi", "")
+            }
+
+            # Optional auto knowledge update on startup (triggered by env)
+            auto_topic = os.environ.get("ORION_AUTO_UPDATE_TOPIC")
+            if auto_topic:
+                summary = update_knowledge(auto_topic, _orion_config["serpapi"], model_for("chat"))
+                print(summary)
+    return _orion_config
+
+
+def prewarm_models(background: bool = True):
+    """
+    Load the configured models into Ollama (honouring ORION_KEEP_ALIVE) and evaluate the
+    planner's static prompt prefix, so the first command doesn't pay a cold load.
+    Disabled with ORION_PREWARM=0.
+    """
+    if os.environ.get("ORION_PREWARM", "1") == "0":
+        return None
+
+    def run():
+        router = model_for("router")
+        for model in dict.fromkeys(MODEL_CONFIG[k] for k in ("chat", "email", "fallback")):
+            if model and model != router:
+                _, err, _ = ollama_client.load_model(model, base_url=OLLAMA_URL)
+                if err:
+                    print(f"⚠️ Prewarm failed for {model}: {err}")
+        if get_planner_engine() == "embedding":
+            _, err, _ = ollama_client.load_embed_model(model_for("embed"), base_url=OLLAMA_URL)
+            if err:
+                print(f"⚠️ Prewarm failed for {model_for('embed')}: {err}")
+        # router last: it is on every command's path, so it should be the most recently loaded
+        prewarm_planner(router)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+CLASSIFIER_PROMPT = """
 You are a classifier. If the user is asking a question like "what can you do?", "who are you?", or "what is your purpose", respond with only: chat.
 If it’s an action/task (email, open file, search, translate, reminder, calendar), respond with: task.
 Only return one word: chat or task.
 """
-    try:
-        response = requests.post(f"{OLLAMA_URL}/api/generate", json={
-            "model": model_for("router"),
-            "prompt": f"{system_prompt}\nUser: {command}",
-            "stream": False
-        }, timeout=30)
-        response.raise_for_status()
-        payload = response.json()
-        if "error" in payload:
-            print(f"⚠️ Ollama classify error: {payload['error']}")
-            return False
-        reply = payload.get("response", "")
-        if not reply:
-            print("⚠️ Ollama classify missing response; check model and endpoint.")
-            return False
-        return reply.strip().lower() == "chat"
-    except Exception as e:
-        print(f"⚠️ Ollama classify failed, defaulting to task: {e}")
+CODE_SYSTEM_PROMPT = (
+    "You are Orion's coding copilot. Produce concise, well-formatted code with minimal explanation. "
+    "If code is long, focus on the core function. Include short comments only if they clarify intent."
+)
+
+
+def _context_block(context):
+    if not context:
+        return ""
+    return f"Relevant notes and knowledge (use them if they help):\n{context}\n\n"
+
+
+def chat_prompt(command, context=""):
+    return f"{_context_block(context)}You are Orion, a personal AI assistant. The user said: {command}\nReply helpfully."
+
+
+def code_prompt(prompt, context=""):
+    return f"{CODE_SYSTEM_PROMPT}\n\n{_context_block(context)}Request: {prompt}\n\nAnswer:"
+
+
+def format_snippets(snippets):
+    output = "🔎 Top info found:\n\n"
+    for i, s in enumerate(snippets, 1):
+        output += f"{i}. {s}\n"
+    return output
+
+
+def format_papers(topic, papers):
+    if not papers:
+        return "❌ No papers found or fetch failed."
+    output = f"📚 Top papers for '{topic}':\n\n"
+    for i, p in enumerate(papers, 1):
+        authors = ", ".join(p.get("authors", []))
+        output += f"{i}. {p.get('title','')}\n   Authors: {authors}\n   Link: {p.get('link','')}\n"
+    return output
+
+
+def is_general_question(command):
+    reply, err, _ = ollama_client.generate(
+        model_for("router"),
+        f"{CLASSIFIER_PROMPT}\nUser: {command}",
+        timeout=30,
+        base_url=OLLAMA_URL,
+    )
+    if err:
+        print(f"⚠️ Ollama classify failed, defaulting to task: {err}")
         return False
+    return reply.strip().lower() == "chat"
 
 
-def main_logic(user_command):
-    creds = get_or_prompt_credentials()
-
-    ORION_CONFIG = {
-        "email": creds["email"],
-        "password": creds["password"],
-        "serpapi": creds.get("serpapi", "")
-    }
-
-    # Optional auto knowledge update on startup (triggered by env)
-    auto_topic = os.environ.get("ORION_AUTO_UPDATE_TOPIC")
-    if auto_topic:
-        summary = update_knowledge(auto_topic, ORION_CONFIG["serpapi"], model_for("chat"))
-        print(summary)
-
-    # Start simple task worker (runs pending once per invocation)
-    def task_handler(task):
-        ttype = task.get("type")
-        payload = task.get("payload", {})
-        if ttype == "knowledge":
-            topic = payload.get("topic", "general")
-            return update_knowledge(topic, ORION_CONFIG["serpapi"], model_for("chat"))
-        if ttype == "research":
-            topic = payload.get("topic", "general")
-            return research_topic(topic, ORION_CONFIG["serpapi"], model_for("chat"))
-        return f"❌ Unknown task type: {ttype}"
-
-    start_worker(task_handler)
-
-    # 💬 General chat fallback
-    if is_general_question(user_command):
-        chat_prompt = f"You are Orion, a personal AI assistant. The user said: {user_command}\nReply helpfully."
-        try:
-            response = requests.post(f"{OLLAMA_URL}/api/generate", json={
-                "model": model_for("chat"),
-                "prompt": chat_prompt,
-                "stream": False
-            }, timeout=60)
-            response.raise_for_status()
-            payload = response.json()
-            if "error" in payload:
-                return f"⚠️ Ollama chat error: {payload['error']}"
-            reply = payload.get("response", "")
-            return f"🤖 {reply}" if reply else "⚠️ Ollama returned no reply."
-        except Exception as e:
-            return f"⚠️ Ollama chat failed: {e}"
-
-    # 🧠 Intelligent planner routing
-    output = "🧠 Thinking with Ollama...\n\n"
-    history = get_recent_history()
-    plan = plan_command(user_command, model=model_for("router"), history=history)
-
-    # 🔍 Debug print
-    print(f"📦 Planner output: {plan}")
+def chat_reply(command, on_token=None, context=None):
+    if context is None:
+        context = vector_store.context_for(command)
+    reply, err, _ = ollama_client.generate(
+        model_for("chat"), chat_prompt(command, context), timeout=60, base_url=OLLAMA_URL, on_token=on_token
+    )
+    if err:
+        return f"⚠️ Ollama chat failed: {err}"
+    return f"🤖 {reply}"
 
-    agent = plan.get("agent")
-    info = plan.get("info", {})
-    print(f"🧠 Detected agent: {agent}")
 
+def run_task(task):
+    """Handler for queued background tasks."""
+    config = get_orion_config()
+    ttype = task.get("type")
+    payload = task.get("payload", {})
+    if ttype == "knowledge":
+        topic = payload.get("topic", "general")
+        return update_knowledge(topic, config["serpapi"], model_for("chat"))
+    if ttype == "research":
+        topic = payload.get("topic", "general")
+        # worker threads hand research to the shared loop: pages, SerpAPI and the summary are awaited there
+        return asyncio.run_coroutine_threadsafe(
+            research_topic_async(topic, config["serpapi"], model_for("chat")), background_loop()
+        ).result()
+    return f"❌ Unknown task type: {ttype}"
+
+
+def dispatch(agent, info, user_command, config, on_token=None):
+    """Run the agent chosen by the planner and return its output text."""
+    output = ""
+
     # === FILE AGENT ===
     if agent == "file":
         filename = info.get("filename")
         if filename:
             from pathlib import Path
             file_path = global_find_file(Path.home(), filename)
-            open_file(file_path)
-            output += f"📂 Opened file: {file_path}"
+            if file_path:
+                open_file(file_path)
+                output += f"📂 Opened file: {file_path}"
+            else:
+                # never open a near miss unasked: offer it and let the user name the one they meant
+                similar = find_similar(Path.home(), filename)
+                output += f"❌ No file named '{filename}' found."
+                if similar:
+                    output += "\n🔎 Did you mean:\n" + "\n".join(f"  - {p}" for p in similar)
+                    output += "\nSay 'open file <name>' with the one you want."
         else:
             output += "❌ No filename found."
 
@@ -154,10 +230,8 @@ def main_logic(user_command):
     elif agent == "search":
         query = info.get("query")
         if query:
-            snippets = search_google_and_get_snippets(query, ORION_CONFIG["serpapi"])
-            output += "🔎 Top info found:\n\n"
-            for i, s in enumerate(snippets, 1):
-                output += f"{i}. {s}\n"
+            snippets = search_google_and_get_snippets(query, config["serpapi"])
+            output += format_snippets(snippets)
         else:
             output += "❌ No query provided."
 
@@ -165,8 +239,8 @@ def main_logic(user_command):
     elif agent == "email":
         result = handle_email_instruction(
             user_command,
-            ORION_CONFIG["email"],
-            ORION_CONFIG["password"],
+            config["email"],
+            config["password"],
             planner_model=model_for("router"),
             email_model=model_for("email"),
         )
@@ -206,7 +280,7 @@ def main_logic(user_command):
     # === KNOWLEDGE UPDATE AGENT ===
     elif agent == "knowledge":
         topic = info.get("topic") or user_command
-        result = update_knowledge(topic, ORION_CONFIG["serpapi"], model_for("chat"))
+        result = update_knowledge(topic, config["serpapi"], model_for("chat"), on_token=on_token)
         output += result
 
     # === HARDWARE AGENT ===
@@ -240,9 +314,9 @@ def main_logic(user_command):
             output += start_meeting(topic)
         elif action == "add":
             content = info.get("content") or user_command
-            output += record_note(content)
+            output += record_note(content, model_for("chat"), OLLAMA_URL)
         elif action == "stop":
-            output += stop_and_summarize(model_for("chat"), OLLAMA_URL, context="work meeting")
+            output += stop_and_summarize(model_for("chat"), OLLAMA_URL, context="work meeting", on_token=on_token)
         else:
             output += "❌ Meeting action must be start/add/stop."
 
@@ -250,40 +324,22 @@ def main_logic(user_command):
     elif agent == "papers":
         topic = info.get("topic") or user_command
         papers = search_papers(topic)
-        if not papers:
-            output += "❌ No papers found or fetch failed."
-        else:
-            output += f"📚 Top papers for '{topic}':\n\n"
-            for i, p in enumerate(papers, 1):
-                authors = ", ".join(p.get("authors", []))
-                output += f"{i}. {p.get('title','')}\n   Authors: {authors}\n   Link: {p.get('link','')}\n"
+        output += format_papers(topic, papers)
 
     # === CODE AGENT ===
     elif agent == "code":
         prompt = info.get("prompt") or user_command
-        system_prompt = (
-            "You are Orion's coding copilot. Produce concise, well-formatted code with minimal explanation. "
-            "If code is long, focus on the core function. Include short comments only if they clarify intent."
+        code, err, _ = ollama_client.generate(
+            model_for("chat"),
+            code_prompt(prompt, vector_store.context_for(prompt)),
+            timeout=90,
+            base_url=OLLAMA_URL,
+            on_token=on_token,
         )
-        try:
-            resp = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={
-                    "model": model_for("chat"),
-                    "prompt": f"{system_prompt}\n\nRequest: {prompt}\n\nAnswer:",
-                    "stream": False,
-                },
-                timeout=90,
-            )
-            resp.raise_for_status()
-            payload = resp.json()
-            if "error" in payload:
-                output += f"⚠️ Code generation error: {payload['error']}"
-            else:
-                code = payload.get("response", "").strip()
-                output += code or "⚠️ Code generation returned empty."
-        except Exception as e:
-            output += f"⚠️ Code generation failed: {e}"
+        if err:
+            output += f"⚠️ Code generation failed: {err}"
+        else:
+            output += code.strip() or "⚠️ Code generation returned empty."
 
     # === SCAFFOLD AGENT ===
     elif agent == "scaffold":
@@ -312,7 +368,10 @@ def main_logic(user_command):
     # === TASK MANAGEMENT ===
     elif agent == "task_list":
         tasks = list_tasks()
-        output += "🗒️ Tasks:\n" + json.dumps(tasks, indent=2)
+        counts = ", ".join(f"{n} {status}" for status, n in sorted(count_tasks().items())) or "none"
+        output += f"🗒️ Tasks ({counts}; latest {len(tasks)}):\n" + json.dumps(tasks, indent=2)
+        for r in workers.progress()["running"]:
+            output += f"\n⏳ {r['worker']}: {r['task']} ({r['type']} '{r['topic']}') running for {r['elapsed']:.0f}s"
 
     elif agent == "task_add":
         topic = info.get("topic") or "general"
@@ -327,6 +386,9 @@ def main_logic(user_command):
     elif agent == "notes_clear":
         topic = info.get("topic") or "general"
         output += clear_notes(topic)
+    elif agent == "notes_search":
+        query = info.get("query") or user_command
+        output += search_notes(query)
     elif agent == "notes_add":
         topic = info.get("topic") or "general"
         content = info.get("content") or user_command
@@ -335,22 +397,357 @@ def main_logic(user_command):
     # === UPDATER AGENT ===
     elif agent == "updater":
         topic = info.get("topic") or "AI assistant new features"
-        result = propose_updates(topic, ORION_CONFIG["serpapi"], model_for("chat"), OLLAMA_URL)
+        result = propose_updates(topic, config["serpapi"], model_for("chat"), OLLAMA_URL)
         output += result
 
     # === UNKNOWN AGENT ===
     else:
         output += f"🤷 I couldn't understand what to do with your command.\n[DEBUG] Agent: {agent}"
 
-    # 🧠 Auto-updater: log recent interaction for lightweight learning
-    snippet = output[:200]
-    log_interaction(user_command, agent or "unknown", snippet)
 
     return output
+
+
+def main_logic(user_command, on_token=None):
+    """
+    Run one command and return the full output text: a blocking wrapper around handle()
+    on the shared event loop, so there is a single routing path. If on_token is given,
+    chat/code/summary generations stream and on_token(token) is called for each chunk
+    as it arrives (the returned output still holds everything). Not for use from
+    coroutines running on that loop; await handle() there instead.
+    """
+    return submit(user_command, on_token=on_token).result()
+
+
+# === ASYNC CORE ===
+# handle() routes and runs every command (main_logic and submit() wrap it): Ollama, SerpAPI, arXiv and page fetches
+# are awaited natively, and blocking agents (Playwright, IMAP, files, ...) run on a
+# shared thread pool, so one event loop can serve many overlapping commands.
+
+def _executor():
+    global _blocking_pool
+    with _loop_lock:
+        if _blocking_pool is None:
+            _blocking_pool = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("ORION_ASYNC_WORKERS", "8")),
+                thread_name_prefix="orion-blocking",
+            )
+    return _blocking_pool
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on Orion's executor without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def is_general_question_async(command):
+    reply, err, _ = await ollama_client.generate_async(
+        model_for("router"),
+        f"{CLASSIFIER_PROMPT}\nUser: {command}",
+        timeout=30,
+        base_url=OLLAMA_URL,
+    )
+    if err:
+        print(f"⚠️ Ollama classify failed, defaulting to task: {err}")
+        return False
+    return reply.strip().lower() == "chat"
+
+
+async def chat_reply_async(command, on_token=None, context=None):
+    if context is None:
+        context = await run_blocking(vector_store.context_for, command)
+    reply, err, _ = await ollama_client.generate_async(
+        model_for("chat"), chat_prompt(command, context), timeout=60, base_url=OLLAMA_URL, on_token=on_token
+    )
+    if err:
+        return f"⚠️ Ollama chat failed: {err}"
+    return f"🤖 {reply}"
+
+
+async def _chat_async(info, user_command, config, on_token):
+    reply = str(info.get("reply") or "").strip()
+    context = await run_blocking(vector_store.context_for, user_command)
+    if context or not reply:
+        return await chat_reply_async(user_command, on_token=on_token, context=context)
+    if on_token:
+        on_token(reply)
+    return f"🤖 {reply}"
+
+
+async def _search_async(info, user_command, config, on_token):
+    query = info.get("query")
+    if not query:
+        return "❌ No query provided."
+    snippets = await search_google_and_get_snippets_async(query, config["serpapi"])
+    return format_snippets(snippets)
+
+
+async def _papers_async(info, user_command, config, on_token):
+    topic = info.get("topic") or user_command
+    papers = await search_papers_async(topic)
+    return format_papers(topic, papers)
+
+
+async def _code_async(info, user_command, config, on_token):
+    prompt = info.get("prompt") or user_command
+    context = await run_blocking(vector_store.context_for, prompt)
+    code, err, _ = await ollama_client.generate_async(
+        model_for("chat"), code_prompt(prompt, context), timeout=90, base_url=OLLAMA_URL, on_token=on_token
+    )
+    if err:
+        return f"⚠️ Code generation failed: {err}"
+    return code.strip() or "⚠️ Code generation returned empty."
+
+
+async def _knowledge_async(info, user_command, config, on_token):
+    topic = info.get("topic") or user_command
+    return await update_knowledge_async(topic, config["serpapi"], model_for("chat"), on_token=on_token)
+
+
+# Agents with native async implementations; everything else goes through dispatch() on the executor.
+ASYNC_HANDLERS = {
+    "chat": _chat_async,
+    "search": _search_async,
+    "papers": _papers_async,
+    "code": _code_async,
+    "knowledge": _knowledge_async,
+}
+
+
+async def dispatch_async(agent, info, user_command, config, on_token=None):
+    handler = ASYNC_HANDLERS.get(agent)
+    if handler:
+        return await handler(info, user_command, config, on_token)
+    return await run_blocking(dispatch, agent, info, user_command, config, on_token=on_token)
+
+
+def _pipe(value, outputs):
+    """Replace "{step_id}" references in info values with that step's output."""
+    if isinstance(value, str):
+        for step_id, text in outputs.items():
+            value = value.replace(f"{{{step_id}}}", text.strip())
+        return value
+    if isinstance(value, dict):
+        return {k: _pipe(v, outputs) for k, v in value.items()}
+    return value
+
+
+def _unstreamed(result, streamed):
+    """What result holds beyond the streamed text (headers, sources, errors); all of it if nothing streamed."""
+    if not streamed.strip():
+        return result
+    if result.startswith(streamed):
+        parts = [result[len(streamed):]]
+    else:
+        core = streamed.strip()
+        at = result.find(core)
+        if at < 0:
+            return result
+        parts = [result[:at], result[at + len(core):]]
+    return "\n".join(part.strip() for part in parts if re.search(r"\w", part))
+
+
+async def _streaming(call, on_token, on_text):
+    """
+    Await call(on_token); with on_text, also pass on_text whatever the result holds
+    that the tokens didn't show, so a stream of tokens and texts covers the output.
+    """
+    if not on_text:
+        return await call(on_token)
+    streamed = []
+
+    def collect(tok):
+        streamed.append(tok)
+        if on_token:
+            on_token(tok)
+
+    result = await call(collect)
+    rest = _unstreamed(result, "".join(streamed))
+    if rest:
+        on_text(rest)
+    return result
+
+
+async def execute_steps(steps, user_command, config, on_token=None, on_text=None):
+    """
+    Run a multi-step plan. Each step starts as soon as the steps it depends_on have
+    finished, so independent steps overlap; only the final step streams tokens.
+    Returns the outputs of all steps, in plan order.
+
+    With on_text, earlier steps' blocks go out through it in plan order as they
+    finish, and the final step's tokens and text are held back until they all have,
+    so the stream follows the same order as the returned text.
+    """
+    outputs = {}
+    running = {}
+    final_id = steps[-1]["id"]
+    shown = 0  # steps whose block has gone out through on_text
+    held = []  # (callback, piece) of the final step that arrived before the earlier blocks were shown
+    stream_lock = threading.Lock()
+
+    def show_finished():
+        nonlocal shown
+        with stream_lock:
+            while shown < len(steps) - 1 and steps[shown]["id"] in outputs:
+                step = steps[shown]
+                on_text(f"[{step['id']}] {step['agent']}\n{outputs[step['id']]}\n\n")
+                shown += 1
+            if shown == len(steps) - 1:
+                on_text(f"[{final_id}] {steps[-1]['agent']}\n")
+                for emit, piece in held:
+                    emit(piece)
+                held.clear()
+                shown += 1
+
+    def hold(emit):
+        def final(piece):
+            # called from the loop or an executor thread
+            with stream_lock:
+                if shown < len(steps):
+                    held.append((emit, piece))
+                    return
+            emit(piece)
+        return final if emit else None
+
+    async def run(step):
+        if step["depends_on"]:
+            await asyncio.gather(*(running[d] for d in step["depends_on"]))
+        failed = [d for d in step["depends_on"] if outputs[d].lstrip().startswith(("❌", "⚠️", "⏭️"))]
+        if failed:
+            result = f"⏭️ Skipped: depends on failed step {', '.join(failed)}"
+        else:
+            try:
+                info = _pipe(step["info"], outputs)
+                if step["id"] == final_id and on_text:
+                    result = await _streaming(
+                        lambda tok: dispatch_async(step["agent"], info, user_command, config, on_token=tok),
+                        hold(on_token), hold(on_text),
+                    )
+                else:
+                    result = await dispatch_async(step["agent"], info, user_command, config)
+            except Exception as e:
+                result = f"❌ Step failed: {e}"
+                if step["id"] == final_id and on_text:
+                    hold(on_text)(result)
+        outputs[step["id"]] = result
+        if on_text:
+            show_finished()
+        return result
+
+    for step in steps:
+        running[step["id"]] = asyncio.ensure_future(run(step))
+    results = await asyncio.gather(*running.values())
+    return "\n\n".join(
+        f"[{step['id']}] {step['agent']}\n{result}" for step, result in zip(steps, results)
+    )
+
+
+async def handle(command, on_token=None, on_text=None):
+    """
+    Route and run one command, returning the full output text. on_token may be called from the loop
+    or from an executor thread, so it must be thread-safe. on_text, if given, gets
+    every piece of the output that isn't a model token (route banner, step headers,
+    agent wrappers, errors), so tokens and texts together cover the returned output.
+    """
+    config = await run_blocking(get_orion_config)
+
+    plan = fast_plan(command)
+    if plan:
+        output = "⚡ Fast route\n\n"
+    else:
+        if get_routing_mode() == "classify" and await is_general_question_async(command):
+            return await _streaming(lambda tok: chat_reply_async(command, on_token=tok), on_token, on_text)
+        output = "🧠 Thinking with Ollama...\n\n"
+        history = await run_blocking(get_recent_history)
+        plan = await run_blocking(
+            plan_command, command, model=model_for("router"), history=history, embed_model=model_for("embed")
+        )
+
+    print(f"📦 Planner output: {plan}")
+    if on_text and plan.get("agent") != "chat":
+        on_text(output)
+    if "steps" in plan:
+        output += await execute_steps(plan["steps"], command, config, on_token=on_token, on_text=on_text)
+        await run_blocking(log_interaction, command, "multi", output[:200])
+        return output
+
+    agent = plan.get("agent")
+    info = plan.get("info", {})
+    print(f"🧠 Detected agent: {agent}")
+
+    if agent == "chat":
+        return await _streaming(lambda tok: _chat_async(info, command, config, tok), on_token, on_text)
+
+    output += await _streaming(
+        lambda tok: dispatch_async(agent, info, command, config, on_token=tok), on_token, on_text
+    )
+    await run_blocking(log_interaction, command, agent or "unknown", output[:200])
+    return output
+
+
+def background_loop():
+    """Shared event loop running on a daemon thread; synchronous callers submit() to it."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="orion-loop", daemon=True).start()
+            atexit.register(_close_loop_session)
+    return _loop
+
+
+def _close_loop_session():
+    # close the loop's pooled aiohttp session at exit instead of leaking its connections
+    try:
+        asyncio.run_coroutine_threadsafe(async_http.close_session(), _loop).result(timeout=5)
+    except Exception as e:
+        print(f"⚠️ Closing HTTP session failed: {e}")
+
+
+def submit(command, on_token=None, on_text=None):
+    """Schedule handle(command) on the shared loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(handle(command, on_token=on_token, on_text=on_text), background_loop())
+
+
+def drain_tasks():
+    """
+    Run queued tasks to completion. The daemon's worker pool does this continuously;
+    an in-process front end calls it after the command's answer has been shown.
+    """
+    if not workers.running():
+        start_worker(run_task)
+
+
+def stream_main_logic(user_command):
+    """
+    Generator variant of main_logic for front ends that render incrementally.
+    Yields ("token", text) while the model streams and ("text", piece) for output
+    that isn't a model token, then a final ("result", output).
+    Commands run concurrently on the shared event loop rather than a thread each.
+    """
+    events = queue.Queue()
+
+    def done(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = f"❌ Orion failed: {e}"
+            events.put(("text", result))
+        events.put(("result", result))
+
+    submit(
+        user_command,
+        on_token=lambda tok: events.put(("token", tok)),
+        on_text=lambda piece: events.put(("text", piece)),
+    ).add_done_callback(done)
+    while True:
+        kind, text = events.get()
+        yield kind, text
+        if kind == "result":
+            return
 
 
 if __name__ == "__main__":
-    print("Welcome to Orion 🦾")
-    user_command = input("Enter your command: ")
-    result = main_logic(user_command)
-    print(result)
+    from orion_cli import run_cli
+    run_cli()
@@ -0,0 +1,20 @@
+"""
+Thin command-line client. Sends the command to a running orion_daemon.py (models,
+caches and connections already warm) and falls back to in-process Orion otherwise.
+
+Run: python orion_cli.py
+"""
+
+from utils.daemon_client import display, stream_command, prewarm
+
+
+def run_cli():
+    print("Welcome to Orion 🦾")
+    prewarm()  # loads models while the user types (no-op when the daemon is up)
+    user_command = input("Enter your command: ")
+    for text in display(stream_command(user_command)):
+        print(text, end="", flush=True)
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,99 @@
+"""
+Long-running Orion server: agents, config, caches, Ollama connections and loaded
+models stay warm between commands, and front ends talk to it over local HTTP.
+
+Run (from repo root):
+    python orion_daemon.py
+
+Endpoints (127.0.0.1:$ORION_DAEMON_PORT, default 8765; JSON bodies only):
+    POST /command   {"command": "...", "stream": false} -> {"output": "..."}
+                    with "stream": true the reply is NDJSON events
+                    {"type": "token"|"text"|"result", "text": "..."}
+    GET  /health    liveness check used by the thin clients
+    GET  /stats     Ollama call stats, planner, plan-cache, SerpAPI and page cache counters, worker progress
+Requests must send the daemon token (ORION_DAEMON_TOKEN, else a per-install token
+generated into orion_daemon_token with owner-only permissions) in the X-Orion-Token
+header, and a Host of 127.0.0.1 or localhost on this port, which keeps web pages
+(including DNS-rebound ones) from driving the daemon.
+
+Commands run as coroutines on one shared event loop (main.handle), so overlapping
+requests share the Ollama/HTTP connection pools instead of each blocking a thread.
+"""
+
+import json
+import os
+import secrets
+
+from flask import Flask, Response, jsonify, request
+
+from main import submit, stream_main_logic, prewarm_models, get_orion_config, run_task
+from agents.llm_planner_agent import get_planner_stats
+from utils import ollama_client, page_cache, plan_cache, serpapi, workers
+from utils.daemon_client import get_daemon_port, get_daemon_token
+
+app = Flask(__name__)
+
+
+def _token() -> str:
+    if not app.config.get("ORION_DAEMON_TOKEN"):
+        app.config["ORION_DAEMON_TOKEN"] = get_daemon_token(create=True)
+    return app.config["ORION_DAEMON_TOKEN"]
+
+
+@app.before_request
+def check_token():
+    port = get_daemon_port()
+    if request.host not in (f"127.0.0.1:{port}", f"localhost:{port}"):
+        return jsonify({"error": "forbidden host"}), 403
+    if not secrets.compare_digest(request.headers.get("X-Orion-Token", ""), _token()):
+        return jsonify({"error": "unauthorized"}), 401
+    return None
+
+
+@app.get("/health")
+def health():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+
+@app.get("/stats")
+def stats():
+    return jsonify({
+        "ollama": ollama_client.recent_stats(),
+        "planner": get_planner_stats(),
+        "plan_cache": plan_cache.stats(),
+        "serpapi": serpapi.stats(),
+        "page_cache": page_cache.stats(),
+        "workers": workers.progress(),
+    })
+
+
+@app.post("/command")
+def command():
+    # get_json(silent) only accepts application/json, which browsers can't send cross-origin without a preflight
+    body = request.get_json(silent=True) or {}
+    user_command = str(body.get("command") or "").strip()
+    if not user_command:
+        return jsonify({"error": "missing command"}), 400
+
+    if not body.get("stream"):
+        return jsonify({"output": submit(user_command).result()})
+
+    def events():
+        for kind, text in stream_main_logic(user_command):
+            yield json.dumps({"type": kind, "text": text}) + "\n"
+
+    return Response(events(), mimetype="application/x-ndjson")
+
+
+def main():
+    get_orion_config()  # prompt for missing credentials here, not inside a request
+    prewarm_models()
+    workers.start_pool(run_task)
+    _token()  # create the per-install token before any client asks for it
+    port = get_daemon_port()
+    print(f"🛰️ Orion daemon listening on http://127.0.0.1:{port}")
+    app.run(host="127.0.0.1", port=port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from utils import file_index, notes, notes_index, plan_cache, vector_store
+
+# Each fixture points one on-disk store at tmp_path and resets its in-memory state,
+# so tests never touch the working directory's databases or leak into each other.
+
+
+@pytest.fixture
+def task_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ORION_TASK_DB", str(tmp_path / "tasks.db"))
+
+
+@pytest.fixture
+def notes_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ORION_RAG", "0")
+    monkeypatch.setattr(notes, "NOTES_DIR", tmp_path / "notes")
+    monkeypatch.setattr(notes, "ARCHIVE_DIR", tmp_path / "notes" / "archive")
+    monkeypatch.setattr(notes_index, "INDEX_FILE", tmp_path / "index.db")
+    notes.NOTES_DIR.mkdir()
+
+
+@pytest.fixture
+def file_index_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_index, "INDEX_FILE", tmp_path / "index.db")
+
+
+@pytest.fixture
+def plan_cache_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("ORION_PLAN_CACHE", "1")
+    monkeypatch.setattr(plan_cache, "CACHE_FILE", tmp_path / "plans.json")
+    monkeypatch.setattr(plan_cache, "_entries", None)
+
+
+@pytest.fixture
+def vector_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("ORION_RAG", "1")
+    monkeypatch.setenv("ORION_RAG_EMBED_BATCH", "4")
+    for name in ("VECTORS_FILE", "IDS_FILE", "META_FILE"):
+        monkeypatch.setattr(vector_store, name, tmp_path / getattr(vector_store, name).name)
+    monkeypatch.setattr(vector_store, "_state", dict(vector_store._EMPTY, rows=-1, ids=[], keys={}))
+    monkeypatch.setattr(vector_store, "_lock", threading.RLock())
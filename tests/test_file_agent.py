@@ -0,0 +1,14 @@
+from agents import file_agent
+from utils import file_index, file_scanner
+
+
+def test_miss_on_built_index_refreshes_instead_of_scanning(file_index_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_index, "refresh_in_background", lambda root: None)
+    monkeypatch.setattr(file_scanner, "find_first", lambda *a: (_ for _ in ()).throw(AssertionError("full scan")))
+    root = tmp_path / "home"
+    (root / "docs").mkdir(parents=True)
+    file_index.refresh(root)
+    (root / "docs" / "new.txt").write_text("x")
+
+    assert file_agent.global_find_file(root, "new.txt") == str(root / "docs" / "new.txt")
+    assert file_agent.global_find_file(root, "missing.txt") is None
@@ -0,0 +1,39 @@
+import pytest
+
+from utils import file_index, sqlite_store
+
+
+def _tree(root):
+    for i in range(10):
+        d = root / f"d{i}" / "inner"
+        d.mkdir(parents=True)
+        (d / f"file{i}.txt").write_text("x")
+
+
+def test_interrupted_build_resumes_without_holes(file_index_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_index, "BATCH_DIRS", 1)
+    root = tmp_path / "home"
+    _tree(root)
+
+    real_list_dir = file_index._list_dir
+    calls = []
+
+    def dying_list_dir(path, patterns):
+        calls.append(path)
+        if len(calls) > 4:
+            raise KeyboardInterrupt  # the process exits mid-build
+        return real_list_dir(path, patterns)
+
+    monkeypatch.setattr(file_index, "_list_dir", dying_list_dir)
+    with pytest.raises(KeyboardInterrupt):
+        file_index.refresh(root)
+    # the dying process takes its connection (and the uncommitted batch) with it
+    sqlite_store.close(file_index.INDEX_FILE)
+    assert not file_index.is_built(root)
+
+    monkeypatch.setattr(file_index, "_list_dir", real_list_dir)
+    file_index.refresh(root)
+
+    assert file_index.is_built(root)
+    for i in range(10):
+        assert file_index.find(f"file{i}.txt", root) == [str(root / f"d{i}" / "inner" / f"file{i}.txt")]
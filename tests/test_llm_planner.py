@@ -0,0 +1,14 @@
+from agents.llm_planner_agent import FEW_SHOT_EXAMPLES, MULTI_STEP_EXAMPLES, normalize_plan
+
+
+def test_examples_pass_validation():
+    for _, plan in FEW_SHOT_EXAMPLES + MULTI_STEP_EXAMPLES:
+        assert normalize_plan(plan) is not None
+
+
+def test_info_is_checked_against_agent_fields():
+    assert normalize_plan({"agent": "system", "info": {"action": "explode"}}) is None
+    assert normalize_plan({"agent": "search", "info": {"query": "x", "url": "y"}}) is None
+    assert normalize_plan({"agent": "translate", "info": {"text": "hi"}}) is None
+    assert normalize_plan({"agent": "notes_read", "info": {"topic": 3}}) is None
+    assert normalize_plan({"agent": "search", "info": {"query": "x"}}) == {"agent": "search", "info": {"query": "x"}}
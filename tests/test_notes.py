@@ -0,0 +1,43 @@
+from utils import notes, notes_index
+
+
+def test_clear_notes_keeps_archives_of_topics_sharing_a_prefix(notes_dir):
+    for topic in ("sprint", "sprint-3"):
+        path = notes._topic_path(topic)
+        path.write_text(f"# {topic}\n\n## old\nbody\n")
+        notes._rotate(path)
+        path.write_text(f"# {topic}\n\n## new\nbody\n")
+    # an archive written before archives used "@"
+    legacy = notes.ARCHIVE_DIR / "sprint-20250101T000000000000.md"
+    legacy.write_text("# sprint\n")
+
+    notes.clear_notes("sprint")
+
+    left = sorted(p.name for p in notes.ARCHIVE_DIR.iterdir())
+    assert len(left) == 1 and left[0].startswith("sprint-3@")
+    assert notes._topic_path("sprint-3").exists()
+
+
+def test_body_headings_stay_in_their_section(notes_dir):
+    notes.append_note("plans", "intro\n## Goals\n- ship it")
+    notes.append_note("plans", "second")
+    path = notes._topic_path("plans")
+    notes._index_path(path).unlink()
+
+    sections = notes.read_notes("plans").split("\n\n")
+
+    assert len(sections) == 2
+    assert sections[0].endswith("intro\n## Goals\n- ship it")
+    assert [body for _, _, body in notes_index.split_sections(path.read_bytes())] == [
+        "intro\n## Goals\n- ship it",
+        "second",
+    ]
+
+
+def test_read_notes_sees_sections_appended_without_the_index(notes_dir):
+    notes.append_note("log", "first")
+    path = notes._topic_path("log")
+    with open(path, "a") as f:
+        f.write("\n\n## 2025-01-01T00:00:00.000001 UTC\nfrom elsewhere\n")
+
+    assert notes.read_notes("log").endswith("from elsewhere")
@@ -0,0 +1,41 @@
+import json
+import time
+
+from utils import plan_cache
+
+
+def test_plan_with_a_resolved_relative_date_is_not_cached(plan_cache_file):
+    command = "remind me tomorrow to call mom"
+    plan = {"agent": "reminder", "info": {"task": "call mom", "datetime": "2026-10-19 09:00"}}
+
+    plan_cache.put(command, "m", "v1", plan)
+
+    assert plan_cache.get(command, "m", "v1") is None
+
+
+def test_templated_slots_are_refilled(plan_cache_file):
+    plan = {"agent": "reminder", "info": {"task": "call mom", "datetime": "2025-06-24 17:00"}}
+
+    plan_cache.put("remind me to call mom at 2025-06-24 17:00", "m", "v1", plan)
+
+    hit = plan_cache.get("remind me to call mom at 2025-06-25 18:30", "m", "v1")
+    assert hit["info"] == {"task": "call mom", "datetime": "2025-06-25 18:30"}
+
+
+def test_normalization_keeps_symbols_and_case_of_free_text():
+    assert plan_cache.normalize_command("search for c++")[0] != plan_cache.normalize_command("search for c")[0]
+    assert plan_cache.normalize_command("search for Python")[0] != plan_cache.normalize_command("search for python")[0]
+    assert plan_cache.normalize_command("open notes, please!")[0] == plan_cache.normalize_command("open notes please")[0]
+
+
+def test_hits_reach_disk_at_exit(plan_cache_file, monkeypatch):
+    plan = {"agent": "search", "info": {"query": "weather"}}
+    plan_cache.put("search weather", "m", "v1", plan)
+    monkeypatch.setattr(plan_cache, "_last_save", time.time())  # inside the save interval
+    plan_cache.get("search weather", "m", "v1")
+    used = plan_cache._entries["m|v1|search weather"]["last_used"]
+
+    plan_cache.flush()
+
+    saved = json.loads(plan_cache.CACHE_FILE.read_text())["entries"]["m|v1|search weather"]
+    assert saved["last_used"] == used
@@ -0,0 +1,25 @@
+import pytest
+
+from utils import serpapi
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def test_error_payloads_raise_and_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(serpapi, "CACHE_FILE", tmp_path / "serpapi.db")
+    replies = [{"error": "Your account has run out of searches."}, {"organic_results": [{"snippet": "ok"}]}]
+    monkeypatch.setattr(serpapi.requests, "get", lambda *a, **kw: _Response(replies.pop(0)))
+
+    with pytest.raises(RuntimeError, match="run out of searches"):
+        serpapi.search("q", "key")
+
+    assert serpapi.snippets(serpapi.search("q", "key")) == ["ok"]
@@ -0,0 +1,41 @@
+from utils import tasks
+
+
+def test_expired_lease_is_not_reclaimed_past_max_attempts(task_queue):
+    task = tasks.add_task("research", {"topic": "x"}, max_attempts=3)
+
+    claims = 0
+    for _ in range(6):
+        # a lease that is already over: the worker "died" right after claiming
+        if tasks.claim_task(lease_seconds=-1) is None:
+            break
+        claims += 1
+
+    assert claims == 3
+    assert tasks.get_task(task["id"])["status"] == "failed"
+    assert tasks.claim_task() is None
+
+
+def test_expired_lease_is_reclaimed_while_attempts_remain(task_queue):
+    task = tasks.add_task("research", {"topic": "x"}, max_attempts=3)
+
+    tasks.claim_task(lease_seconds=-1)
+    again = tasks.claim_task()
+
+    assert again["id"] == task["id"]
+    assert again["attempts"] == 2
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_task(task_queue):
+    task = tasks.add_task("research", {"topic": "x"}, max_attempts=3)
+
+    stale = tasks.claim_task(lease_seconds=-1)
+    current = tasks.claim_task()
+
+    assert not tasks.extend_lease(stale["id"], stale["lease"])
+    assert not tasks.complete_task(stale["id"], stale["lease"], "stale result")
+    assert not tasks.fail_task(stale["id"], stale["lease"], "stale error")
+    assert tasks.get_task(task["id"])["status"] == "running"
+    assert tasks.complete_task(current["id"], current["lease"], "fresh result")
+    assert tasks.get_task(task["id"])["result"] == "fresh result"
+
@@ -0,0 +1,60 @@
+import pytest
+
+from utils import ollama_client, vector_store
+
+pytest.importorskip("numpy")
+
+
+def test_large_adds_are_embedded_in_batches_and_keep_good_batches(vector_files, monkeypatch):
+    calls = []
+
+    def embed(model, texts, timeout=None):
+        calls.append(len(texts))
+        if len(calls) == 2:
+            return [], "timed out", {}
+        return [[1.0, float(len(t)), 0.5] for t in texts], None, {}
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    items = [(f"note:t:h#{i}", "notes/t", f"text {i}") for i in range(10)]
+
+    err = vector_store._add_many(items, "m")
+
+    assert calls == [4, 4, 2]
+    assert err and "1 of 3" in err
+    with vector_store._lock:
+        vector_store._refresh()
+        assert vector_store._state["rows"] == 6
+
+
+def test_masked_prefixes_drop_out_of_search(vector_files, monkeypatch):
+    monkeypatch.setattr(ollama_client, "embed", lambda model, texts, timeout=None: (
+        [[1.0, 0.0, 0.0] for _ in ([texts] if isinstance(texts, str) else texts)], None, {}
+    ))
+    vector_store._add_many([
+        ("knowledge:ai#0", "knowledge/ai", "one"),
+        ("knowledge:ai#1", "knowledge/ai", "two"),
+        ("note:ai:h#0", "notes/ai", "three"),
+    ], "m")
+
+    vector_store._mask_prefix("knowledge:ai#", keep={"knowledge:ai#0"})
+    assert sorted(hit["key"] for hit in vector_store.search("q", k=5)) == ["knowledge:ai#0", "note:ai:h#0"]
+
+    vector_store._mask_prefix("note:ai:")
+    vector_store._add_many([("note:ai:h#0", "notes/ai", "three")], "m")
+    assert sorted(hit["key"] for hit in vector_store.search("q", k=5)) == ["knowledge:ai#0", "note:ai:h#0"]
+
+
+def test_rows_orphaned_by_a_crash_do_not_shift_later_ids(vector_files, monkeypatch):
+    monkeypatch.setattr(ollama_client, "embed", lambda model, texts, timeout=None: (
+        [[1.0, 0.0, 0.0] if t == "first" else [0.0, 1.0, 0.0] for t in ([texts] if isinstance(texts, str) else texts)],
+        None, {},
+    ))
+    vector_store._add_many([("k:first", "s", "first")], "m")
+    # the process died after appending a vector but before its id line
+    with open(vector_store.VECTORS_FILE, "ab") as f:
+        f.write(b"\0" * 12)
+
+    vector_store._add_many([("k:second", "s", "second")], "m")
+
+    monkeypatch.setattr(ollama_client, "embed", lambda model, texts, timeout=None: ([[0.0, 1.0, 0.0]], None, {}))
+    assert vector_store.search("q", k=1)[0]["key"] == "k:second"
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+
+import requests
+
+# aiohttp is optional; without it the async helpers run the blocking requests call in
+# the default executor so async callers still work (just without native async I/O).
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# One pooled ClientSession per event loop (aiohttp sessions are bound to their loop).
+_sessions = {}
+
+
+def available() -> bool:
+    return aiohttp is not None
+
+
+def _session():
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=int(os.environ.get("ORION_ASYNC_POOL", "32")),
+            limit_per_host=int(os.environ.get("ORION_ASYNC_POOL_PER_HOST", "8")),
+        )
+        session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": "Orion/1.0"})
+        _sessions[loop] = session
+    return session
+
+
+async def close_session():
+    """Close the current loop's session (call before the loop shuts down)."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _timeout(seconds):
+    return aiohttp.ClientTimeout(total=seconds)
+
+
+async def get_json(url: str, params: dict | None = None, timeout: float = 20):
+    if aiohttp is None:
+        def fetch():
+            resp = requests.get(url, params=params, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+        return await asyncio.to_thread(fetch)
+    async with _session().get(url, params=params, timeout=_timeout(timeout)) as resp:
+        resp.raise_for_status()
+        return await resp.json(content_type=None)
+
+
+async def get_text(url: str, params: dict | None = None, timeout: float = 20, headers: dict | None = None):
+    if aiohttp is None:
+        def fetch():
+            resp = requests.get(url, params=params, timeout=timeout, headers=headers)
+            resp.raise_for_status()
+            return resp.text
+        return await asyncio.to_thread(fetch)
+    async with _session().get(url, params=params, timeout=_timeout(timeout), headers=headers) as resp:
+        resp.raise_for_status()
+        return await resp.text(errors="replace")
+
+
+async def post_json(url: str, body: dict, timeout: float = 60):
+    if aiohttp is None:
+        def send():
+            resp = requests.post(url, json=body, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+        return await asyncio.to_thread(send)
+    async with _session().post(url, json=body, timeout=_timeout(timeout)) as resp:
+        resp.raise_for_status()
+        return await resp.json(content_type=None)
+
+
+async def post_ndjson(url: str, body: dict, timeout: float = 60):
+    """Async generator over the JSON objects of a streaming NDJSON response (requires aiohttp)."""
+    async with _session().post(url, json=body, timeout=_timeout(timeout)) as resp:
+        resp.raise_for_status()
+        async for line in resp.content:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
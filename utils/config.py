@@ -24,4 +24,25 @@ def get_model_overrides(defaults: dict) -> dict:
     overrides["chat"] = os.environ.get("ORION_MODEL_CHAT", overrides.get("chat"))
     overrides["email"] = os.environ.get("ORION_MODEL_EMAIL", overrides.get("email"))
     overrides["fallback"] = os.environ.get("ORION_MODEL_FALLBACK", overrides.get("fallback"))
+    overrides["embed"] = os.environ.get("ORION_MODEL_EMBED", overrides.get("embed"))
     return overrides
+
+
+def get_routing_mode() -> str:
+    """
+    How main_logic routes a command:
+    - "combined" (default): one planner call; conversational commands come back as the chat agent with the reply.
+    - "classify": separate chat/task classifier call before the planner (the original two-call path).
+    """
+    mode = os.environ.get("ORION_ROUTING_MODE", "combined").strip().lower()
+    return mode if mode in ("combined", "classify") else "combined"
+
+
+def get_planner_engine() -> str:
+    """
+    Which engine plan_command tries before the generative planner:
+    - "generative" (default): the LLM planner only.
+    - "embedding": nearest-neighbour intent match over embedded exemplars; the LLM planner runs only below the threshold.
+    """
+    engine = os.environ.get("ORION_PLANNER_ENGINE", "generative").strip().lower()
+    return engine if engine in ("generative", "embedding") else "generative"
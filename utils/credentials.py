@@ -25,15 +25,21 @@ def save_credentials(data):
 
 def get_or_prompt_credentials():
     creds = load_credentials()
+    prompted = False
 
     if "email" not in creds:
         creds["email"] = input("📧 Enter your email address: ")
+        prompted = True
 
     if "password" not in creds:
         creds["password"] = input("🔐 Enter your app-specific email password: ")
+        prompted = True
 
     if "serpapi" not in creds:
         creds["serpapi"] = input("🔎 Enter your SerpAPI key (or leave blank): ")
+        prompted = True
 
-    save_credentials(creds)
+    # only touch the file when something new was entered
+    if prompted:
+        save_credentials(creds)
     return creds
@@ -0,0 +1,128 @@
+import json
+import os
+import secrets
+from pathlib import Path
+
+import requests
+
+# Thin client for orion_daemon.py. Front ends call stream_command()/run_command();
+# when no daemon is running they fall back to running Orion in-process.
+# Every request carries the daemon's token: ORION_DAEMON_TOKEN if set, else the
+# per-install one the daemon writes to TOKEN_FILE (owner-only) on first start.
+
+DEFAULT_PORT = 8765
+TOKEN_FILE = Path("orion_daemon_token")
+
+
+def get_daemon_port() -> int:
+    return int(os.environ.get("ORION_DAEMON_PORT", DEFAULT_PORT))
+
+
+def _base_url() -> str:
+    return f"http://127.0.0.1:{get_daemon_port()}"
+
+
+def get_daemon_token(create: bool = False) -> str | None:
+    """The token requests must carry; with create, generate and save one if there is none yet."""
+    token = os.environ.get("ORION_DAEMON_TOKEN")
+    if token:
+        return token
+    try:
+        return TOKEN_FILE.read_text().strip() or None
+    except FileNotFoundError:
+        if not create:
+            return None
+    token = secrets.token_urlsafe(32)
+    try:
+        fd = os.open(TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return TOKEN_FILE.read_text().strip() or None  # another process got there first
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+def _headers() -> dict:
+    token = get_daemon_token()
+    return {"X-Orion-Token": token} if token else {}
+
+
+def daemon_available() -> bool:
+    if os.environ.get("ORION_DAEMON", "1") == "0":
+        return False
+    try:
+        resp = requests.get(f"{_base_url()}/health", headers=_headers(), timeout=0.5)
+        return resp.ok
+    except requests.RequestException:
+        return False
+
+
+def _stream_remote(command: str):
+    try:
+        with requests.post(
+            f"{_base_url()}/command",
+            json={"command": command, "stream": True},
+            headers=_headers(),
+            stream=True,
+            timeout=(2, 600),
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if line:
+                    event = json.loads(line)
+                    yield event["type"], event["text"]
+    except Exception as e:
+        yield "text", f"❌ Orion daemon error: {e}"
+        yield "result", f"❌ Orion daemon error: {e}"
+
+
+def stream_command(command: str):
+    """
+    Yield ("token", text) and ("text", piece) events and a final ("result", output), from the daemon
+    if one is running, otherwise from an in-process main_logic.
+    """
+    if daemon_available():
+        yield from _stream_remote(command)
+        return
+    from main import drain_tasks, stream_main_logic  # heavy import only when running locally
+    yield from stream_main_logic(command)
+    # queued tasks run once the caller has rendered the result and asked for more
+    drain_tasks()
+
+
+def display(events):
+    """
+    Text to render for each stream event, in order: tokens as they arrive, server
+    text pieces on lines of their own, and the final result only when nothing
+    was streamed before it.
+    """
+    last = ""
+    for kind, text in events:
+        if kind == "token":
+            out = text
+        elif kind == "text":
+            out = ("\n" if last and not last.endswith("\n") else "") + text
+            out += "" if out.endswith("\n") else "\n"
+        elif last:
+            out = "" if last.endswith("\n") else "\n"
+        else:
+            out = text + "\n"
+        if out:
+            last = out
+            yield out
+
+
+def run_command(command: str) -> str:
+    output = ""
+    for kind, text in stream_command(command):
+        if kind == "result":
+            output = text
+    return output
+
+
+def prewarm():
+    """Prewarm local models unless a daemon (which keeps them warm itself) is running."""
+    if daemon_available():
+        return
+    from main import prewarm_models
+    prewarm_models()
@@ -0,0 +1,201 @@
+import difflib
+import os
+import threading
+import time
+from pathlib import Path
+
+from utils import sqlite_store
+from utils.file_scanner import ignore_patterns, is_ignored
+
+# Persistent filename index for the file agent (SQLite). The first refresh walks the
+# tree once (same ignore rules as utils/file_scanner.py); later refreshes stat every known directory and only re-list those whose
+# mtime changed (a directory's mtime moves when entries are added, removed or renamed).
+# Listing a directory also records its subdirectories with no mtime yet, in the same
+# transaction, so a refresh that is cut short (the CLI exits mid-build) resumes where
+# it stopped. A root counts as built once one refresh of it has run to the end.
+# Lookups are indexed exact/prefix queries plus a fuzzy pass, ranked by recent use.
+
+INDEX_FILE = Path("orion_file_index.db")
+BATCH_DIRS = 500  # directories per write transaction while refreshing
+
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, name TEXT NOT NULL, dir TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS files_name ON files (name);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS usage (path TEXT PRIMARY KEY, last_used REAL, uses INTEGER);
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, completed REAL NOT NULL);
+"""
+
+
+def _conn():
+    return sqlite_store.connect(INDEX_FILE, _SCHEMA)
+
+
+def _list_dir(path: str, patterns):
+    """(files, subdirs) directly inside path, skipping ignored and symlinked dirs."""
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_ignored(entry.name, patterns):
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def refresh(root):
+    """Bring the index for root up to date. Returns the number of directories re-listed."""
+    root = str(Path(root).expanduser().resolve())
+    conn = _conn()
+    known = dict(conn.execute(
+        "SELECT path, mtime_ns FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+        (root, _like_prefix(root + os.sep)),
+    ))
+    patterns = ignore_patterns()
+    seen = set()
+    relisted = 0
+    pending_writes = 0
+    stack = [root]
+    conn.execute("BEGIN")
+    try:
+        while stack:
+            d = stack.pop()
+            try:
+                mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(d)
+            if known.get(d) == mtime:
+                stack.extend(p for (p,) in conn.execute("SELECT path FROM dirs WHERE parent = ?", (d,)))
+                continue
+            files, subdirs = _list_dir(d, patterns)
+            conn.execute("DELETE FROM files WHERE dir = ?", (d,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, name, dir) VALUES (?, ?, ?)",
+                [(os.path.join(d, name), name.lower(), d) for name in files],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (d, os.path.dirname(d), mtime),
+            )
+            # placeholders (mtime NULL) until each subdirectory is listed itself
+            conn.executemany(
+                "INSERT OR IGNORE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, NULL)",
+                [(sub, d) for sub in subdirs],
+            )
+            stack.extend(subdirs)
+            relisted += 1
+            pending_writes += 1
+            if pending_writes >= BATCH_DIRS:
+                conn.execute("COMMIT")
+                conn.execute("BEGIN")
+                pending_writes = 0
+        for gone in set(known) - seen:
+            conn.execute("DELETE FROM files WHERE dir = ?", (gone,))
+            conn.execute("DELETE FROM dirs WHERE path = ?", (gone,))
+        conn.execute("INSERT OR REPLACE INTO roots (path, completed) VALUES (?, ?)", (root, time.time()))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return relisted
+
+
+def refresh_in_background(root):
+    """Start refresh(root) on a daemon thread unless one is already running."""
+    global _refresh_thread
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return _refresh_thread
+
+        def run():
+            started = time.perf_counter()
+            try:
+                relisted = refresh(root)
+                print(f"🗂️ File index refreshed ({relisted} dirs re-listed in {time.perf_counter() - started:.1f}s)")
+            except Exception as e:
+                print(f"⚠️ File index refresh failed: {e}")
+
+        _refresh_thread = threading.Thread(target=run, name="orion-file-index", daemon=True)
+        _refresh_thread.start()
+        return _refresh_thread
+
+
+def is_built(root) -> bool:
+    """True once a refresh of root has completed a full pass."""
+    root = str(Path(root).expanduser().resolve())
+    return _conn().execute("SELECT 1 FROM roots WHERE path = ?", (root,)).fetchone() is not None
+
+
+def _like_prefix(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _ranked(rows, limit):
+    """Most recently used first, then shallower paths."""
+    rows = sorted(rows, key=lambda r: (-(r[1] or 0), r[0].count(os.sep), len(r[0])))
+    return [r[0] for r in rows[:limit]]
+
+
+def find(name: str, root=None, limit: int = 10):
+    """
+    Paths whose file name matches name: exact (case-insensitive) matches first, then
+    prefix matches, then fuzzy ones (substring or close spelling). Optionally limited
+    to paths under root.
+    """
+    conn = _conn()
+    needle = name.strip().lower()
+    if not needle:
+        return []
+    scope, params = "", []
+    if root:
+        scope = " AND f.path LIKE ? ESCAPE '\\'"
+        params = [_like_prefix(str(Path(root).expanduser().resolve()) + os.sep)]
+    select = "SELECT f.path, u.last_used FROM files f LEFT JOIN usage u ON u.path = f.path WHERE "
+
+    rows = conn.execute(select + "f.name = ?" + scope, [needle] + params).fetchall()
+    if rows:
+        return _ranked(rows, limit)
+    # prefix: an index range scan on name
+    rows = conn.execute(select + "f.name >= ? AND f.name < ?" + scope + " LIMIT 200", [needle, needle + "\uffff"] + params).fetchall()
+    if rows:
+        return _ranked(rows, limit)
+    stem = needle.rsplit(".", 1)[0]
+    rows = conn.execute(select + "instr(f.name, ?) > 0" + scope + " LIMIT 200", [stem] + params).fetchall()
+    if rows:
+        return _ranked(rows, limit)
+    # close spelling: compare against names sharing the first character (index range)
+    candidates = [r[0] for r in conn.execute(
+        "SELECT DISTINCT name FROM files WHERE name >= ? AND name < ? LIMIT 5000", (needle[0], needle[0] + "\uffff")
+    )]
+    close = difflib.get_close_matches(needle, candidates, n=limit, cutoff=0.75)
+    if not close:
+        return []
+    marks = ",".join("?" * len(close))
+    rows = conn.execute(select + f"f.name IN ({marks})" + scope, close + params).fetchall()
+    order = {n: i for i, n in enumerate(close)}
+    rows.sort(key=lambda r: order[os.path.basename(r[0]).lower()])
+    return [r[0] for r in rows[:limit]]
+
+
+def record_use(path):
+    """Remember that path was opened so it ranks first next time."""
+    path = str(Path(path).expanduser().resolve())
+    _conn().execute(
+        "INSERT INTO usage (path, last_used, uses) VALUES (?, ?, 1)"
+        " ON CONFLICT(path) DO UPDATE SET last_used = excluded.last_used, uses = uses + 1",
+        (path, time.time()),
+    )
@@ -0,0 +1,133 @@
+import fnmatch
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+# Parallel directory scanner used when the file index can't answer. Directories are
+# listed with os.scandir on a pool of threads, ignored trees are pruned, matches are
+# yielded as soon as they're found and the scan stops early once enough were found
+# or the depth/time budget runs out. Likely places (Desktop, Documents, ...) and
+# shallow directories are listed first.
+
+DEFAULT_IGNORE = (
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".cache", ".tox", ".nox", ".mypy_cache", ".pytest_cache", "site-packages",
+    "Library", "AppData", ".Trash", ".npm", ".cargo", ".rustup", ".gradle",
+)
+LIKELY_DIRS = {"desktop", "documents", "downloads", "projects", "src", "code", "work"}
+DEFAULT_WORKERS = 8
+DEFAULT_TIME_BUDGET = 30.0
+
+
+def ignore_patterns():
+    """Built-in ignore list plus comma-separated fnmatch patterns from ORION_SCAN_IGNORE."""
+    extra = [p.strip() for p in os.environ.get("ORION_SCAN_IGNORE", "").split(",") if p.strip()]
+    return tuple(DEFAULT_IGNORE) + tuple(extra)
+
+
+def is_ignored(name: str, patterns) -> bool:
+    if name in patterns:
+        return True
+    return any(fnmatch.fnmatchcase(name, p) for p in patterns if any(c in p for c in "*?["))
+
+
+def _boost(name: str, parent_boost: float) -> float:
+    """Likely directories, and everything below them, are listed ahead of their depth."""
+    return parent_boost or (2.5 if name.lower() in LIKELY_DIRS else 0.0)
+
+
+def scan(root, match, patterns=None, max_depth=None, time_budget=None, workers=None, stop_after=1):
+    """
+    Yield paths of files under root for which match(name) is true, as they are found.
+    Stops after stop_after matches (None = all), max_depth levels or time_budget seconds.
+    """
+    root = str(Path(root).expanduser().resolve())
+    patterns = ignore_patterns() if patterns is None else tuple(patterns)
+    workers = workers or int(os.environ.get("ORION_SCAN_WORKERS", DEFAULT_WORKERS))
+    if time_budget is None:
+        time_budget = float(os.environ.get("ORION_SCAN_TIME_BUDGET", DEFAULT_TIME_BUDGET))
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    dirs = queue.PriorityQueue()
+    results = queue.Queue()
+    stop = threading.Event()
+    lock = threading.Lock()
+    outstanding = [1]  # directories queued or being listed
+    counter = [0]      # tie-breaker so PriorityQueue never compares paths
+
+    def halt():
+        # wake the consumer and every worker with sentinels instead of polling
+        with lock:
+            if stop.is_set():
+                return
+            stop.set()
+        results.put(None)
+        for _ in range(workers):
+            dirs.put((float("-inf"), 0, None, 0, 0.0))
+
+    def push(path, depth, boost):
+        with lock:
+            outstanding[0] += 1
+            counter[0] += 1
+            dirs.put((depth - boost, counter[0], path, depth, boost))
+
+    def finish_one():
+        with lock:
+            outstanding[0] -= 1
+            done = outstanding[0] == 0
+        if done:
+            halt()
+
+    def worker():
+        while True:
+            _, _, path, depth, boost = dirs.get()
+            if path is None or stop.is_set():
+                return
+            try:
+                if deadline and time.monotonic() > deadline:
+                    halt()
+                    continue
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if stop.is_set():
+                            break
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if (max_depth is None or depth < max_depth) and not is_ignored(entry.name, patterns):
+                                    push(entry.path, depth + 1, _boost(entry.name, boost))
+                            elif match(entry.name):
+                                results.put(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            finally:
+                finish_one()
+
+    dirs.put((0, 0, root, 0, 0.0))
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+
+    found = 0
+    try:
+        while True:
+            path = results.get()
+            if path is None:
+                break
+            yield path
+            found += 1
+            if stop_after and found >= stop_after:
+                break
+    finally:
+        halt()
+        for t in threads:
+            t.join()
+
+
+def find_first(root, filename: str, **kwargs):
+    """First file under root whose name equals filename (case-insensitive), or None."""
+    target = filename.lower()
+    return next(scan(root, lambda name: name.lower() == target, **kwargs), None)
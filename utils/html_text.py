@@ -0,0 +1,108 @@
+from html.parser import HTMLParser
+
+# lxml is optional; its incremental HTML parser is several times faster than the
+# standard-library one, which is used when lxml isn't installed.
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Incremental paragraph extraction for fetched pages. Both backends take the page in
+# chunks as it downloads and report done() once max_chars of <p> text were collected,
+# so the caller can stop reading the body; nothing keeps a full document tree.
+
+SKIP_TAGS = {"script", "style", "noscript"}
+DEFAULT_MAX_CHARS = 8000
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+class _StdlibExtractor(HTMLParser):
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.chars = 0
+        self._buf = None
+        self._skip = 0
+
+    def _flush(self):
+        if self._buf:
+            text = _clean("".join(self._buf))
+            if text:
+                self.paragraphs.append(text)
+                self.chars += len(text) + 1
+        self._buf = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == "p":
+            self._flush()  # <p> can't nest; an unclosed one ends here
+            self._buf = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "p":
+            self._flush()
+
+    def handle_data(self, data):
+        if self._buf is not None and not self._skip:
+            self._buf.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+class _LxmlExtractor:
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.chars = 0
+        self._parser = etree.HTMLPullParser(events=("end",), tag="p", remove_comments=True)
+
+    def _collect(self):
+        for _, el in self._parser.read_events():
+            etree.strip_elements(el, *SKIP_TAGS, with_tail=False)
+            text = _clean("".join(el.itertext()))
+            el.clear(keep_tail=True)  # drop what was read so memory stays flat
+            if text:
+                self.paragraphs.append(text)
+                self.chars += len(text) + 1
+
+    def feed(self, data: str):
+        self._parser.feed(data)
+        self._collect()
+
+    def close(self):
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass  # empty or truncated document
+        self._collect()
+
+
+class TextExtractor:
+    """feed() HTML chunks, check done(), then text(): the page's paragraph text."""
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS, backend: str | None = None):
+        backend = backend or ("lxml" if etree is not None else "stdlib")
+        self.backend = backend
+        self._impl = _LxmlExtractor(max_chars) if backend == "lxml" else _StdlibExtractor(max_chars)
+        self.max_chars = max_chars
+
+    def feed(self, data: str):
+        self._impl.feed(data)
+
+    def done(self) -> bool:
+        return self._impl.chars >= self.max_chars
+
+    def close(self):
+        self._impl.close()
+
+    def text(self) -> str:
+        return "\n".join(self._impl.paragraphs)[:self.max_chars]
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP connection pool for page fetches (research sources and the like).
+# One requests.Session keeps connections alive across calls and threads; a
+# per-host semaphore keeps a burst of URLs from hammering a single site, and
+# fetch_all() runs a batch concurrently under one overall deadline.
+
+DEFAULT_POOL = 16
+DEFAULT_PER_HOST = 2
+USER_AGENT = "Orion/1.0"
+
+_lock = threading.Lock()
+_session = None
+_host_slots = {}
+
+
+def _pool_size() -> int:
+    return int(os.environ.get("ORION_HTTP_POOL", DEFAULT_POOL))
+
+
+def _per_host() -> int:
+    return int(os.environ.get("ORION_HTTP_PER_HOST", DEFAULT_PER_HOST))
+
+
+def session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_pool_size(), pool_maxsize=_pool_size())
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _session = s
+        return _session
+
+
+def host_slot(url: str) -> threading.BoundedSemaphore:
+    """Semaphore limiting concurrent requests to url's host (ORION_HTTP_PER_HOST)."""
+    host = urlparse(url).netloc.lower()
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(_per_host())
+        return slot
+
+
+def get(url: str, timeout: float = 10, **kwargs) -> requests.Response:
+    """GET through the shared session, waiting for a free slot on url's host."""
+    with host_slot(url):
+        resp = session().get(url, timeout=timeout, **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+@contextmanager
+def stream(url: str, timeout: float = 10, **kwargs):
+    """
+    Streaming GET: yields the response with the body unread and closes it on exit,
+    so a caller that stops early never downloads the rest. Holds the host slot throughout.
+    """
+    with host_slot(url):
+        resp = session().get(url, timeout=timeout, stream=True, **kwargs)
+        try:
+            resp.raise_for_status()
+            yield resp
+        finally:
+            resp.close()
+
+
+def fetch_all(urls, fn, deadline: float | None = None, workers: int | None = None):
+    """
+    Run fn(url) for every url concurrently and return {url: result} for the calls that
+    finished within deadline seconds; slower ones are abandoned (their result dropped).
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    pool = ThreadPoolExecutor(max_workers=min(len(urls), workers or _pool_size()), thread_name_prefix="orion-fetch")
+    started = time.monotonic()
+    futures = {pool.submit(fn, url): url for url in urls}
+    done, pending = wait(futures, timeout=deadline)
+    pool.shutdown(wait=False, cancel_futures=True)
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"❌ Fetch failed for {futures[future]}: {e}")
+    if pending:
+        print(f"⏱️ {len(pending)} source(s) still loading after {time.monotonic() - started:.1f}s, skipped")
+    return results
@@ -1,35 +1,75 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Jun 16 14:18:42 2025
-
-@author: romil
-"""
-
-# utils/memory.py
-
-import json
-import os
-
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Jun 16 14:18:42 2025
+
+@author: romil
+"""
+
+# utils/memory.py
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import deque
+
 MEMORY_FILE = "orion_memory.json"
-
-
+# Interaction history is an append-only JSONL log, separate from contacts/knowledge,
+# so logging a command never rewrites the memory file.
+HISTORY_FILE = "orion_history.jsonl"
+HISTORY_BUFFER = 200                 # entries kept in-process for get_recent_history
+HISTORY_MAX_BYTES = 1024 * 1024      # compact the log once it grows past this
+HISTORY_KEEP = 1000                  # entries kept by compaction
+
+_lock = threading.RLock()
+_memory_cache = {"stamp": None, "data": None}
+_history = None  # deque of recent entries, loaded lazily from the log tail
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
 def load_memory():
-    if not os.path.exists(MEMORY_FILE):
-        return {}
-    with open(MEMORY_FILE, "r") as f:
-        return json.load(f)
-
-
-def save_memory(memory):
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
-
-
-def get_contact(name):
-    memory = load_memory()
-    return memory.get("contacts", {}).get(name)
-
-
+    """Contacts/knowledge dict; re-parsed only when the file's mtime or size changes."""
+    with _lock:
+        stamp = _stamp(MEMORY_FILE)
+        if stamp is None:
+            return {}
+        if stamp != _memory_cache["stamp"]:
+            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
+                _memory_cache["data"] = json.load(f)
+            _memory_cache["stamp"] = stamp
+        # callers mutate and save the result, so never hand out the cached object
+        return copy.deepcopy(_memory_cache["data"])
+
+
+def save_memory(memory):
+    with _lock:
+        _write_atomic(MEMORY_FILE, json.dumps(memory, indent=2))
+        _memory_cache["data"] = copy.deepcopy(memory)
+        _memory_cache["stamp"] = _stamp(MEMORY_FILE)
+
+
+def get_contact(name):
+    memory = load_memory()
+    return memory.get("contacts", {}).get(name)
+
+
 def remember_contact(name, email):
     memory = load_memory()
     if "contacts" not in memory:
@@ -40,19 +80,93 @@ def remember_contact(name, email):
 
 # === Interaction logging ===
 
-def log_interaction(command: str, agent: str, result_snippet: str = ""):
+def _tail_lines(path, count, block=64 * 1024):
+    """Last count lines of a file, read backwards in blocks."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return data.decode("utf-8", errors="replace").splitlines()[-count:]
+
+
+def _parse_lines(lines):
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # torn write from a crash; skip it
+    return entries
+
+
+def _migrate_history():
+    """Move the history list out of orion_memory.json into the JSONL log (once)."""
     memory = load_memory()
-    history = memory.get("history", [])
-    history.append({
+    legacy = memory.pop("history", None)
+    if not legacy:
+        return
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        for entry in legacy:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    save_memory(memory)
+
+
+def _load_history():
+    global _history
+    if _history is None:
+        _migrate_history()
+        lines = []
+        if os.path.exists(HISTORY_FILE):
+            lines = _tail_lines(HISTORY_FILE, HISTORY_BUFFER)
+            _terminate_last_line()
+        _history = deque(_parse_lines(lines), maxlen=HISTORY_BUFFER)
+    return _history
+
+
+def _terminate_last_line():
+    """After a crash mid-write, end the torn line so the next entry starts cleanly."""
+    with open(HISTORY_FILE, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def compact_history(keep: int | None = None):
+    """Atomically rewrite the log with only its last `keep` entries (default HISTORY_KEEP)."""
+    with _lock:
+        if not os.path.exists(HISTORY_FILE):
+            return
+        entries = _parse_lines(_tail_lines(HISTORY_FILE, keep or HISTORY_KEEP))
+        _write_atomic(HISTORY_FILE, "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+
+
+def log_interaction(command: str, agent: str, result_snippet: str = ""):
+    entry = {
         "command": command,
         "agent": agent,
-        "result": result_snippet
-    })
-    memory["history"] = history[-50:]  # keep last 50 to stay light
-    save_memory(memory)
+        "result": result_snippet,
+        "time": time.time(),
+    }
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _lock:
+        history = _load_history()
+        # one write() per entry in append mode: a crash loses at most this line
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+        history.append(entry)
+        if os.path.getsize(HISTORY_FILE) > HISTORY_MAX_BYTES:
+            compact_history()
 
 
 def get_recent_history(limit: int = 5):
-    memory = load_memory()
-    history = memory.get("history", [])
-    return history[-limit:]
+    with _lock:
+        history = _load_history()
+        return list(history)[-limit:]
@@ -1,10 +1,24 @@
 import os
+import re
 import json
+import struct
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+from utils import notes_index, vector_store
 
 NOTES_DIR = Path("notes")
 NOTES_DIR.mkdir(exist_ok=True)
+ARCHIVE_DIR = NOTES_DIR / "archive"
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+# Each topic file has a sidecar "<topic>.md.idx" holding the byte offset of every
+# "## <timestamp> UTC" section as a little-endian uint64, so appends never read the note file and
+# reading the last N sections is two seeks from the end.
+_OFFSET = struct.Struct("<Q")
+_lock = threading.Lock()
+
 
 def _topic_path(topic: str) -> Path:
     safe = "".join(c for c in topic if c.isalnum() or c in (" ", "_", "-")).strip()
@@ -13,14 +27,103 @@ def _topic_path(topic: str) -> Path:
     return NOTES_DIR / f"{safe}.md"
 
 
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _max_bytes() -> int:
+    return int(os.environ.get("ORION_NOTES_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+def _rebuild_index(path: Path):
+    """Scan a note file once for section offsets (legacy files or a stale index)."""
+    offsets = [m.start() for m in notes_index.SECTION_HEADER.finditer(path.read_bytes())]
+    _index_path(path).write_bytes(b"".join(_OFFSET.pack(o) for o in offsets))
+    return offsets
+
+
+def _tail_offsets(path: Path, count: int):
+    """Offsets of the last `count` sections, rebuilding the index if it doesn't match the file."""
+    idx = _index_path(path)
+    if not idx.exists():
+        return _rebuild_index(path)[-count:]
+    with open(idx, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        take = min(size // _OFFSET.size, count) * _OFFSET.size
+        f.seek(size - take)
+        offsets = [o for (o,) in _OFFSET.iter_unpack(f.read(take))]
+    if not _covers(path, offsets):
+        return _rebuild_index(path)[-count:]
+    return offsets
+
+
+def _covers(path: Path, offsets) -> bool:
+    """Whether the index tail lands on section headers and no section follows its last one."""
+    # another process, or a writer that died before updating the index, may have appended
+    with open(path, "rb") as f:
+        if not offsets:
+            return not notes_index.SECTION_HEADER.search(f.read())
+        f.seek(offsets[0])
+        if not notes_index.SECTION_HEADER.match(f.readline()):
+            return False
+        f.seek(offsets[-1])
+        tail = f.read()
+    return len(notes_index.SECTION_HEADER.findall(tail)) == 1
+
+
+def _update_search_index(fn, *args):
+    # the search index is derived data: a failure there must never lose a note
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"⚠️ Notes search index update failed: {e}")
+
+
+def _forget_vectors(path: Path, topic: str):
+    # chunks are keyed on the topic as first written, which may differ from this spelling
+    for stored in {topic, notes_index.topic_of(path)}:
+        vector_store.remove_prefix(f"note:{stored}:")
+
+
+def _rotate(path: Path):
+    ARCHIVE_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    # "@" never survives _topic_path, so one topic's archives can't match another's
+    archived = ARCHIVE_DIR / f"{path.stem}@{stamp}.md"
+    os.replace(path, archived)
+    _index_path(path).unlink(missing_ok=True)
+    _update_search_index(notes_index.move_file, path, archived)
+
+
+def _archives(path: Path):
+    """Rotated files of one topic: "<stem>@<stamp>.md", or the older "<stem>-<stamp>.md"."""
+    legacy = re.compile(rf"{re.escape(path.stem)}-\d{{8}}T\d+\.md")
+    return [p for p in ARCHIVE_DIR.iterdir() if p.name.startswith(f"{path.stem}@") or legacy.fullmatch(p.name)]
+
+
 def append_note(topic: str, content: str, source: str = ""):
     path = _topic_path(topic)
-    ts = datetime.utcnow().isoformat()
-    header = f"\n\n## {ts} UTC"
+    ts = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    title = f"{ts} UTC"
     if source:
-        header += f" | source: {source}"
-    text = f"{header}\n{content.strip()}\n"
-    path.write_text(path.read_text() + text if path.exists() else f"# {topic}\n{text}")
+        title += f" | source: {source}"
+    text = f"\n\n## {title}\n{content.strip()}\n".encode("utf-8")
+    with _lock:
+        _update_search_index(notes_index.ensure_synced)
+        if path.exists() and path.stat().st_size > _max_bytes():
+            _rotate(path)
+        if path.exists() and not _index_path(path).exists():
+            _rebuild_index(path)
+        with open(path, "ab") as f:
+            if f.tell() == 0:
+                f.write(f"# {topic}\n".encode("utf-8"))
+            offset = f.tell() + 2  # section starts after the blank-line separator
+            f.write(text)
+        with open(_index_path(path), "ab") as f:
+            f.write(_OFFSET.pack(offset))
+        _update_search_index(notes_index.add_section, path, topic, offset, title, content.strip())
+        _update_search_index(vector_store.add_note, topic, title, content.strip())
     return f"📝 Note saved to {path}"
 
 
@@ -28,26 +131,42 @@ def read_notes(topic: str, limit: int = 5):
     path = _topic_path(topic)
     if not path.exists():
         return f"❌ No notes found for '{topic}'."
-    lines = path.read_text().splitlines()
-    # return last N sections
-    sections = []
-    current = []
-    for line in lines:
-        if line.startswith("## "):
-            if current:
-                sections.append("\n".join(current))
-            current = [line]
-        else:
-            current.append(line)
-    if current:
-        sections.append("\n".join(current))
-    snippet = "\n\n".join(sections[-limit:])
-    return snippet or f"❌ Notes empty for '{topic}'."
+    offsets = _tail_offsets(path, limit)
+    if not offsets:
+        return f"❌ Notes empty for '{topic}'."
+    with open(path, "rb") as f:
+        f.seek(offsets[0])
+        data = f.read()
+    bounds = [o - offsets[0] for o in offsets] + [len(data)]
+    sections = [data[a:b].decode("utf-8", errors="replace").strip() for a, b in zip(bounds, bounds[1:])]
+    return "\n\n".join(sections)
+
+
+def search_notes(query: str, limit: int = 5):
+    """Full-text (BM25) search across all notes, formatted for display."""
+    try:
+        hits = notes_index.search(query, limit=limit)
+    except Exception as e:
+        return f"❌ Notes search failed: {e}"
+    if not hits:
+        return f"❌ No notes match '{query}'."
+    output = f"🔎 Notes matching '{query}':\n"
+    for i, hit in enumerate(hits, 1):
+        output += f"\n{i}. [{hit['topic']}] {hit['header']}\n   {hit['snippet']}\n"
+    return output
 
 
 def clear_notes(topic: str):
     path = _topic_path(topic)
     if path.exists():
-        path.unlink()
+        with _lock:
+            _update_search_index(_forget_vectors, path, topic)
+            path.unlink()
+            _index_path(path).unlink(missing_ok=True)
+            _update_search_index(notes_index.remove_file, path)
+            if ARCHIVE_DIR.exists():
+                for archived in _archives(path):
+                    archived.unlink()
+                    _update_search_index(notes_index.remove_file, archived)
         return f"🗑️ Cleared notes for '{topic}'."
     return f"❌ No notes found for '{topic}'."
@@ -0,0 +1,163 @@
+import re
+import threading
+from pathlib import Path
+
+from utils import sqlite_store
+
+# Full-text index over every "## " section in notes/ (SQLite FTS5: BM25 ranking and
+# highlighted snippets). append_note/clear_notes keep it current; on first use each
+# process also re-indexes any note file whose size or mtime changed behind its back.
+
+INDEX_FILE = Path("orion_notes_index.db")
+
+# Terms in nearly every section add nothing to the ranking but dominate query time.
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do for from how i in is it me my of on or the this to was what when where "
+    "which who why with about".split()
+)
+
+# The header append_note writes ("## <isoformat> UTC[ | source: ...]"). Sections split
+# only on this, so a "## " heading inside a note body stays part of its section.
+SECTION_HEADER = re.compile(rb"^## \d{4}-\d{2}-\d{2}T[\d:.]+ UTC(?: \| source: [^\n]*)?$", re.MULTILINE)
+
+_init_lock = threading.Lock()
+_synced = set()
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5(
+    topic UNINDEXED, path UNINDEXED, offset UNINDEXED, header, body,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+"""
+
+
+def _conn():
+    return sqlite_store.connect(INDEX_FILE, _SCHEMA)
+
+
+def split_sections(data: bytes):
+    """(offset, header, body) for each timestamped "## " section of a note file."""
+    starts = [m.start() for m in SECTION_HEADER.finditer(data)]
+    bounds = starts + [len(data)]
+    for start, end in zip(starts, bounds[1:]):
+        text = data[start:end].decode("utf-8", errors="replace").strip()
+        header, _, body = text.partition("\n")
+        yield start, header[3:], body.strip()
+
+
+def topic_of(path: Path) -> str:
+    """The topic a note file was written under (its "# " title line)."""
+    with open(path, "rb") as f:
+        first = f.readline().decode("utf-8", errors="replace")
+    return first[2:].strip() if first.startswith("# ") else path.stem
+
+
+def _record_file(conn, path: Path):
+    st = path.stat()
+    conn.execute(
+        "INSERT OR REPLACE INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+        (str(path), st.st_size, st.st_mtime_ns),
+    )
+
+
+def index_file(path: Path):
+    """(Re)index every section of one note file."""
+    conn = _conn()
+    topic = topic_of(path)
+    rows = [(topic, str(path), offset, header, body) for offset, header, body in split_sections(path.read_bytes())]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM sections WHERE path = ?", (str(path),))
+        conn.executemany("INSERT INTO sections (topic, path, offset, header, body) VALUES (?, ?, ?, ?, ?)", rows)
+        _record_file(conn, path)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def add_section(path: Path, topic: str, offset: int, header: str, body: str):
+    """Index one freshly appended section."""
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT INTO sections (topic, path, offset, header, body) VALUES (?, ?, ?, ?, ?)",
+            (topic, str(path), offset, header, body),
+        )
+        _record_file(conn, path)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def move_file(old: Path, new: Path):
+    """Keep a rotated (archived) note file searchable under its new path."""
+    conn = _conn()
+    conn.execute("UPDATE sections SET path = ? WHERE path = ?", (str(new), str(old)))
+    conn.execute("UPDATE files SET path = ? WHERE path = ?", (str(new), str(old)))
+
+
+def remove_file(path: Path):
+    conn = _conn()
+    conn.execute("DELETE FROM sections WHERE path = ?", (str(path),))
+    conn.execute("DELETE FROM files WHERE path = ?", (str(path),))
+
+
+def sync():
+    """Index note files that are new or changed since they were last indexed; drop deleted ones."""
+    from utils.notes import NOTES_DIR, ARCHIVE_DIR
+    conn = _conn()
+    known = {path: (size, mtime) for path, size, mtime in conn.execute("SELECT path, size, mtime_ns FROM files")}
+    present = set()
+    for path in list(NOTES_DIR.glob("*.md")) + list(ARCHIVE_DIR.glob("*.md")):
+        st = path.stat()
+        present.add(str(path))
+        if known.get(str(path)) != (st.st_size, st.st_mtime_ns):
+            index_file(path)
+    for path in set(known) - present:
+        remove_file(Path(path))
+
+
+def ensure_synced():
+    """Run sync() once per process before the index is first used."""
+    key = str(INDEX_FILE)
+    if key in _synced:
+        return
+    with _init_lock:
+        if key not in _synced:
+            sync()
+            _synced.add(key)
+
+
+def _match_query(query: str) -> str:
+    # quote every term so user punctuation can't break FTS5 query syntax; any term may match
+    terms = [t for t in re.findall(r"\w+", query.lower()) if t not in _STOPWORDS]
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def search(query: str, limit: int = 5, topic: str | None = None):
+    """
+    BM25-ranked sections matching query, best first:
+    [{"topic", "path", "header", "snippet", "score"}] with matches wrapped in **.
+    """
+    match = _match_query(query)
+    if not match:
+        return []
+    ensure_synced()
+    sql = (
+        "SELECT topic, path, header, snippet(sections, 4, '**', '**', '…', 16), bm25(sections, 0, 0, 0, 0.5, 1.0)"
+        " FROM sections WHERE sections MATCH ?"
+    )
+    params = [match]
+    if topic:
+        sql += " AND topic = ?"
+        params.append(topic)
+    sql += " ORDER BY bm25(sections, 0, 0, 0, 0.5, 1.0) LIMIT ?"
+    params.append(limit)
+    return [
+        {"topic": t, "path": p, "header": h, "snippet": s, "score": round(-score, 3)}
+        for t, p, h, s, score in _conn().execute(sql, params)
+    ]
@@ -0,0 +1,319 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import async_http
+
+# Shared Ollama client: one keep-alive session (connection pool) for every agent.
+# Settings are read lazily so values loaded from .env after import still apply.
+
+DEFAULT_BASE_URL = "http://127.0.0.1:11434"
+STAT_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+_session = None
+_session_lock = threading.Lock()
+_recent_stats = deque(maxlen=100)
+
+
+def get_base_url() -> str:
+    return os.environ.get("ORION_OLLAMA_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def _connect_timeout() -> float:
+    return float(os.environ.get("ORION_OLLAMA_CONNECT_TIMEOUT", "5"))
+
+
+def _read_timeout(timeout) -> float:
+    if timeout is not None:
+        return float(timeout)
+    return float(os.environ.get("ORION_OLLAMA_TIMEOUT", "60"))
+
+
+def get_keep_alive():
+    """How long Ollama keeps a model loaded after a call (ORION_KEEP_ALIVE: "30m", "-1" = forever, "0" = unload)."""
+    value = os.environ.get("ORION_KEEP_ALIVE", "30m").strip()
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool = int(os.environ.get("ORION_OLLAMA_POOL", "8"))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _extract_stats(payload: dict, started: float) -> dict:
+    stats = {k: payload[k] for k in STAT_FIELDS if k in payload}
+    stats["wall_time"] = time.perf_counter() - started
+    if payload.get("eval_count") and payload.get("eval_duration"):
+        stats["tokens_per_sec"] = payload["eval_count"] / (payload["eval_duration"] / 1e9)
+    return stats
+
+
+def _record(model: str, stats: dict, error: str | None):
+    _recent_stats.append({"model": model, "at": time.time(), "error": error, **stats})
+
+
+def recent_stats(limit: int = 20) -> list:
+    """Per-call stats of the most recent generations (newest last)."""
+    return list(_recent_stats)[-limit:]
+
+
+def _request_body(model: str, prompt: str, stream: bool, extra: dict) -> dict:
+    body = {"model": model, "prompt": prompt, "stream": stream, "keep_alive": get_keep_alive()}
+    body.update({k: v for k, v in extra.items() if v is not None})
+    return body
+
+
+class GenerationStream:
+    """
+    Streaming /api/generate call. Iterating yields response tokens as the NDJSON
+    chunks arrive; once exhausted, text/error/stats hold the same values that
+    generate() would have returned. Stats include time_to_first_token and tokens_per_sec.
+    """
+
+    def __init__(self, model: str, prompt: str, timeout=None, base_url: str | None = None, **extra):
+        self.model = model
+        self.url = f"{(base_url or get_base_url()).rstrip('/')}/api/generate"
+        self.body = _request_body(model, prompt, True, extra)
+        self.timeout = timeout
+        self.text = ""
+        self.error = None
+        self.stats = {}
+
+    def __iter__(self):
+        started = time.perf_counter()
+        first_token_at = None
+        parts = []
+        final = {}
+        try:
+            with get_session().post(
+                self.url,
+                json=self.body,
+                stream=True,
+                timeout=(_connect_timeout(), _read_timeout(self.timeout)),
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        self.error = str(chunk["error"])
+                        break
+                    token = chunk.get("response", "")
+                    if token:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter() - started
+                        parts.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.text = "".join(parts)
+            self.stats = _extract_stats(final, started)
+            if first_token_at is not None:
+                self.stats["time_to_first_token"] = first_token_at
+                if "tokens_per_sec" not in self.stats and len(parts) > 1:
+                    elapsed = self.stats["wall_time"] - first_token_at
+                    if elapsed > 0:
+                        self.stats["tokens_per_sec"] = (len(parts) - 1) / elapsed
+            if not self.error and not self.text:
+                self.error = "empty response from Ollama (check model pull and endpoint)"
+            _record(self.model, self.stats, self.error)
+
+
+def generate_stream(model: str, prompt: str, timeout=None, base_url: str | None = None, **extra) -> GenerationStream:
+    return GenerationStream(model, prompt, timeout=timeout, base_url=base_url, **extra)
+
+
+def generate(model: str, prompt: str, timeout=None, base_url: str | None = None, on_token=None, **extra):
+    """
+    Run an /api/generate call.
+    Returns (text, error, stats); text is "" and error is a message on failure.
+    If on_token is given the call streams and on_token(token) is invoked per chunk.
+    Extra keyword arguments (stop, format, system, options, ...) go into the request body.
+    """
+    if on_token is not None:
+        stream = generate_stream(model, prompt, timeout=timeout, base_url=base_url, **extra)
+        for token in stream:
+            on_token(token)
+        if stream.error:
+            return "", stream.error, stream.stats
+        return stream.text, None, stream.stats
+
+    body = _request_body(model, prompt, False, extra)
+    url = f"{(base_url or get_base_url()).rstrip('/')}/api/generate"
+    started = time.perf_counter()
+    try:
+        resp = get_session().post(url, json=body, timeout=(_connect_timeout(), _read_timeout(timeout)))
+        resp.raise_for_status()
+        payload = resp.json()
+    except Exception as e:
+        stats = {"wall_time": time.perf_counter() - started}
+        _record(model, stats, str(e))
+        return "", str(e), stats
+
+    stats = _extract_stats(payload, started)
+    if "error" in payload:
+        error = str(payload["error"])
+    elif not payload.get("response"):
+        error = "empty response from Ollama (check model pull and endpoint)"
+    else:
+        error = None
+    _record(model, stats, error)
+    if error:
+        return "", error, stats
+    return payload["response"], None, stats
+
+
+async def generate_async(model: str, prompt: str, timeout=None, base_url: str | None = None, on_token=None, **extra):
+    """
+    Async generate(): same arguments and (text, error, stats) result.
+    Uses the shared aiohttp session when available, otherwise runs generate() in a thread.
+    """
+    if not async_http.available():
+        return await asyncio.to_thread(generate, model, prompt, timeout, base_url, on_token, **extra)
+
+    url = f"{(base_url or get_base_url()).rstrip('/')}/api/generate"
+    started = time.perf_counter()
+    first_token_at = None
+    try:
+        if on_token is None:
+            body = _request_body(model, prompt, False, extra)
+            payload = await async_http.post_json(url, body, timeout=_read_timeout(timeout))
+        else:
+            body = _request_body(model, prompt, True, extra)
+            parts = []
+            payload = {}
+            async for chunk in async_http.post_ndjson(url, body, timeout=_read_timeout(timeout)):
+                if "error" in chunk:
+                    payload = chunk
+                    break
+                token = chunk.get("response", "")
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - started
+                    parts.append(token)
+                    on_token(token)
+                if chunk.get("done"):
+                    payload = chunk
+                    break
+            payload = {**payload, "response": "".join(parts)}
+    except Exception as e:
+        stats = {"wall_time": time.perf_counter() - started}
+        _record(model, stats, str(e))
+        return "", str(e), stats
+
+    stats = _extract_stats(payload, started)
+    if first_token_at is not None:
+        stats["time_to_first_token"] = first_token_at
+    if "error" in payload:
+        error = str(payload["error"])
+    elif not payload.get("response"):
+        error = "empty response from Ollama (check model pull and endpoint)"
+    else:
+        error = None
+    _record(model, stats, error)
+    if error:
+        return "", error, stats
+    return payload["response"], None, stats
+
+
+def embed(model: str, texts, timeout=None, base_url: str | None = None):
+    """
+    Embed one string or a list of strings.
+    Returns (vectors, error, stats) with one vector per input text.
+    Uses the batch /api/embed endpoint and falls back to /api/embeddings on older servers.
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+    base = (base_url or get_base_url()).rstrip("/")
+    session = get_session()
+    timeouts = (_connect_timeout(), _read_timeout(timeout))
+    started = time.perf_counter()
+    try:
+        body = {"model": model, "input": list(texts), "keep_alive": get_keep_alive()}
+        resp = session.post(f"{base}/api/embed", json=body, timeout=timeouts)
+        if resp.status_code == 404:
+            vectors = []
+            for text in texts:
+                legacy = session.post(f"{base}/api/embeddings", json={"model": model, "prompt": text}, timeout=timeouts)
+                legacy.raise_for_status()
+                vectors.append(legacy.json().get("embedding", []))
+            payload = {"embeddings": vectors}
+        else:
+            resp.raise_for_status()
+            payload = resp.json()
+    except Exception as e:
+        stats = {"wall_time": time.perf_counter() - started}
+        _record(model, stats, str(e))
+        return [], str(e), stats
+
+    stats = _extract_stats(payload, started)
+    vectors = payload.get("embeddings") or []
+    error = str(payload["error"]) if "error" in payload else None
+    if not error and len(vectors) != len(texts):
+        error = "embedding count mismatch from Ollama"
+    _record(model, stats, error)
+    if error:
+        return [], error, stats
+    return vectors, None, stats
+
+
+def load_model(model: str, prompt: str = "", base_url: str | None = None, **extra):
+    """
+    Load model into memory (and, with a prompt, evaluate it so its KV cache is warm)
+    without producing output. Returns (None, error, stats), the same shape as generate()
+    with no text; stats include load_duration.
+    """
+    extra.setdefault("options", {"num_predict": 1 if prompt else 0})
+    body = _request_body(model, prompt, False, extra)
+    url = f"{(base_url or get_base_url()).rstrip('/')}/api/generate"
+    started = time.perf_counter()
+    try:
+        resp = get_session().post(url, json=body, timeout=(_connect_timeout(), _read_timeout(None)))
+        resp.raise_for_status()
+        payload = resp.json()
+    except Exception as e:
+        return None, str(e), {"wall_time": time.perf_counter() - started}
+    stats = _extract_stats(payload, started)
+    return None, (str(payload["error"]) if "error" in payload else None), stats
+
+
+def unload_model(model: str, base_url: str | None = None):
+    """Ask Ollama to evict model now (keep_alive=0). Returns an error string or None."""
+    _, err, _ = load_model(model, base_url=base_url, keep_alive=0)
+    return err
+
+
+def load_embed_model(model: str, base_url: str | None = None):
+    """Load an embedding model by embedding one word. Returns (None, error, stats) like load_model()."""
+    _, err, stats = embed(model, ["warmup"], base_url=base_url)
+    return None, err, stats
@@ -0,0 +1,172 @@
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from utils import sqlite_store
+
+# On-disk cache of extracted page text for research fetches (SQLite). Each entry keeps
+# the response's ETag/Last-Modified and its own expiry, taken from Cache-Control or
+# Expires, else estimated from Last-Modified (RFC 9111 heuristic), else
+# ORION_PAGE_CACHE_TTL. Fresh entries are served without any request; stale ones are
+# revalidated with a conditional GET, so an unchanged page costs a 304. Least recently
+# used entries are evicted once the stored text exceeds ORION_PAGE_CACHE_MAX_MB.
+
+CACHE_FILE = Path("orion_page_cache.db")
+DEFAULT_TTL = 3600
+DEFAULT_MAX_MB = 50
+HEURISTIC_MAX = 24 * 3600  # cap on freshness guessed from Last-Modified
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched REAL NOT NULL,
+    expires REAL NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+""" + sqlite_store.COUNTERS_SCHEMA
+
+
+def _default_ttl() -> float:
+    return float(os.environ.get("ORION_PAGE_CACHE_TTL", DEFAULT_TTL))
+
+
+def _max_bytes() -> int:
+    return int(float(os.environ.get("ORION_PAGE_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+def enabled() -> bool:
+    return os.environ.get("ORION_PAGE_CACHE", "1") != "0"
+
+
+def _conn():
+    return sqlite_store.connect(CACHE_FILE, _SCHEMA)
+
+
+def count(name: str):
+    """Bump a counter: "fresh" (served from disk), "revalidated" (304) or "fetched"."""
+    if not enabled():
+        return
+    sqlite_store.count(_conn(), name)
+
+
+def _http_time(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers, now: float | None = None):
+    """
+    Seconds a response stays fresh, from its headers; None when it must not be stored
+    (Cache-Control: no-store). no-cache gives 0, i.e. always revalidate.
+    """
+    now = now or time.time()
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+    if match:
+        return max(0, int(match.group(1)) - int(headers.get("Age", "0") or 0))
+    expires = _http_time(headers.get("Expires"))
+    if expires is not None:
+        return max(0, expires - (_http_time(headers.get("Date")) or now))
+    last_modified = _http_time(headers.get("Last-Modified"))
+    if last_modified is not None:
+        return min(HEURISTIC_MAX, max(0, ((_http_time(headers.get("Date")) or now) - last_modified) / 10))
+    return _default_ttl()
+
+
+def lookup(url: str):
+    """The cached entry for url as a dict (with "fresh": bool), or None."""
+    if not enabled():
+        return None
+    conn = _conn()
+    row = conn.execute("SELECT text, etag, last_modified, expires FROM pages WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+    now = time.time()
+    conn.execute("UPDATE pages SET last_used = ? WHERE url = ?", (now, url))
+    text, etag, last_modified, expires = row
+    return {"text": text, "etag": etag, "last_modified": last_modified, "fresh": expires > now}
+
+
+def validators(entry) -> dict:
+    """Conditional request headers for revalidating a cached entry."""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def revalidated(url: str, headers):
+    """A 304 came back: the entry is current again for its new freshness lifetime."""
+    ttl = freshness(headers)
+    now = time.time()
+    _conn().execute(
+        "UPDATE pages SET fetched = ?, expires = ?, etag = COALESCE(?, etag) WHERE url = ?",
+        (now, now + (ttl or 0), headers.get("ETag"), url),
+    )
+    count("revalidated")
+
+
+def store(url: str, text: str, headers):
+    if not enabled():
+        return
+    ttl = freshness(headers)
+    conn = _conn()
+    if ttl is None:
+        conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+        return
+    now = time.time()
+    size = len(text.encode("utf-8"))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (url, text, etag, last_modified, fetched, expires, size, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, text, headers.get("ETag"), headers.get("Last-Modified"), now, now + ttl, size, now),
+        )
+        _evict(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _evict(conn):
+    """Drop least recently used entries until the stored text fits ORION_PAGE_CACHE_MAX_MB."""
+    excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0] - _max_bytes()
+    if excess <= 0:
+        return
+    doomed = []
+    for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_used"):
+        doomed.append((url,))
+        excess -= size
+        if excess <= 0:
+            break
+    conn.executemany("DELETE FROM pages WHERE url = ?", doomed)
+
+
+def stats() -> dict:
+    conn = _conn()
+    counts = sqlite_store.counters(conn)
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+    return {
+        "fresh": counts.get("fresh", 0),
+        "revalidated": counts.get("revalidated", 0),
+        "fetched": counts.get("fetched", 0),
+        "entries": entries,
+        "bytes": size,
+    }
@@ -0,0 +1,214 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# On-disk LRU/TTL cache of validated planner outputs.
+# Commands are normalized (whitespace, sentence punctuation) and number/date/time slots
+# are replaced by placeholders, so "remind me at 17:00" and "remind me at 18:30"
+# share one entry; the cached plan is stored as a template and re-filled on a hit.
+# Case and punctuation inside words are kept: search queries, code and text to
+# translate are copied into the plan as typed, so "c" and "c++" (or "Python" and
+# "python") must not share a plan.
+
+CACHE_FILE = Path("orion_plan_cache.json")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_SIZE = 500
+SAVE_INTERVAL = 60  # seconds between writes that only record hits (last_used)
+
+_SLOT_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[ t]\d{1,2}:\d{2}(?::\d{2})?)?"  # ISO date / datetime
+    r"|\d{1,2}/\d{1,2}(?:/\d{2,4})?"                      # 6/24, 6/24/2025
+    r"|\d{1,2}(?::\d{2})?\s?(?:am|pm)\b"                  # 5pm, 5:30 pm
+    r"|\d{1,2}:\d{2}"                                      # 17:00
+    r"|\d+(?:\.\d+)?",                                     # plain numbers
+    re.IGNORECASE,
+)
+
+_EDGE_PUNCT = ".,!?;:\"'()"
+
+_lock = threading.Lock()
+_entries = None  # OrderedDict[key] -> {"plan", "created", "last_used"}; least recently used first
+_stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "skipped": 0}
+_dirty = False  # hits recorded in memory but not yet written
+_last_save = 0.0
+
+
+def _enabled() -> bool:
+    return os.environ.get("ORION_PLAN_CACHE", "1") != "0"
+
+
+def _ttl() -> float:
+    return float(os.environ.get("ORION_PLAN_CACHE_TTL", DEFAULT_TTL))
+
+
+def _max_size() -> int:
+    return int(os.environ.get("ORION_PLAN_CACHE_SIZE", DEFAULT_SIZE))
+
+
+def normalize_command(command: str):
+    """Return (normalized_text, slots) where slots are the original slot strings in order."""
+    slots = []
+
+    def placeholder(m):
+        slots.append(m.group(0))
+        return f" <{len(slots) - 1}> "
+
+    text = _SLOT_RE.sub(placeholder, command)
+    words = (word.strip(_EDGE_PUNCT) for word in text.split())
+    return " ".join(word for word in words if word), slots
+
+
+def _make_key(normalized: str, model: str, prompt_version: str) -> str:
+    return f"{model}|{prompt_version}|{normalized}"
+
+
+def _map_strings(obj, fn):
+    if isinstance(obj, str):
+        return fn(obj)
+    if isinstance(obj, dict):
+        return {k: _map_strings(v, fn) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_map_strings(v, fn) for v in obj]
+    return obj
+
+
+def _load():
+    global _entries
+    if _entries is not None:
+        return _entries
+    _entries = OrderedDict()
+    if CACHE_FILE.exists():
+        try:
+            data = json.loads(CACHE_FILE.read_text())
+            items = sorted(data.get("entries", {}).items(), key=lambda kv: kv[1].get("last_used", 0))
+            for key, entry in items:
+                _entries[key] = entry
+        except Exception as e:
+            print(f"⚠️ Plan cache unreadable, starting empty: {e}")
+    return _entries
+
+
+def _save(entries):
+    global _dirty, _last_save
+    tmp = CACHE_FILE.with_name(CACHE_FILE.name + ".tmp")
+    tmp.write_text(json.dumps({"entries": entries}))
+    os.replace(tmp, CACHE_FILE)
+    _dirty = False
+    _last_save = time.time()
+
+
+def flush():
+    """Write hits recorded since the last save (runs at exit)."""
+    with _lock:
+        if _dirty and _entries is not None:
+            try:
+                _save(_entries)
+            except Exception as e:
+                print(f"⚠️ Plan cache write failed: {e}")
+
+
+atexit.register(flush)
+
+
+def get(command: str, model: str, prompt_version: str):
+    """Return a cached plan for command, or None on a miss."""
+    if not _enabled():
+        return None
+    normalized, slots = normalize_command(command)
+    key = _make_key(normalized, model, prompt_version)
+    with _lock:
+        entries = _load()
+        entry = entries.get(key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        if time.time() - entry.get("created", 0) > _ttl():
+            del entries[key]
+            _stats["expired"] += 1
+            _stats["misses"] += 1
+            return None
+        entry["last_used"] = time.time()
+        entries.move_to_end(key)
+        _stats["hits"] += 1
+        template = entry["plan"]
+        _record_hit(entries)
+
+    def fill(value):
+        for i, slot in enumerate(slots):
+            value = value.replace(f"<{i}>", slot)
+        return value
+
+    return _map_strings(template, fill)
+
+
+def _record_hit(entries):
+    # LRU order must survive restarts, but a write per hit would cost more than the hit saves
+    global _dirty
+    _dirty = True
+    if time.time() - _last_save >= SAVE_INTERVAL:
+        try:
+            _save(entries)
+        except Exception as e:
+            print(f"⚠️ Plan cache write failed: {e}")
+
+
+def put(command: str, model: str, prompt_version: str, plan: dict):
+    """
+    Store a validated plan. Plans that depend on a slot in a way the template can't
+    reproduce (e.g. the model rewrote "5pm" as "17:00"), or that carry numbers the
+    command didn't contain, are not cached.
+    """
+    if not _enabled():
+        return
+    normalized, slots = normalize_command(command)
+
+    def templatize(value):
+        for i, slot in sorted(enumerate(slots), key=lambda s: -len(s[1])):
+            value = re.sub(rf"(?<!\w){re.escape(slot)}(?!\w)", f"<{i}>", value)
+        return value
+
+    template = _map_strings(plan, templatize)
+    flat = json.dumps(template)
+    infos = [template.get("info", {})] + [step.get("info", {}) for step in template.get("steps", [])]
+    # a slot the plan dropped, or a digit that isn't a slot (a date the model worked out
+    # from "tomorrow", say), would be replayed verbatim on every later hit
+    if any(f"<{i}>" not in flat for i in range(len(slots))) or re.search(r"\d", re.sub(r"<\d+>", "", json.dumps(infos))):
+        _stats["skipped"] += 1
+        return
+
+    key = _make_key(normalized, model, prompt_version)
+    now = time.time()
+    with _lock:
+        entries = _load()
+        # drop entries written for another prompt version so stale plans don't linger
+        for stale in [k for k in entries if k.split("|", 2)[1] != prompt_version]:
+            del entries[stale]
+        entries[key] = {"plan": template, "created": now, "last_used": now}
+        entries.move_to_end(key)
+        while len(entries) > _max_size():
+            entries.popitem(last=False)
+        _stats["stores"] += 1
+        try:
+            _save(entries)
+        except Exception as e:
+            print(f"⚠️ Plan cache write failed: {e}")
+
+
+def clear():
+    global _entries
+    with _lock:
+        _entries = OrderedDict()
+        if CACHE_FILE.exists():
+            CACHE_FILE.unlink()
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        size = len(_entries) if _entries is not None else 0
+        return {**_stats, "size": size, "hit_rate": _stats["hits"] / lookups if lookups else 0.0}
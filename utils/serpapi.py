@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+import requests
+
+from utils import async_http, sqlite_store
+
+# Single access point for SerpAPI. Responses are cached on disk (SQLite) keyed on
+# engine + normalized query, so repeat topics from search, knowledge, research and
+# the updater cost no paid queries until the entry is older than ORION_SERPAPI_TTL.
+# Hit/miss counters are kept in the same database so the hit rate survives restarts.
+
+SEARCH_URL = "https://serpapi.com/search.json"
+CACHE_FILE = Path("orion_serpapi_cache.db")
+DEFAULT_TTL = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    engine TEXT NOT NULL, query TEXT NOT NULL, fetched REAL NOT NULL, body TEXT NOT NULL,
+    PRIMARY KEY (engine, query)
+);
+CREATE INDEX IF NOT EXISTS responses_fetched ON responses (fetched);
+""" + sqlite_store.COUNTERS_SCHEMA
+
+
+def get_ttl() -> float:
+    """Seconds a cached response stays valid; 0 disables the cache."""
+    return float(os.environ.get("ORION_SERPAPI_TTL", DEFAULT_TTL))
+
+
+def _conn():
+    return sqlite_store.connect(CACHE_FILE, _SCHEMA)
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _count(name: str):
+    sqlite_store.count(_conn(), name)
+
+
+def _cached(engine: str, query: str):
+    ttl = get_ttl()
+    if ttl <= 0:
+        return None
+    row = _conn().execute(
+        "SELECT body FROM responses WHERE engine = ? AND query = ? AND fetched >= ?",
+        (engine, _normalize(query), time.time() - ttl),
+    ).fetchone()
+    data = json.loads(row[0]) if row else None
+    if data is not None and "error" in data:
+        data = None  # an error payload cached before errors were rejected
+    _count("hits" if data is not None else "misses")
+    return data
+
+
+def _store(engine: str, query: str, data: dict):
+    ttl = get_ttl()
+    if ttl <= 0:
+        return
+    conn = _conn()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (engine, query, fetched, body) VALUES (?, ?, ?, ?)",
+            (engine, _normalize(query), now, json.dumps(data)),
+        )
+        conn.execute("DELETE FROM responses WHERE fetched < ?", (now - ttl,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _checked(data: dict) -> dict:
+    # SerpAPI reports bad keys, exhausted quota and empty searches as a 200 with
+    # {"error": ...}: raise it like a request error, and never cache it
+    if "error" in data:
+        raise RuntimeError(data["error"])
+    return data
+
+
+def _params(query: str, api_key: str, engine: str) -> dict:
+    return {"engine": engine, "q": query, "api_key": api_key}
+
+
+def search(query: str, api_key: str, engine: str = "google", timeout: float = 20) -> dict:
+    """SerpAPI response for query, from the cache when fresh. Raises on request and API errors."""
+    data = _cached(engine, query)
+    if data is not None:
+        return data
+    resp = requests.get(SEARCH_URL, params=_params(query, api_key, engine), timeout=timeout)
+    resp.raise_for_status()
+    data = _checked(resp.json())
+    _store(engine, query, data)
+    return data
+
+
+async def search_async(query: str, api_key: str, engine: str = "google", timeout: float = 20) -> dict:
+    # the SQLite cache blocks (and may wait on a writer's lock), so keep it off the event loop
+    data = await asyncio.to_thread(_cached, engine, query)
+    if data is not None:
+        return data
+    data = _checked(await async_http.get_json(SEARCH_URL, params=_params(query, api_key, engine), timeout=timeout))
+    await asyncio.to_thread(_store, engine, query, data)
+    return data
+
+
+def snippets(data: dict, limit: int = 5):
+    return [r["snippet"] for r in data.get("organic_results", [])[:limit] if r.get("snippet")]
+
+
+def links(data: dict, limit: int = 3):
+    return [r["link"] for r in data.get("organic_results", []) if r.get("link")][:limit]
+
+
+def stats() -> dict:
+    """Cache hits/misses since the database was created, hit rate and stored entries."""
+    conn = _conn()
+    counts = sqlite_store.counters(conn)
+    hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "entries": conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+    }
@@ -0,0 +1,55 @@
+import sqlite3
+import threading
+
+# Connection handling shared by the SQLite-backed stores (task queue, notes and file
+# indexes, page and SerpAPI caches). Each thread gets one connection per database file
+# (sqlite3 connections can't be shared across threads), in autocommit mode so callers
+# group writes with explicit BEGIN IMMEDIATE/COMMIT, and in WAL mode so readers never
+# block the writer and several processes can share a file.
+
+# Named counters (cache hits, fetches, ...) kept next to the data they describe, so
+# they survive restarts. Append to a store's schema to use count()/counters().
+COUNTERS_SCHEMA = "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, n INTEGER NOT NULL);"
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def connect(path, schema: str, init=None, row_factory=None):
+    """
+    This thread's connection to the database at `path`, creating `schema` on first use.
+    init(conn), for one-off migrations, runs once per process and file.
+    """
+    key = str(path)
+    conns = _local.__dict__.setdefault("conns", {})
+    conn = conns.get(key)
+    if conn is not None:
+        return conn
+    conn = sqlite3.connect(key, timeout=30, isolation_level=None)
+    conn.row_factory = row_factory
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    if init is not None:
+        with _init_lock:
+            if key not in _initialized:
+                init(conn)
+                _initialized.add(key)
+    conns[key] = conn
+    return conn
+
+
+def close(path):
+    """Drop this thread's connection to `path` (the next connect() opens a fresh one)."""
+    conn = _local.__dict__.get("conns", {}).pop(str(path), None)
+    if conn is not None:
+        conn.close()
+
+
+def count(conn, name: str):
+    conn.execute("INSERT INTO counters (name, n) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET n = n + 1", (name,))
+
+
+def counters(conn) -> dict:
+    return dict(conn.execute("SELECT name, n FROM counters"))
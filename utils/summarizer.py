@@ -0,0 +1,156 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import ollama_client
+
+# Map-reduce summarization for inputs larger than one prompt should be. Input parts
+# are packed into chunks of at most ORION_SUMMARY_CHUNK_TOKENS (estimated at four
+# characters per token), each chunk is condensed concurrently (map), and the partial
+# notes are merged in rounds until they fit one final prompt (reduce). Inputs that
+# already fit go straight to a single call, exactly as before. Only the final call
+# streams tokens.
+
+CHARS_PER_TOKEN = 4
+DEFAULT_CHUNK_TOKENS = 2000
+DEFAULT_WORKERS = 4
+TIMEOUT = 90
+
+MAP_PROMPT = (
+    "This is part {index} of {count} of a longer text. Condense it into short notes that keep every fact, "
+    "name, number, decision and action item, and any [bracketed] source tags. The notes will later be "
+    "combined for this task: {goal}\n\n{text}"
+)
+MERGE_PROMPT = (
+    "Merge these partial notes into one set of short notes without losing facts, names, numbers, "
+    "decisions, action items or [bracketed] source tags. They will be used for this task: {goal}\n\n{text}"
+)
+
+
+def get_chunk_tokens() -> int:
+    return int(os.environ.get("ORION_SUMMARY_CHUNK_TOKENS", DEFAULT_CHUNK_TOKENS))
+
+
+def _workers() -> int:
+    return int(os.environ.get("ORION_SUMMARY_WORKERS", DEFAULT_WORKERS))
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _pieces(text: str, max_chars: int):
+    """text split on line boundaries (words, then characters, for very long lines) into pieces of at most max_chars."""
+    pieces, current = [], ""
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current.strip():
+        pieces.append(current)
+    return [p.strip() for p in pieces if p.strip()]
+
+
+def split_chunks(parts, max_tokens: int | None = None):
+    """
+    Pack parts (strings, or (label, text) pairs) into chunks within the token budget.
+    Small parts share a chunk; a large part is split, and every piece of a labeled
+    part starts with its "[label]" tag so sources stay attributable.
+    """
+    max_chars = (max_tokens or get_chunk_tokens()) * CHARS_PER_TOKEN
+    chunks, current = [], ""
+    for part in parts:
+        label, text = part if isinstance(part, tuple) else (None, part)
+        tag = f"[{label}] " if label else ""
+        for piece in _pieces(text, max(1, max_chars - len(tag))):
+            piece = tag + piece
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _merge_groups(partials, budget):
+    groups = split_chunks(partials, budget)
+    if len(groups) >= len(partials):
+        # every partial is near the budget on its own: merge pairwise so each round halves them
+        groups = ["\n\n".join(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+    return groups
+
+
+def _collect(results):
+    """Successful outputs in order; the first error only if every call failed."""
+    texts = [text.strip() for text, err in results if not err and text.strip()]
+    errors = [err for _, err in results if err]
+    if errors and texts:
+        print(f"⚠️ {len(errors)} of {len(results)} summary chunks failed: {errors[0]}")
+    return texts, (errors[0] if errors and not texts else None)
+
+
+def summarize(parts, instruction: str, model: str, base_url: str | None = None, on_token=None, max_tokens: int | None = None):
+    """
+    Summarize parts (a string, or a list of strings / (label, text) pairs) for instruction.
+    Returns (summary, error) like the single ollama_client.generate call it replaces.
+    """
+    budget = max_tokens or get_chunk_tokens()
+    chunks = split_chunks([parts] if isinstance(parts, str) else parts, budget)
+    if not chunks:
+        return "", None
+
+    def call(prompt):
+        text, err, _ = ollama_client.generate(model, prompt, timeout=TIMEOUT, base_url=base_url)
+        return text, err
+
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(_workers(), len(chunks)), thread_name_prefix="orion-summary") as pool:
+            prompts = [MAP_PROMPT.format(index=i + 1, count=len(chunks), goal=instruction, text=c) for i, c in enumerate(chunks)]
+            partials, err = _collect(list(pool.map(call, prompts)))
+            while not err and len(partials) > 1 and estimate_tokens("\n\n".join(partials)) > budget:
+                prompts = [MERGE_PROMPT.format(goal=instruction, text=g) for g in _merge_groups(partials, budget)]
+                partials, err = _collect(list(pool.map(call, prompts)))
+        if err:
+            return "", err
+        chunks = partials
+    text, err, _ = ollama_client.generate(
+        model, f"{instruction}\n\n" + "\n\n".join(chunks), timeout=TIMEOUT, base_url=base_url, on_token=on_token
+    )
+    return (text.strip(), err) if not err else ("", err)
+
+
+async def summarize_async(parts, instruction: str, model: str, base_url: str | None = None, on_token=None, max_tokens: int | None = None):
+    budget = max_tokens or get_chunk_tokens()
+    chunks = split_chunks([parts] if isinstance(parts, str) else parts, budget)
+    if not chunks:
+        return "", None
+    limit = asyncio.Semaphore(_workers())
+
+    async def call(prompt):
+        async with limit:
+            text, err, _ = await ollama_client.generate_async(model, prompt, timeout=TIMEOUT, base_url=base_url)
+        return text, err
+
+    if len(chunks) > 1:
+        prompts = [MAP_PROMPT.format(index=i + 1, count=len(chunks), goal=instruction, text=c) for i, c in enumerate(chunks)]
+        partials, err = _collect(await asyncio.gather(*(call(p) for p in prompts)))
+        while not err and len(partials) > 1 and estimate_tokens("\n\n".join(partials)) > budget:
+            prompts = [MERGE_PROMPT.format(goal=instruction, text=g) for g in _merge_groups(partials, budget)]
+            partials, err = _collect(await asyncio.gather(*(call(p) for p in prompts)))
+        if err:
+            return "", err
+        chunks = partials
+    text, err, _ = await ollama_client.generate_async(
+        model, f"{instruction}\n\n" + "\n\n".join(chunks), timeout=TIMEOUT, base_url=base_url, on_token=on_token
+    )
+    return (text.strip(), err) if not err else ("", err)
@@ -1,56 +1,306 @@
 import json
+import os
+import sqlite3
 import threading
+import time
+import uuid
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-TASKS_FILE = Path("tasks.json")
-_lock = threading.Lock()
+from utils import sqlite_store
 
-def _load():
+# Durable task queue in SQLite (WAL mode, so readers never block the writer and
+# several processes can share it). Workers claim a task with a lease; a task whose
+# lease expires (crashed worker) becomes claimable again, and failed tasks are
+# retried until they run out of attempts. Each claim gets its own lease token, and
+# only the holder of the current token can renew, finish or hand back the task.
+
+DB_FILE = Path("orion_tasks.db")
+TASKS_FILE = Path("tasks.json")  # legacy store, imported once then renamed
+DEFAULT_LEASE = 300
+DEFAULT_MAX_ATTEMPTS = 3
+PAGE_SIZE = 20
+
+# Set whenever tasks are enqueued so idle background workers wake up immediately.
+task_added = threading.Event()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_until REAL,
+    lease_owner TEXT,
+    result TEXT NOT NULL DEFAULT '',
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, priority DESC, id);
+CREATE INDEX IF NOT EXISTS tasks_lease ON tasks (status, lease_until);
+"""
+
+
+def _db_path() -> Path:
+    return Path(os.environ.get("ORION_TASK_DB", DB_FILE))
+
+
+def get_lease_seconds() -> float:
+    return float(os.environ.get("ORION_TASK_LEASE", DEFAULT_LEASE))
+
+
+def _max_attempts() -> int:
+    return int(os.environ.get("ORION_TASK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _conn():
+    return sqlite_store.connect(_db_path(), _SCHEMA, init=_migrate, row_factory=sqlite3.Row)
+
+
+def _migrate(conn):
+    if "lease_owner" not in {r["name"] for r in conn.execute("PRAGMA table_info(tasks)")}:
+        conn.execute("ALTER TABLE tasks ADD COLUMN lease_owner TEXT")
+    _migrate_json(conn)
+
+
+def _migrate_json(conn):
     if not TASKS_FILE.exists():
-        return []
-    return json.loads(TASKS_FILE.read_text())
-
-def _save(tasks):
-    TASKS_FILE.write_text(json.dumps(tasks, indent=2))
-
-def add_task(task_type: str, payload: dict):
-    with _lock:
-        tasks = _load()
-        task = {
-            "id": f"task-{len(tasks)+1}",
-            "type": task_type,
-            "payload": payload,
-            "status": "pending",
-            "created": datetime.utcnow().isoformat(),
-        }
-        tasks.append(task)
-        _save(tasks)
+        return
+    # under the write lock, so a second process starting at the same time finds the file gone
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        legacy = json.loads(TASKS_FILE.read_text())
+    except FileNotFoundError:
+        conn.execute("COMMIT")
+        return
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        print(f"⚠️ tasks.json unreadable, not migrated: {e}")
+        return
+    now = _now()
+    for t in legacy:
+        status = t.get("status", "pending")
+        conn.execute(
+            "INSERT INTO tasks (type, payload, status, max_attempts, result, created, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                t.get("type", ""),
+                json.dumps(t.get("payload", {})),
+                "pending" if status == "running" else status,  # a legacy "running" task never finished
+                _max_attempts(),
+                t.get("result", ""),
+                t.get("created", now),
+                now,
+            ),
+        )
+    migrated = TASKS_FILE.with_name("tasks.json.migrated")
+    TASKS_FILE.rename(migrated)
+    try:
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        migrated.rename(TASKS_FILE)
+        raise
+    print(f"📦 Migrated {len(legacy)} tasks from tasks.json to {_db_path()}")
+
+
+def _task_id(row_id: int) -> str:
+    return f"task-{row_id}"
+
+
+def _row_id(task_id) -> int:
+    return int(str(task_id).rsplit("-", 1)[-1])
+
+
+def _to_dict(row) -> dict:
+    task = {
+        "id": _task_id(row["id"]),
+        "type": row["type"],
+        "payload": json.loads(row["payload"]),
+        "status": row["status"],
+        "priority": row["priority"],
+        "attempts": row["attempts"],
+        "created": row["created"],
+    }
+    if row["result"]:
+        task["result"] = row["result"]
     return task
 
-def list_tasks():
-    return _load()
+
+def add_task(task_type: str, payload: dict, priority: int = 0, max_attempts: int | None = None):
+    return add_tasks([(task_type, payload)], priority=priority, max_attempts=max_attempts)[0]
+
+
+def add_tasks(items, priority: int = 0, max_attempts: int | None = None):
+    """Enqueue several (task_type, payload) pairs in one transaction."""
+    conn = _conn()
+    now = _now()
+    attempts = max_attempts or _max_attempts()
+    tasks = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for task_type, payload in items:
+            cur = conn.execute(
+                "INSERT INTO tasks (type, payload, priority, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (task_type, json.dumps(payload), priority, attempts, now, now),
+            )
+            tasks.append({
+                "id": _task_id(cur.lastrowid),
+                "type": task_type,
+                "payload": payload,
+                "status": "pending",
+                "priority": priority,
+                "attempts": 0,
+                "created": now,
+            })
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    task_added.set()
+    return tasks
+
+
+def claim_task(lease_seconds: float | None = None):
+    """
+    Atomically take the highest-priority pending task (or one whose lease expired)
+    and mark it running until the lease ends. Returns the task, with its lease token
+    under "lease", or None.
+    """
+    conn = _conn()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # a lease that expired on its last attempt means the task keeps killing its worker
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', lease_until = NULL, lease_owner = NULL, result = ?, updated = ?"
+            " WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+            ("lease expired on the last attempt", _now(), now),
+        )
+        row = conn.execute(
+            "SELECT * FROM tasks WHERE status = 'pending'"
+            " OR (status = 'running' AND lease_until < ? AND attempts < max_attempts)"
+            " ORDER BY priority DESC, id LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        lease = lease_seconds or get_lease_seconds()
+        owner = uuid.uuid4().hex
+        conn.execute(
+            "UPDATE tasks SET status = 'running', attempts = attempts + 1, lease_until = ?, lease_owner = ?, updated = ?"
+            " WHERE id = ?",
+            (now + lease, owner, _now(), row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    task = _to_dict(row)
+    task["status"] = "running"
+    task["attempts"] += 1
+    task["lease"] = owner
+    return task
+
+
+# The calls below take the lease token from claim_task and return False when the
+# lease was lost (it expired and another worker reclaimed the task); the caller's
+# work is then stale and the row is left alone.
+
+
+def extend_lease(task_id: str, lease: str, lease_seconds: float | None = None) -> bool:
+    """Keep a long-running task from being reclaimed by another worker."""
+    cur = _conn().execute(
+        "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+        (time.time() + (lease_seconds or get_lease_seconds()), _row_id(task_id), lease),
+    )
+    return cur.rowcount == 1
+
+
+def complete_task(task_id: str, lease: str, result: str = "") -> bool:
+    cur = _conn().execute(
+        "UPDATE tasks SET status = 'done', result = ?, lease_until = NULL, lease_owner = NULL, updated = ?"
+        " WHERE id = ? AND status = 'running' AND lease_owner = ?",
+        (result, _now(), _row_id(task_id), lease),
+    )
+    return cur.rowcount == 1
+
+
+def fail_task(task_id: str, lease: str, error: str) -> bool:
+    """Return the task to the queue if it has attempts left, otherwise mark it failed."""
+    cur = _conn().execute(
+        "UPDATE tasks SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,"
+        " lease_until = NULL, lease_owner = NULL, result = ?, updated = ?"
+        " WHERE id = ? AND status = 'running' AND lease_owner = ?",
+        (error, _now(), _row_id(task_id), lease),
+    )
+    return cur.rowcount == 1
+
+
+def release_task(task_id: str, lease: str) -> bool:
+    """Hand a claimed task back untouched (its worker is shutting down), without using up an attempt."""
+    cur = _conn().execute(
+        "UPDATE tasks SET status = 'pending', attempts = MAX(attempts - 1, 0), lease_until = NULL, lease_owner = NULL,"
+        " updated = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+        (_now(), _row_id(task_id), lease),
+    )
+    return cur.rowcount == 1
+
 
 def update_task_status(task_id: str, status: str, result: str = ""):
-    with _lock:
-        tasks = _load()
-        for t in tasks:
-            if t["id"] == task_id:
-                t["status"] = status
-                if result:
-                    t["result"] = result
-                break
-        _save(tasks)
+    conn = _conn()
+    if result:
+        conn.execute(
+            "UPDATE tasks SET status = ?, result = ?, lease_until = NULL, lease_owner = NULL, updated = ? WHERE id = ?",
+            (status, result, _now(), _row_id(task_id)),
+        )
+    else:
+        conn.execute(
+            "UPDATE tasks SET status = ?, lease_until = NULL, lease_owner = NULL, updated = ? WHERE id = ?",
+            (status, _now(), _row_id(task_id)),
+        )
+
+
+def get_task(task_id: str):
+    row = _conn().execute("SELECT * FROM tasks WHERE id = ?", (_row_id(task_id),)).fetchone()
+    return _to_dict(row) if row else None
+
+
+def list_tasks(status: str | None = None, limit: int = PAGE_SIZE, offset: int = 0):
+    """One page of tasks, newest first, optionally filtered by status."""
+    if status:
+        rows = _conn().execute(
+            "SELECT * FROM tasks WHERE status = ? ORDER BY id DESC LIMIT ? OFFSET ?", (status, limit, offset)
+        )
+    else:
+        rows = _conn().execute("SELECT * FROM tasks ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset))
+    return [_to_dict(r) for r in rows]
+
+
+def count_tasks() -> dict:
+    """Number of tasks per status."""
+    rows = _conn().execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+    return {status: n for status, n in rows}
 
 
 def start_worker(handler):
-    # Minimal worker stub; runs once on startup to finish pending tasks.
-    tasks = _load()
-    for t in tasks:
-        if t.get("status") == "pending":
-            update_task_status(t["id"], "running")
-            try:
-                result = handler(t)
-                update_task_status(t["id"], "done", result or "")
-            except Exception as e:
-                update_task_status(t["id"], "failed", str(e))
+    # Drains the queue once; claims are atomic, so several processes can run this at once.
+    while True:
+        task = claim_task()
+        if task is None:
+            return
+        try:
+            result = handler(task)
+            finished = complete_task(task["id"], task["lease"], result or "")
+        except Exception as e:
+            finished = fail_task(task["id"], task["lease"], str(e))
+        if not finished:
+            print(f"⚠️ Lost the lease on {task['id']}; another worker has it now")
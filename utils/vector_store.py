@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+
+# NumPy is optional; without it nothing is indexed and prompts get no retrieved context.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils import ollama_client, notes_index
+
+# Embedding store for retrieval-augmented prompts. Vectors are L2-normalized float32
+# rows appended to a raw file that is read through np.memmap; row i belongs to line i
+# of the JSONL id table. Re-adding a key (e.g. an updated knowledge topic) appends a
+# new row and masks the old one, so writes never rewrite the matrix. Removing keys
+# (cleared notes, knowledge chunks a shorter summary no longer has) appends a zero
+# "deleted" row per key, which masks it the same way.
+
+VECTORS_FILE = Path("orion_vectors.f32")
+IDS_FILE = Path("orion_vectors.ids.jsonl")
+META_FILE = Path("orion_vectors.meta.json")
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+CHUNK_CHARS = 800
+DEFAULT_EMBED_BATCH = 32
+
+_lock = threading.RLock()
+_EMPTY = {"rows": 0, "matrix": None, "ids": [], "ids_pos": 0, "live": None, "keys": {}}
+_state = dict(_EMPTY, rows=-1)
+_pending = queue.Queue()
+_worker = None
+_backfill_started = False
+
+
+def enabled() -> bool:
+    return np is not None and os.environ.get("ORION_RAG", "1") != "0"
+
+
+def get_embed_model() -> str:
+    return os.environ.get("ORION_MODEL_EMBED", DEFAULT_EMBED_MODEL)
+
+
+def _top_k() -> int:
+    return int(os.environ.get("ORION_RAG_TOP_K", "3"))
+
+
+def _min_score() -> float:
+    return float(os.environ.get("ORION_RAG_MIN_SCORE", "0.55"))
+
+
+def _max_chars() -> int:
+    return int(os.environ.get("ORION_RAG_MAX_CHARS", "1500"))
+
+
+def _embed_batch() -> int:
+    return max(1, int(os.environ.get("ORION_RAG_EMBED_BATCH", DEFAULT_EMBED_BATCH)))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _chunks(text: str):
+    """Split text on paragraph boundaries into pieces of at most CHUNK_CHARS."""
+    pieces, current = [], ""
+    for para in text.split("\n"):
+        while len(para) > CHUNK_CHARS:
+            pieces.append(para[:CHUNK_CHARS])
+            para = para[CHUNK_CHARS:]
+        if current and len(current) + len(para) + 1 > CHUNK_CHARS:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{para}" if current else para
+    if current.strip():
+        pieces.append(current)
+    return [p.strip() for p in pieces if p.strip()]
+
+
+def _meta():
+    if META_FILE.exists():
+        return json.loads(META_FILE.read_text())
+    return None
+
+
+def _reset(model: str, dim: int):
+    for path in (VECTORS_FILE, IDS_FILE):
+        path.unlink(missing_ok=True)
+    META_FILE.write_text(json.dumps({"model": model, "dim": dim}))
+    _state.update(_EMPTY, rows=-1, ids=[], keys={})
+
+
+def _refresh():
+    """Re-map the matrix and id table if another writer (or this one) appended rows."""
+    meta = _meta()
+    if meta is None or not VECTORS_FILE.exists():
+        _state.update(_EMPTY, ids=[], keys={})
+        return
+    dim = meta["dim"]
+    rows = VECTORS_FILE.stat().st_size // (4 * dim)
+    if rows == _state["rows"]:
+        return
+    # only parse id lines appended since the last refresh
+    ids, keys = _state["ids"], _state["keys"]
+    ids_pos = _state["ids_pos"]
+    with open(IDS_FILE, "rb") as f:
+        f.seek(ids_pos)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partially written line; pick it up next time
+            entry = json.loads(line)
+            keys[entry["key"]] = len(ids)
+            ids.append(entry)
+            ids_pos += len(line)
+    rows = min(rows, len(ids))  # a crash between the two appends leaves a ragged tail
+    matrix = np.memmap(VECTORS_FILE, dtype=np.float32, mode="r", shape=(rows, dim)) if rows else None
+    live = np.zeros(rows, dtype=bool)
+    live[[row for row in keys.values() if row < rows and not ids[row].get("deleted")]] = True
+    _state.update(rows=rows, matrix=matrix, ids=ids, ids_pos=ids_pos, live=live, keys=keys)
+
+
+def _drop_ragged_tail(dim: int):
+    """
+    Cut what a crash between the two appends left behind (vector rows without an id
+    line, a partial id line) so the rows appended next line up with their ids.
+    Call with _lock held, before appending.
+    """
+    _refresh()
+    vectors_size = len(_state["ids"]) * 4 * dim
+    vectors_over = VECTORS_FILE.exists() and VECTORS_FILE.stat().st_size > vectors_size
+    ids_over = IDS_FILE.exists() and IDS_FILE.stat().st_size > _state["ids_pos"]
+    if not (vectors_over or ids_over):
+        return
+    _state.update(matrix=None, rows=-1)  # unmap first: some platforms can't resize a mapped file
+    if vectors_over:
+        os.truncate(VECTORS_FILE, vectors_size)
+    if ids_over:
+        os.truncate(IDS_FILE, _state["ids_pos"])
+    _refresh()
+
+
+def _add_many(items, model: str):
+    """
+    items: (key, source, text) triples; skips entries whose text is already stored.
+    Embeds ORION_RAG_EMBED_BATCH texts per call and stores each batch as it arrives,
+    so a large backfill neither times out as one request nor loses finished batches.
+    """
+    with _lock:
+        _refresh()
+        todo = []
+        for key, source, text in items:
+            digest = _digest(text)
+            row = _state["keys"].get(key)
+            if row is not None and _state["ids"][row].get("hash") == digest:
+                continue
+            todo.append({"key": key, "source": source, "text": text, "hash": digest})
+    size = _embed_batch()
+    errors = []
+    for start in range(0, len(todo), size):
+        err = _embed_and_store(todo[start:start + size], model)
+        if err:
+            errors.append(err)
+    if errors:
+        return f"{len(errors)} of {-(-len(todo) // size)} embedding batches failed: {errors[0]}"
+    return None
+
+
+def _embed_and_store(todo, model: str):
+    vectors, err, _ = ollama_client.embed(model, [t["text"] for t in todo], timeout=60)
+    if err:
+        return err
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    with _lock:
+        meta = _meta()
+        if meta is None or meta["model"] != model or meta["dim"] != matrix.shape[1]:
+            _reset(model, matrix.shape[1])
+        _drop_ragged_tail(matrix.shape[1])
+        with open(VECTORS_FILE, "ab") as f:
+            f.write(matrix.tobytes())
+        with open(IDS_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(t, ensure_ascii=False) + "\n" for t in todo))
+    return None
+
+
+def _mask_prefix(key_prefix: str, keep=()):
+    """Mask every live key starting with key_prefix, except those in keep."""
+    with _lock:
+        meta = _meta()
+        if meta is None:
+            return
+        _drop_ragged_tail(meta["dim"])
+        live = _state["live"]
+        doomed = [
+            key for key, row in _state["keys"].items()
+            if key.startswith(key_prefix) and key not in keep and row < _state["rows"] and live[row]
+        ]
+        if not doomed:
+            return
+        with open(VECTORS_FILE, "ab") as f:
+            f.write(np.zeros((len(doomed), meta["dim"]), dtype=np.float32).tobytes())
+        with open(IDS_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"key": key, "deleted": True}, ensure_ascii=False) + "\n" for key in doomed))
+
+
+def _flush(items):
+    err = _add_many(items, get_embed_model()) if items else None
+    if err:
+        print(f"⚠️ Vector store update failed: {err}")
+
+
+def _run_worker():
+    while True:
+        jobs = [_pending.get()]
+        while not _pending.empty():
+            jobs.append(_pending.get_nowait())
+        # jobs are applied in order: adds queued before a removal land before it masks them
+        items = []
+        for key_prefix, batch in jobs:
+            if key_prefix is not None:
+                _flush(items)
+                items = []
+                try:
+                    _mask_prefix(key_prefix, keep={key for key, _, _ in batch})
+                except Exception as e:
+                    print(f"⚠️ Vector store removal failed: {e}")
+            items += batch
+        _flush(items)
+
+
+def add_async(items, replace: str | None = None):
+    """
+    Queue (key, source, text) triples for embedding on a background thread. With
+    replace, stored keys starting with that prefix that aren't among items are masked.
+    """
+    global _worker
+    if not enabled() or not (items or replace):
+        return
+    with _lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run_worker, name="orion-vectors", daemon=True)
+            _worker.start()
+    _pending.put((replace, list(items)))
+
+
+def remove_prefix(key_prefix: str):
+    """Mask every stored chunk whose key starts with key_prefix, after any adds already queued."""
+    add_async([], replace=key_prefix)
+
+
+def add_note(topic: str, header: str, body: str):
+    items = [(f"note:{topic}:{header}#{i}", f"notes/{topic}", chunk) for i, chunk in enumerate(_chunks(body))]
+    add_async(items, replace=f"note:{topic}:{header}#")
+
+
+def add_knowledge(topic: str, summary: str):
+    items = [(f"knowledge:{topic}#{i}", f"knowledge/{topic}", chunk) for i, chunk in enumerate(_chunks(summary))]
+    add_async(items, replace=f"knowledge:{topic}#")
+
+
+def backfill():
+    """Index existing notes and knowledge that the store doesn't have yet (runs in the background)."""
+    from utils.notes import NOTES_DIR
+    from utils.memory import load_memory
+    items = []
+    for path in NOTES_DIR.glob("*.md"):
+        topic = notes_index.topic_of(path)
+        for _, header, body in notes_index.split_sections(path.read_bytes()):
+            items += [(f"note:{topic}:{header}#{i}", f"notes/{topic}", c) for i, c in enumerate(_chunks(body))]
+    for topic, summary in load_memory().get("knowledge", {}).items():
+        items += [(f"knowledge:{topic}#{i}", f"knowledge/{topic}", c) for i, c in enumerate(_chunks(summary))]
+    add_async(items)
+
+
+def search(query: str, k: int | None = None, model: str | None = None):
+    """Top-k live chunks by cosine similarity: [{"key", "source", "text", "score"}]."""
+    if not enabled():
+        return []
+    with _lock:
+        _refresh()
+        if not _state["rows"]:
+            return []  # nothing stored yet: don't pay for a query embedding
+    vectors, err, _ = ollama_client.embed(model or get_embed_model(), query, timeout=30)
+    if err:
+        print(f"⚠️ Vector search unavailable: {err}")
+        return []
+    q = np.asarray(vectors[0], dtype=np.float32)
+    norm = np.linalg.norm(q)
+    with _lock:
+        _refresh()
+        matrix, ids, live = _state["matrix"], _state["ids"], _state["live"]
+    if matrix is None or not norm or matrix.shape[1] != q.shape[0]:
+        return []
+    scores = np.where(live, matrix @ (q / norm), -np.inf)
+    k = min(k or _top_k(), len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [
+        {"key": ids[i]["key"], "source": ids[i]["source"], "text": ids[i]["text"], "score": float(scores[i])}
+        for i in top
+        if np.isfinite(scores[i])
+    ]
+
+
+def context_for(query: str) -> str:
+    """
+    Relevant stored notes/knowledge for query, formatted for a prompt and capped at
+    ORION_RAG_MAX_CHARS; empty when nothing scores above ORION_RAG_MIN_SCORE.
+    """
+    global _backfill_started
+    if not enabled():
+        return ""
+    if not _backfill_started:
+        _backfill_started = True
+        threading.Thread(target=backfill, name="orion-vectors-backfill", daemon=True).start()
+    hits = [h for h in search(query) if h["score"] >= _min_score()]
+    budget = _max_chars()
+    parts = []
+    for hit in hits:
+        piece = f"[{hit['source']}] {hit['text']}"[:budget]
+        if not piece:
+            break
+        parts.append(piece)
+        budget -= len(piece)
+    return "\n".join(parts)
@@ -0,0 +1,143 @@
+import atexit
+import os
+import threading
+import time
+
+from utils import tasks
+
+# Background pool that drains the task queue continuously, off the request path.
+# Workers sleep until a task is enqueued (or the poll interval passes), renew the
+# lease of the task they're running, and expose their state through progress().
+# Only long-lived processes (the daemon) should start it: the threads are daemon
+# threads, so tasks still running at exit are handed back to the queue.
+
+DEFAULT_SIZE = 2
+DEFAULT_POLL = 5.0
+
+_lock = threading.Lock()
+_threads = []
+_stop = threading.Event()
+_state = {}  # worker name -> {"task", "lease", "type", "topic", "started"} or None when idle
+_totals = {"done": 0, "failed": 0}
+_totals_lock = threading.Lock()
+
+
+def get_pool_size() -> int:
+    return int(os.environ.get("ORION_WORKERS", DEFAULT_SIZE))
+
+
+def _poll_interval() -> float:
+    return float(os.environ.get("ORION_WORKER_POLL", DEFAULT_POLL))
+
+
+def _heartbeat(task_id: str, lease: str, done: threading.Event):
+    """Renew the lease while the handler runs so long tasks aren't reclaimed."""
+    interval = tasks.get_lease_seconds() / 3
+    while not done.wait(interval):
+        try:
+            if not tasks.extend_lease(task_id, lease):
+                print(f"⚠️ Lost the lease on {task_id}; another worker has it now")
+                return
+        except Exception as e:
+            print(f"⚠️ Lease renewal failed for {task_id}: {e}")
+
+
+def _run(name: str, handler):
+    while not _stop.is_set():
+        try:
+            task = tasks.claim_task()
+        except Exception as e:
+            print(f"⚠️ Worker {name} could not claim a task: {e}")
+            task = None
+        if task is None:
+            tasks.task_added.wait(_poll_interval())
+            tasks.task_added.clear()
+            continue
+
+        _state[name] = {
+            "task": task["id"],
+            "lease": task["lease"],
+            "type": task["type"],
+            "topic": task["payload"].get("topic", ""),
+            "started": time.time(),
+        }
+        done = threading.Event()
+        threading.Thread(target=_heartbeat, args=(task["id"], task["lease"], done), daemon=True).start()
+        try:
+            result = handler(task)
+            if not tasks.complete_task(task["id"], task["lease"], result or ""):
+                print(f"⚠️ Lost the lease on {task['id']}; its result was dropped")
+                continue
+            with _totals_lock:
+                _totals["done"] += 1
+            print(f"✅ Background task {task['id']} ({task['type']}) finished")
+        except Exception as e:
+            if not tasks.fail_task(task["id"], task["lease"], str(e)):
+                print(f"⚠️ Lost the lease on {task['id']}; its failure was dropped")
+                continue
+            with _totals_lock:
+                _totals["failed"] += 1
+            print(f"❌ Background task {task['id']} failed: {e}")
+        finally:
+            done.set()
+            _state[name] = None
+
+
+def start_pool(handler, size: int | None = None):
+    """Start the worker threads once per process; later calls are no-ops."""
+    with _lock:
+        if _threads:
+            return
+        _stop.clear()
+        for i in range(size or get_pool_size()):
+            name = f"orion-worker-{i + 1}"
+            _state[name] = None
+            thread = threading.Thread(target=_run, args=(name, handler), name=name, daemon=True)
+            thread.start()
+            _threads.append(thread)
+        atexit.register(_release_claims)
+
+
+def running() -> bool:
+    """True when this process runs the pool (so commands needn't drain the queue themselves)."""
+    return bool(_threads)
+
+
+def _release_claims():
+    # the interpreter is exiting and will kill the workers mid-task; requeue their tasks now
+    for s in list(_state.values()):
+        if s:
+            try:
+                tasks.release_task(s["task"], s["lease"])
+            except Exception as e:
+                print(f"⚠️ Could not release {s['task']}: {e}")
+
+
+def stop_pool(timeout: float = 5.0):
+    """Ask workers to exit after their current task."""
+    with _lock:
+        _stop.set()
+        tasks.task_added.set()
+        for thread in _threads:
+            thread.join(timeout)
+        _threads.clear()
+        _state.clear()
+
+
+def progress() -> dict:
+    """Snapshot of the pool: running tasks with elapsed time, queue counts and totals."""
+    now = time.time()
+    running = [
+        {"worker": name, "task": s["task"], "type": s["type"], "topic": s["topic"], "elapsed": round(now - s["started"], 1)}
+        for name, s in list(_state.items())
+        if s
+    ]
+    with _totals_lock:
+        totals = dict(_totals)
+    return {
+        "workers": len(_threads),
+        "busy": len(running),
+        "running": running,
+        "queue": tasks.count_tasks(),
+        **totals,
+    }